@@ -74,6 +74,10 @@ def create_app(config_name='default'):
     from app.errors import register_error_handlers
     register_error_handlers(app)
     
+    # Cache compiled templates on disk
+    from app.core.email_templates import init_template_cache
+    init_template_cache(app)
+    
     # Register CLI commands
     from app.commands import register_commands
     register_commands(app)
@@ -6,6 +6,7 @@ from app import db, limiter
 from app.utils.email import send_verification_email, send_reset_password_email
 from app.utils.validators import validate_password, validate_email
 from app.utils.decorators import verify_recaptcha
+from app.core.reminders import schedule_reminder
 from .models import (
     login_model, register_model, user_model,
     success_response, error_response
@@ -152,6 +153,8 @@ class EmailVerification(Resource):
             user.email_verified = True
             db.session.commit()
             
+            schedule_reminder(user)
+            
             return jsonify({'message': 'Email verified successfully'}), 200
         except Exception as e:
             current_app.logger.error(f"Email verification error: {str(e)}")
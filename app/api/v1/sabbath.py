@@ -5,6 +5,7 @@ from app.models.user import User
 from app import db, limiter
 from app.utils.monitoring import track_resource_usage
 from app.utils.sabbath import calculate_sabbath_times
+from app.core.reminders import schedule_reminder
 from datetime import datetime, timedelta
 from .models import (
     sabbath_times, preparation_checklist,
@@ -164,12 +165,14 @@ class SabbathPreferences(Resource):
         data = request.get_json()
         
         try:
-            profile = user.profile or {}
+            profile = dict(user.profile or {})
             profile['sabbath_preferences'] = data
             user.profile = profile
             
             db.session.commit()
             
+            schedule_reminder(user)
+            
             return jsonify({
                 'message': 'Preferences updated successfully',
                 'preferences': data
@@ -1,11 +1,23 @@
 from flask_restx import Namespace, Resource
-from flask import request
+from flask import request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.user import User, SpiritualRecord, PrayerRequest, BibleStudy
+from app.models.user import (
+    User, SpiritualRecord, PrayerRequest, BibleStudy, BibleCoverage, GrowthAnalytics,
+    METRIC_COLUMNS
+)
 from app import db, limiter
 from app.utils.monitoring import track_resource_usage
+from app.utils.fieldsets import parse_fields, apply_fieldset, serialize_fields
+from app.core.export import EXPORT_MODELS, iter_ndjson, iter_csv
+from app.core.search import SEARCH_KINDS, search_user_content
+from app.core.bible import VerseCoverage, normalize_book, verse_count, parse_verse_ranges
+from app.core.streaks import get_goal_progress
+from app.core.growth import growth_chart
+from app.core.write_buffer import (
+    WriteBuffer, create_entry, write_buffer_enabled, read_your_writes
+)
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import func, case
 from .models import (
     spiritual_record, prayer_request, bible_study,
     success_response, error_response, pagination
@@ -25,11 +37,41 @@ spiritual_ns.models[success_response.name] = success_response
 spiritual_ns.models[error_response.name] = error_response
 spiritual_ns.models[pagination.name] = pagination
 
+# Field serializers used for sparse fieldsets (?fields=id,title,...)
+RECORD_FIELDS = {
+    'id': lambda r: r.id,
+    'date': lambda r: r.date.isoformat(),
+    'category': lambda r: r.category,
+    'metrics': lambda r: r.metrics,
+    'notes': lambda r: r.notes
+}
+
+PRAYER_REQUEST_FIELDS = {
+    'id': lambda r: r.id,
+    'title': lambda r: r.title,
+    'request': lambda r: r.request,
+    'is_answered': lambda r: r.is_answered,
+    'answer_notes': lambda r: r.answer_notes,
+    'created_at': lambda r: r.created_at.isoformat(),
+    'answered_at': lambda r: r.answered_at.isoformat() if r.answered_at else None
+}
+
+BIBLE_STUDY_FIELDS = {
+    'id': lambda s: s.id,
+    'date': lambda s: s.date.isoformat(),
+    'book': lambda s: s.book,
+    'chapter': lambda s: s.chapter,
+    'verses': lambda s: s.verses,
+    'notes': lambda s: s.notes,
+    'duration_minutes': lambda s: s.duration_minutes
+}
+
 @spiritual_ns.route('/record')
 class SpiritualRecordResource(Resource):
     @spiritual_ns.doc('create_record')
     @spiritual_ns.expect(spiritual_record)
     @spiritual_ns.response(201, 'Record created', success_response)
+    @spiritual_ns.response(202, 'Queued for a batched write', success_response)
     @spiritual_ns.response(400, 'Validation error', error_response)
     @track_resource_usage('create_spiritual_record')
     def post(self):
@@ -43,15 +85,14 @@ class SpiritualRecordResource(Resource):
             return jsonify({'error': validation}), 400
         
         try:
-            record = SpiritualRecord(
-                user_id=current_user_id,
-                category=data['category'],
-                metrics=data['metrics'],
-                notes=data.get('notes', '')
-            )
+            if write_buffer_enabled():
+                write_id = WriteBuffer.from_app().enqueue('spiritual_record', current_user_id, data)
+                return jsonify({
+                    'message': 'Record accepted',
+                    'write_id': write_id
+                }), 202
             
-            db.session.add(record)
-            db.session.commit()
+            record = create_entry('spiritual_record', current_user_id, data)
             
             return jsonify({
                 'message': 'Record created successfully',
@@ -70,8 +111,11 @@ class SpiritualRecordList(Resource):
     @spiritual_ns.param('end_date', 'End date (YYYY-MM-DD)')
     @spiritual_ns.param('page', 'Page number', type=int)
     @spiritual_ns.param('per_page', 'Items per page', type=int)
+    @spiritual_ns.param('fields', 'Comma separated fields to return (e.g. id,date,category)')
     @spiritual_ns.response(200, 'Success', model=spiritual_record)
+    @spiritual_ns.response(400, 'Invalid fields', error_response)
     @track_resource_usage('get_spiritual_records')
+    @read_your_writes
     def get(self):
         """Get user's spiritual records with filtering and pagination"""
         current_user_id = get_jwt_identity()
@@ -83,8 +127,14 @@ class SpiritualRecordList(Resource):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 50)
         
+        try:
+            fields = parse_fields(request.args.get('fields'), RECORD_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Build query
         query = SpiritualRecord.query.filter_by(user_id=current_user_id)
+        query = apply_fieldset(query, SpiritualRecord, fields)
         
         if category:
             query = query.filter_by(category=category)
@@ -100,13 +150,7 @@ class SpiritualRecordList(Resource):
         
         return jsonify({
             'records': [
-                {
-                    'id': r.id,
-                    'date': r.date.isoformat(),
-                    'category': r.category,
-                    'metrics': r.metrics,
-                    'notes': r.notes
-                }
+                serialize_fields(r, fields, RECORD_FIELDS)
                 for r in records.items
             ],
             'total': records.total,
@@ -114,11 +158,36 @@ class SpiritualRecordList(Resource):
             'current_page': records.page
         }), 200
 
+@spiritual_ns.route('/records/<int:record_id>')
+class SpiritualRecordItem(Resource):
+    @spiritual_ns.doc('get_record')
+    @spiritual_ns.param('fields', 'Comma separated fields to return')
+    @spiritual_ns.response(200, 'Success', model=spiritual_record)
+    @spiritual_ns.response(404, 'Record not found', error_response)
+    @track_resource_usage('get_spiritual_record')
+    @read_your_writes
+    def get(self, record_id):
+        """Get a single record, e.g. to load its full text lazily"""
+        current_user_id = get_jwt_identity()
+        
+        try:
+            fields = parse_fields(request.args.get('fields'), RECORD_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = SpiritualRecord.query.filter_by(id=record_id, user_id=current_user_id)
+        item = apply_fieldset(query, SpiritualRecord, fields).first()
+        if not item:
+            return jsonify({'error': 'Record not found'}), 404
+        
+        return jsonify(serialize_fields(item, fields, RECORD_FIELDS)), 200
+
 @spiritual_ns.route('/prayer-request')
 class PrayerRequestResource(Resource):
     @spiritual_ns.doc('create_prayer_request')
     @spiritual_ns.expect(prayer_request)
     @spiritual_ns.response(201, 'Prayer request created', success_response)
+    @spiritual_ns.response(202, 'Queued for a batched write', success_response)
     @track_resource_usage('create_prayer_request')
     def post(self):
         """Create a new prayer request"""
@@ -129,15 +198,14 @@ class PrayerRequestResource(Resource):
             return jsonify({'error': 'Missing required fields'}), 400
         
         try:
-            prayer_request = PrayerRequest(
-                user_id=current_user_id,
-                title=data['title'],
-                request=data['request'],
-                is_private=data.get('is_private', True)
-            )
+            if write_buffer_enabled():
+                write_id = WriteBuffer.from_app().enqueue('prayer_request', current_user_id, data)
+                return jsonify({
+                    'message': 'Prayer request accepted',
+                    'write_id': write_id
+                }), 202
             
-            db.session.add(prayer_request)
-            db.session.commit()
+            prayer_request = create_entry('prayer_request', current_user_id, data)
             
             return jsonify({
                 'message': 'Prayer request created successfully',
@@ -154,8 +222,11 @@ class PrayerRequestList(Resource):
     @spiritual_ns.param('status', 'Filter by status (answered, unanswered, all)')
     @spiritual_ns.param('page', 'Page number', type=int)
     @spiritual_ns.param('per_page', 'Items per page', type=int)
+    @spiritual_ns.param('fields', 'Comma separated fields to return (e.g. id,title,is_answered)')
     @spiritual_ns.response(200, 'Success', model=prayer_request)
+    @spiritual_ns.response(400, 'Invalid fields', error_response)
     @track_resource_usage('get_prayer_requests')
+    @read_your_writes
     def get(self):
         """Get user's prayer requests"""
         current_user_id = get_jwt_identity()
@@ -165,8 +236,14 @@ class PrayerRequestList(Resource):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 50)
         
+        try:
+            fields = parse_fields(request.args.get('fields'), PRAYER_REQUEST_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Build query
         query = PrayerRequest.query.filter_by(user_id=current_user_id)
+        query = apply_fieldset(query, PrayerRequest, fields)
         
         if status == 'answered':
             query = query.filter_by(is_answered=True)
@@ -180,15 +257,7 @@ class PrayerRequestList(Resource):
         
         return jsonify({
             'prayer_requests': [
-                {
-                    'id': r.id,
-                    'title': r.title,
-                    'request': r.request,
-                    'is_answered': r.is_answered,
-                    'answer_notes': r.answer_notes,
-                    'created_at': r.created_at.isoformat(),
-                    'answered_at': r.answered_at.isoformat() if r.answered_at else None
-                }
+                serialize_fields(r, fields, PRAYER_REQUEST_FIELDS)
                 for r in requests.items
             ],
             'total': requests.total,
@@ -196,11 +265,36 @@ class PrayerRequestList(Resource):
             'current_page': requests.page
         }), 200
 
+@spiritual_ns.route('/prayer-requests/<int:request_id>')
+class PrayerRequestItem(Resource):
+    @spiritual_ns.doc('get_prayer_request')
+    @spiritual_ns.param('fields', 'Comma separated fields to return')
+    @spiritual_ns.response(200, 'Success', model=prayer_request)
+    @spiritual_ns.response(404, 'Prayer request not found', error_response)
+    @track_resource_usage('get_prayer_request')
+    @read_your_writes
+    def get(self, request_id):
+        """Get a single prayer request, e.g. to load its full text lazily"""
+        current_user_id = get_jwt_identity()
+        
+        try:
+            fields = parse_fields(request.args.get('fields'), PRAYER_REQUEST_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = PrayerRequest.query.filter_by(id=request_id, user_id=current_user_id)
+        item = apply_fieldset(query, PrayerRequest, fields).first()
+        if not item:
+            return jsonify({'error': 'Prayer request not found'}), 404
+        
+        return jsonify(serialize_fields(item, fields, PRAYER_REQUEST_FIELDS)), 200
+
 @spiritual_ns.route('/bible-study')
 class BibleStudyResource(Resource):
     @spiritual_ns.doc('create_bible_study')
     @spiritual_ns.expect(bible_study)
     @spiritual_ns.response(201, 'Bible study recorded', success_response)
+    @spiritual_ns.response(202, 'Queued for a batched write', success_response)
     @track_resource_usage('create_bible_study')
     def post(self):
         """Record a Bible study session"""
@@ -211,18 +305,29 @@ class BibleStudyResource(Resource):
         if not all(k in data for k in required_fields):
             return jsonify({'error': 'Missing required fields'}), 400
         
+        chapter = data['chapter']
+        if not isinstance(chapter, int) or isinstance(chapter, bool) or chapter < 1:
+            return jsonify({'error': 'Chapter must be a positive integer'}), 400
+        
+        book_id = normalize_book(data['book'])
+        if book_id:
+            max_verse = verse_count(book_id, chapter)
+            if not max_verse:
+                return jsonify({'error': f"Invalid chapter: {chapter}"}), 400
+            try:
+                parse_verse_ranges(data.get('verses'), max_verse)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
         try:
-            study = BibleStudy(
-                user_id=current_user_id,
-                book=data['book'],
-                chapter=data['chapter'],
-                verses=data.get('verses'),
-                notes=data.get('notes'),
-                duration_minutes=data['duration_minutes']
-            )
+            if write_buffer_enabled():
+                write_id = WriteBuffer.from_app().enqueue('bible_study', current_user_id, data)
+                return jsonify({
+                    'message': 'Bible study accepted',
+                    'write_id': write_id
+                }), 202
             
-            db.session.add(study)
-            db.session.commit()
+            study = create_entry('bible_study', current_user_id, data)
             
             return jsonify({
                 'message': 'Bible study recorded successfully',
@@ -241,8 +346,11 @@ class BibleStudyList(Resource):
     @spiritual_ns.param('end_date', 'End date (YYYY-MM-DD)')
     @spiritual_ns.param('page', 'Page number', type=int)
     @spiritual_ns.param('per_page', 'Items per page', type=int)
+    @spiritual_ns.param('fields', 'Comma separated fields to return (e.g. id,date,book,chapter)')
     @spiritual_ns.response(200, 'Success', model=bible_study)
+    @spiritual_ns.response(400, 'Invalid fields', error_response)
     @track_resource_usage('get_bible_studies')
+    @read_your_writes
     def get(self):
         """Get user's Bible study records"""
         current_user_id = get_jwt_identity()
@@ -254,11 +362,21 @@ class BibleStudyList(Resource):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 50)
         
+        try:
+            fields = parse_fields(request.args.get('fields'), BIBLE_STUDY_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Build query
         query = BibleStudy.query.filter_by(user_id=current_user_id)
+        query = apply_fieldset(query, BibleStudy, fields)
         
         if book:
-            query = query.filter_by(book=book)
+            book_id = normalize_book(book)
+            if book_id:
+                query = query.filter_by(book_id=book_id)
+            else:
+                query = query.filter_by(book=book)
         if start_date:
             query = query.filter(BibleStudy.date >= start_date)
         if end_date:
@@ -271,15 +389,7 @@ class BibleStudyList(Resource):
         
         return jsonify({
             'bible_studies': [
-                {
-                    'id': s.id,
-                    'date': s.date.isoformat(),
-                    'book': s.book,
-                    'chapter': s.chapter,
-                    'verses': s.verses,
-                    'notes': s.notes,
-                    'duration_minutes': s.duration_minutes
-                }
+                serialize_fields(s, fields, BIBLE_STUDY_FIELDS)
                 for s in studies.items
             ],
             'total': studies.total,
@@ -287,12 +397,187 @@ class BibleStudyList(Resource):
             'current_page': studies.page
         }), 200
 
+@spiritual_ns.route('/bible-studies/<int:study_id>')
+class BibleStudyItem(Resource):
+    @spiritual_ns.doc('get_bible_study')
+    @spiritual_ns.param('fields', 'Comma separated fields to return')
+    @spiritual_ns.response(200, 'Success', model=bible_study)
+    @spiritual_ns.response(404, 'Bible study not found', error_response)
+    @track_resource_usage('get_bible_study')
+    @read_your_writes
+    def get(self, study_id):
+        """Get a single bible study, e.g. to load its full text lazily"""
+        current_user_id = get_jwt_identity()
+        
+        try:
+            fields = parse_fields(request.args.get('fields'), BIBLE_STUDY_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = BibleStudy.query.filter_by(id=study_id, user_id=current_user_id)
+        item = apply_fieldset(query, BibleStudy, fields).first()
+        if not item:
+            return jsonify({'error': 'Bible study not found'}), 404
+        
+        return jsonify(serialize_fields(item, fields, BIBLE_STUDY_FIELDS)), 200
+
+@spiritual_ns.route('/export')
+class SpiritualExport(Resource):
+    @spiritual_ns.doc('export_history')
+    @spiritual_ns.param('format', 'Export format (ndjson, csv)')
+    @spiritual_ns.param('kind', 'Table to export (spiritual_records, prayer_requests, bible_studies); required for csv')
+    @spiritual_ns.response(200, 'Streamed export')
+    @spiritual_ns.response(400, 'Invalid export options', error_response)
+    @limiter.limit("10/hour")
+    def get(self):
+        """Stream the user's full history for data portability"""
+        current_user_id = get_jwt_identity()
+        
+        fmt = request.args.get('format', 'ndjson')
+        kind = request.args.get('kind')
+        
+        if kind and kind not in EXPORT_MODELS:
+            return jsonify({'error': f'Invalid kind: {kind}'}), 400
+        
+        if fmt == 'ndjson':
+            kinds = [kind] if kind else list(EXPORT_MODELS)
+            body = iter_ndjson(kinds, user_id=current_user_id)
+            mimetype = 'application/x-ndjson'
+            filename = f'{kind or "history"}.ndjson'
+        elif fmt == 'csv':
+            if not kind:
+                return jsonify({'error': 'kind is required for csv exports'}), 400
+            body = iter_csv(kind, user_id=current_user_id)
+            mimetype = 'text/csv'
+            filename = f'{kind}.csv'
+        else:
+            return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+
+# Compact fields returned with each search hit
+SEARCH_RESULT_FIELDS = {
+    'spiritual_records': (SpiritualRecord, RECORD_FIELDS, ['id', 'date', 'category']),
+    'prayer_requests': (PrayerRequest, PRAYER_REQUEST_FIELDS, ['id', 'title', 'is_answered', 'created_at']),
+    'bible_studies': (BibleStudy, BIBLE_STUDY_FIELDS, ['id', 'date', 'book', 'chapter'])
+}
+
+@spiritual_ns.route('/search')
+class SpiritualSearch(Resource):
+    @spiritual_ns.doc('search')
+    @spiritual_ns.param('q', 'Search query')
+    @spiritual_ns.param('kind', 'Restrict to spiritual_records, prayer_requests or bible_studies (comma separated)')
+    @spiritual_ns.param('page', 'Page number', type=int)
+    @spiritual_ns.param('per_page', 'Items per page', type=int)
+    @spiritual_ns.response(200, 'Success', success_response)
+    @spiritual_ns.response(400, 'Invalid search', error_response)
+    @track_resource_usage('search_spiritual_content')
+    @read_your_writes
+    def get(self):
+        """Search prayer requests, study notes and record notes"""
+        current_user_id = get_jwt_identity()
+        
+        query = request.args.get('q', '').strip()
+        kind = request.args.get('kind')
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 20, type=int), 50)
+        
+        if not query:
+            return jsonify({'error': 'Search query is required'}), 400
+        
+        kinds = [k.strip() for k in kind.split(',')] if kind else list(SEARCH_KINDS)
+        
+        try:
+            hits = search_user_content(current_user_id, query, kinds, page, per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            current_app.logger.error(f"Search error: {str(e)}")
+            return jsonify({'error': 'Search failed'}), 500
+        
+        # Load the compact fields of every hit, one query per table
+        items = {}
+        for kind_name, (model, serializers, fields) in SEARCH_RESULT_FIELDS.items():
+            ids = [hit['id'] for hit in hits if hit['type'] == kind_name]
+            if not ids:
+                continue
+            hit_query = model.query.filter(model.id.in_(ids), model.user_id == current_user_id)
+            for item in apply_fieldset(hit_query, model, fields):
+                items[(kind_name, item.id)] = serialize_fields(item, fields, serializers)
+        
+        return jsonify({
+            'results': [
+                dict(hit, item=items[(hit['type'], hit['id'])])
+                for hit in hits if (hit['type'], hit['id']) in items
+            ],
+            'page': page,
+            'per_page': per_page
+        }), 200
+
+@spiritual_ns.route('/bible-progress')
+class BibleProgress(Resource):
+    @spiritual_ns.doc('get_bible_progress')
+    @spiritual_ns.param('book', 'Restrict the breakdown to one book')
+    @spiritual_ns.response(200, 'Success', success_response)
+    @spiritual_ns.response(400, 'Unknown book', error_response)
+    @track_resource_usage('get_bible_progress')
+    @read_your_writes
+    def get(self):
+        """Get how much of the Bible (or of one book) the user has studied"""
+        current_user_id = get_jwt_identity()
+        
+        book = request.args.get('book')
+        book_id = normalize_book(book) if book else None
+        if book and not book_id:
+            return jsonify({'error': f'Unknown book: {book}'}), 400
+        
+        entry = BibleCoverage.query.get(current_user_id)
+        coverage = entry.coverage if entry else VerseCoverage()
+        
+        return jsonify(coverage.progress(book_id)), 200
+
+@spiritual_ns.route('/streaks')
+class SpiritualStreaks(Resource):
+    @spiritual_ns.doc('get_streaks')
+    @spiritual_ns.response(200, 'Success', success_response)
+    @track_resource_usage('get_spiritual_streaks')
+    @read_your_writes
+    def get(self):
+        """Get the current daily streak and this week's goal progress"""
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        return jsonify(get_goal_progress(user)), 200
+
+@spiritual_ns.route('/growth')
+class SpiritualGrowth(Resource):
+    @spiritual_ns.doc('get_growth')
+    @spiritual_ns.param('weeks', 'Number of recent weekly chart points', type=int)
+    @spiritual_ns.response(200, 'Success', success_response)
+    @spiritual_ns.response(404, 'No analysis yet', error_response)
+    @track_resource_usage('get_spiritual_growth')
+    def get(self):
+        """Get weekly growth chart points, trends, patterns and insights"""
+        current_user_id = get_jwt_identity()
+        
+        entry = GrowthAnalytics.query.get(current_user_id)
+        if entry is None:
+            return jsonify({'error': 'Growth analysis not available yet'}), 404
+        
+        weeks = request.args.get('weeks', type=int)
+        return jsonify(growth_chart(entry, weeks)), 200
+
 @spiritual_ns.route('/stats')
 class SpiritualStats(Resource):
     @spiritual_ns.doc('get_stats')
     @spiritual_ns.param('days', 'Number of days to analyze', type=int)
     @spiritual_ns.response(200, 'Success', success_response)
     @track_resource_usage('get_spiritual_stats')
+    @read_your_writes
     def get(self):
         """Get spiritual growth statistics"""
         current_user_id = get_jwt_identity()
@@ -310,7 +595,7 @@ class SpiritualStats(Resource):
                 func.avg(BibleStudy.duration_minutes).label('avg_duration')
             ).filter(
                 BibleStudy.user_id == current_user_id,
-                BibleStudy.date >= start_date
+                BibleStudy.date >= start_date.date()
             ).first()
             
             # Prayer request stats
@@ -323,16 +608,28 @@ class SpiritualStats(Resource):
             ).first()
             
             # Spiritual record stats by category
-            category_stats = {}
-            for category in ['bible_study', 'prayer', 'service', 'health']:
-                stats = db.session.query(
-                    func.count(SpiritualRecord.id).label('total_records')
-                ).filter(
-                    SpiritualRecord.user_id == current_user_id,
-                    SpiritualRecord.category == category,
-                    SpiritualRecord.date >= start_date
-                ).first()
-                category_stats[category] = stats.total_records if stats else 0
+            category_stats = {
+                category: 0 for category in ['bible_study', 'prayer', 'service', 'health']
+            }
+            category_rows = db.session.query(
+                SpiritualRecord.category,
+                func.count(SpiritualRecord.id)
+            ).filter(
+                SpiritualRecord.user_id == current_user_id,
+                SpiritualRecord.date >= start_date.date()
+            ).group_by(SpiritualRecord.category).all()
+            for category, total_records in category_rows:
+                if category in category_stats:
+                    category_stats[category] = total_records
+            
+            # Metric totals aggregated over the extracted numeric columns
+            metric_totals = db.session.query(*[
+                func.coalesce(func.sum(getattr(SpiritualRecord, column)), 0).label(column)
+                for column in METRIC_COLUMNS
+            ]).filter(
+                SpiritualRecord.user_id == current_user_id,
+                SpiritualRecord.date >= start_date.date()
+            ).first()
             
             return jsonify({
                 'bible_study': {
@@ -345,6 +642,10 @@ class SpiritualStats(Resource):
                     'answered_prayers': prayer_stats.answered_prayers or 0
                 },
                 'categories': category_stats,
+                'metrics': {
+                    column: round(float(getattr(metric_totals, column)), 2)
+                    for column in METRIC_COLUMNS
+                },
                 'date_range': {
                     'start': start_date.isoformat(),
                     'end': end_date.isoformat(),
@@ -0,0 +1,173 @@
+import os
+import sys
+import click
+from app.core.export import (
+    EXPORT_MODELS, EXPORT_FORMATS, DEFAULT_BATCH_SIZE,
+    iter_ndjson, iter_csv, write_parquet
+)
+from app.core import backfills, growth_batch, growth_model, partitions, reminders, themes
+from app.core.write_buffer import WriteBuffer
+
+def register_commands(app):
+    """Register CLI commands"""
+
+    @app.cli.command('export-history')
+    @click.option('--user-id', type=int, help='Export a single user (default: all users)')
+    @click.option('--kind', type=click.Choice(list(EXPORT_MODELS)), multiple=True,
+                  help='Table to export (repeatable, default: all)')
+    @click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='ndjson')
+    @click.option('--output', '-o', default='-',
+                  help='Output file for ndjson ("-" for stdout), directory for csv/parquet')
+    @click.option('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    def export_history(user_id, kind, fmt, output, batch_size):
+        """Stream spiritual records, prayer requests and Bible studies."""
+        kinds = list(kind) or list(EXPORT_MODELS)
+
+        if fmt == 'ndjson':
+            stream = sys.stdout if output == '-' else open(output, 'w')
+            try:
+                for line in iter_ndjson(kinds, user_id, batch_size):
+                    stream.write(line)
+            finally:
+                if stream is not sys.stdout:
+                    stream.close()
+            return
+
+        if output == '-':
+            raise click.UsageError(f'--output must be a directory for {fmt} exports')
+        os.makedirs(output, exist_ok=True)
+
+        for name in kinds:
+            path = os.path.join(output, f'{name}.{fmt}')
+            if fmt == 'csv':
+                with open(path, 'w', newline='') as f:
+                    for line in iter_csv(name, user_id, batch_size):
+                        f.write(line)
+            else:
+                total = write_parquet(name, path, user_id, batch_size)
+                click.echo(f'{name}: {total} rows', err=True)
+            click.echo(f'Wrote {path}', err=True)
+
+    @app.cli.command('backfill-metric-columns')
+    @click.option('--batch-size', type=int, default=backfills.DEFAULT_BATCH_SIZE)
+    def backfill_metric_columns(batch_size):
+        """Populate numeric metric columns from the metrics JSONB."""
+        total = backfills.backfill_metric_columns(
+            batch_size,
+            progress=lambda n: click.echo(f'{n} records updated', err=True)
+        )
+        click.echo(f'Backfilled {total} spiritual records')
+
+    @app.cli.command('backfill-book-ids')
+    @click.option('--batch-size', type=int, default=backfills.DEFAULT_BATCH_SIZE)
+    def backfill_book_ids(batch_size):
+        """Populate canonical book IDs of existing Bible studies."""
+        total = backfills.backfill_book_ids(
+            batch_size,
+            progress=lambda n: click.echo(f'{n} studies examined', err=True)
+        )
+        click.echo(f'Backfilled book IDs for {total} Bible studies')
+
+    @app.cli.command('rebuild-bible-coverage')
+    @click.option('--batch-size', type=int, default=backfills.DEFAULT_USER_BATCH_SIZE)
+    def rebuild_bible_coverage(batch_size):
+        """Recompute verse coverage bitmaps from existing Bible studies."""
+        total = backfills.rebuild_bible_coverage(
+            batch_size,
+            progress=lambda n: click.echo(f'{n} users rebuilt', err=True)
+        )
+        click.echo(f'Rebuilt Bible coverage for {total} users')
+
+    @app.cli.command('flush-writes')
+    @click.option('--consumer', help='Consumer name (default: hostname and process)')
+    @click.option('--once', is_flag=True, help='Flush a single batch and exit')
+    def flush_writes(consumer, once):
+        """Insert buffered record writes in batched transactions."""
+        buffer = WriteBuffer.from_app(consumer)
+        buffer.ensure_group()
+        batch_size = app.config['WRITE_BUFFER_BATCH_SIZE']
+        block_ms = app.config['WRITE_BUFFER_FLUSH_INTERVAL_MS']
+
+        while True:
+            flushed = buffer.flush(batch_size, block_ms)
+            if once:
+                click.echo(f'Flushed {flushed} writes')
+                return
+
+    @app.cli.command('replay-dead-writes')
+    @click.option('--batch-size', type=int, default=100)
+    def replay_dead_writes(batch_size):
+        """Move dead-lettered buffered writes back onto the write stream."""
+        total = WriteBuffer.from_app().replay_dead_letters(batch_size)
+        click.echo(f'Replayed {total} writes')
+
+    @app.cli.command('maintain-partitions')
+    @click.option('--months-ahead', type=int, help='Future months to create (default: PARTITION_MONTHS_AHEAD)')
+    @click.option('--archive/--no-archive', default=True, help='Archive history past the horizon')
+    @click.option('--horizon-months', type=int, help='Months kept live (default: ARCHIVE_HORIZON_MONTHS)')
+    def maintain_partitions(months_ahead, archive, horizon_months):
+        """Create upcoming monthly partitions and archive old history."""
+        if months_ahead is None:
+            months_ahead = app.config['PARTITION_MONTHS_AHEAD']
+        for name in partitions.ensure_partitions(months_ahead):
+            click.echo(f'Created partition {name}', err=True)
+
+        if not archive:
+            return
+        if horizon_months is None:
+            horizon_months = app.config['ARCHIVE_HORIZON_MONTHS']
+        total = partitions.archive_history(
+            horizon_months,
+            progress=lambda kind, month, n: click.echo(f'{kind} {month:%Y-%m}: {n} rows archived', err=True)
+        )
+        click.echo(f'Archived {total} rows older than {horizon_months} months')
+
+    @app.cli.command('schedule-reminders')
+    @click.option('--batch-size', type=int, default=reminders.DEFAULT_BATCH_SIZE)
+    def schedule_reminders(batch_size):
+        """Rebuild the Sabbath reminder queue from user profiles."""
+        total = reminders.schedule_all_reminders(
+            batch_size,
+            progress=lambda n: click.echo(f'{n} users scheduled', err=True)
+        )
+        click.echo(f'Scheduled reminders for {total} users')
+
+    @app.cli.command('train-growth-model')
+    @click.option('--sample-size', type=int, help='Records sampled (default: GROWTH_MODEL_SAMPLE_SIZE)')
+    def train_growth_model(sample_size):
+        """Fit the cohort-wide growth clustering model and save a new version."""
+        if sample_size is None:
+            sample_size = app.config['GROWTH_MODEL_SAMPLE_SIZE']
+        model = growth_model.train_growth_model(sample_size)
+        if model is None:
+            raise click.ClickException('Not enough spiritual records to fit a model')
+        click.echo(f'Saved growth model {model.version}')
+
+    @app.cli.command('analyze-growth')
+    @click.option('--workers', type=int, help='Pool processes (default: CPU count)')
+    @click.option('--chunk-rows', type=int, default=growth_batch.DEFAULT_CHUNK_ROWS,
+                  help='Approximate records per unit of work')
+    def analyze_growth(workers, chunk_rows):
+        """Analyze the growth of every active user in one batch job."""
+        total = growth_batch.analyze_cohort_growth(
+            workers, chunk_rows,
+            progress=lambda n: click.echo(f'{n} users analyzed', err=True)
+        )
+        click.echo(f'Analyzed growth for {total} users')
+
+    @app.cli.command('apply-prayer-themes')
+    @click.option('--batch-size', type=int, default=themes.DEFAULT_BATCH_SIZE)
+    def apply_prayer_themes(batch_size):
+        """Fold pending prayer theme document counts into the index."""
+        total = themes.apply_document_deltas(batch_size)
+        click.echo(f'Applied {total} document count changes')
+
+    @app.cli.command('rebuild-prayer-themes')
+    @click.option('--batch-size', type=int, default=themes.DEFAULT_BATCH_SIZE)
+    def rebuild_prayer_themes(batch_size):
+        """Recreate the prayer theme index from existing prayer requests."""
+        total = themes.rebuild_theme_index(
+            batch_size,
+            progress=lambda n: click.echo(f'{n} prayer requests indexed', err=True)
+        )
+        click.echo(f'Indexed {total} prayer requests')
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -26,6 +27,21 @@ class Config:
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER')
     
+    # Compiled Jinja templates (empty to disable the on-disk cache)
+    TEMPLATE_BYTECODE_CACHE_DIR = os.getenv(
+        'TEMPLATE_BYTECODE_CACHE_DIR',
+        os.path.join(tempfile.gettempdir(), 'sabbath-jinja-cache')
+    )
+    
+    # Bulk email outbox (messages per second across all workers, shared by up to
+    # MAIL_MAX_DRAINERS concurrent drains, each over its worker's own SMTP session)
+    MAIL_SEND_RATE = float(os.getenv('MAIL_SEND_RATE', 10))
+    MAIL_MAX_DRAINERS = int(os.getenv('MAIL_MAX_DRAINERS', 4))
+    MAIL_OUTBOX_BATCH_SIZE = int(os.getenv('MAIL_OUTBOX_BATCH_SIZE', 100))
+    MAIL_DRAIN_LIMIT = int(os.getenv('MAIL_DRAIN_LIMIT', 2000))
+    MAIL_MAX_RETRIES = int(os.getenv('MAIL_MAX_RETRIES', 5))
+    MAIL_RETRY_BACKOFF = float(os.getenv('MAIL_RETRY_BACKOFF', 30))  # seconds, doubled per attempt
+    
     # Security
     BCRYPT_LOG_ROUNDS = 13
     PASSWORD_RESET_EXPIRATION = 3600  # 1 hour
@@ -35,9 +51,45 @@ class Config:
     RATELIMIT_DEFAULT = "200 per day"
     RATELIMIT_STORAGE_URL = REDIS_URL
     
-    # Celery
+    # Group-commit write buffer (run `flask flush-writes` when enabled)
+    WRITE_BUFFER_ENABLED = os.getenv('WRITE_BUFFER_ENABLED', 'false').lower() == 'true'
+    WRITE_BUFFER_STREAM = os.getenv('WRITE_BUFFER_STREAM', 'writes:spiritual')
+    WRITE_BUFFER_GROUP = 'flushers'
+    WRITE_BUFFER_BATCH_SIZE = int(os.getenv('WRITE_BUFFER_BATCH_SIZE', 500))
+    WRITE_BUFFER_FLUSH_INTERVAL_MS = int(os.getenv('WRITE_BUFFER_FLUSH_INTERVAL_MS', 5))
+    WRITE_BUFFER_READ_WAIT_MS = int(os.getenv('WRITE_BUFFER_READ_WAIT_MS', 200))
+    
+    # History partitions (see `flask maintain-partitions`)
+    PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+    ARCHIVE_HORIZON_MONTHS = int(os.getenv('ARCHIVE_HORIZON_MONTHS', 24))
+    
+    # Cohort-wide growth clustering model (see `flask train-growth-model`)
+    GROWTH_MODEL_SAMPLE_SIZE = int(os.getenv('GROWTH_MODEL_SAMPLE_SIZE', 100000))
+    GROWTH_MODEL_KEEP = int(os.getenv('GROWTH_MODEL_KEEP', 3))  # versions kept in growth_models
+    GROWTH_MODEL_CHECK_INTERVAL = int(os.getenv('GROWTH_MODEL_CHECK_INTERVAL', 300))  # seconds between new-version checks
+    
+    # Celery (point CELERY_RESULT_BACKEND at a separate Redis database to keep results out of the cache)
     CELERY_BROKER_URL = REDIS_URL
-    CELERY_RESULT_BACKEND = REDIS_URL
+    CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', REDIS_URL)
+    CELERY_RESULT_EXPIRES = int(os.getenv('CELERY_RESULT_EXPIRES', 3600))  # seconds
+    
+    # Worker settings per queue, chosen by CELERY_WORKER_QUEUE (see Procfile)
+    CELERY_QUEUE_SETTINGS = {
+        'realtime': {
+            'concurrency': int(os.getenv('CELERY_REALTIME_CONCURRENCY', 8)),
+            'prefetch_multiplier': int(os.getenv('CELERY_REALTIME_PREFETCH', 4))
+        },
+        'batch': {
+            'concurrency': int(os.getenv('CELERY_BATCH_CONCURRENCY', 2)),
+            'prefetch_multiplier': 1,
+            'acks_late': True
+        }
+    }
+    
+    # Per-task resource telemetry in Celery workers (see app/utils/telemetry.py)
+    TASK_TELEMETRY_ENABLED = os.getenv('TASK_TELEMETRY_ENABLED', 'false').lower() == 'true'
+    TASK_PROFILE_SAMPLE_RATE = float(os.getenv('TASK_PROFILE_SAMPLE_RATE', 0))  # fraction of runs profiled
+    TASK_PROFILE_DIR = os.getenv('TASK_PROFILE_DIR', 'profiles/tasks')
     
     # API
     HEBCAL_API_KEY = os.getenv('HEBCAL_API_KEY')
@@ -0,0 +1,153 @@
+"""Core functionality for batched backfills of derived columns."""
+
+from datetime import datetime
+from typing import Callable, Optional
+from app import db
+from app.core.bible import VerseCoverage, normalize_book
+from app.models.user import (
+    SpiritualRecord, BibleStudy, BibleCoverage, extract_metric_columns
+)
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_USER_BATCH_SIZE = 500
+
+def backfill_metric_columns(batch_size: int = DEFAULT_BATCH_SIZE,
+                            progress: Optional[Callable[[int], None]] = None) -> int:
+    """Populate the numeric metric columns of existing spiritual records.
+
+    Rows are walked in primary key order and each batch is written and
+    committed on its own, so the backfill can run against a live table
+    and be resumed safely.
+
+    Args:
+        batch_size: Number of rows updated per transaction
+        progress: Optional callback receiving the running row count
+
+    Returns:
+        Number of rows updated
+    """
+    last_id = 0
+    total = 0
+
+    while True:
+        rows = db.session.query(
+            SpiritualRecord.id, SpiritualRecord.metrics
+        ).filter(
+            SpiritualRecord.id > last_id,
+            SpiritualRecord.bible_study_minutes.is_(None),
+            SpiritualRecord.prayer_minutes.is_(None),
+            SpiritualRecord.service_hours.is_(None),
+            SpiritualRecord.meditation_minutes.is_(None)
+        ).order_by(SpiritualRecord.id).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        db.session.bulk_update_mappings(SpiritualRecord, [
+            {'id': record_id, **extract_metric_columns(metrics)}
+            for record_id, metrics in rows
+        ])
+        db.session.commit()
+
+        last_id = rows[-1][0]
+        total += len(rows)
+        if progress:
+            progress(total)
+
+    return total
+
+def backfill_book_ids(batch_size: int = DEFAULT_BATCH_SIZE,
+                      progress: Optional[Callable[[int], None]] = None) -> int:
+    """Populate the canonical book_id of existing Bible studies.
+
+    Distinct book spellings are normalized once per batch, and rows whose
+    book cannot be normalized are left with a NULL book_id.
+
+    Args:
+        batch_size: Number of rows updated per transaction
+        progress: Optional callback receiving the running row count
+
+    Returns:
+        Number of rows examined
+    """
+    last_id = 0
+    total = 0
+
+    while True:
+        rows = db.session.query(BibleStudy.id, BibleStudy.book).filter(
+            BibleStudy.id > last_id,
+            BibleStudy.book_id.is_(None)
+        ).order_by(BibleStudy.id).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        book_ids = {book: normalize_book(book) for book in {book for _, book in rows}}
+        db.session.bulk_update_mappings(BibleStudy, [
+            {'id': study_id, 'book_id': book_ids[book]}
+            for study_id, book in rows if book_ids[book]
+        ])
+        db.session.commit()
+
+        last_id = rows[-1][0]
+        total += len(rows)
+        if progress:
+            progress(total)
+
+    return total
+
+def rebuild_bible_coverage(batch_size: int = DEFAULT_USER_BATCH_SIZE,
+                           progress: Optional[Callable[[int], None]] = None) -> int:
+    """Recompute every user's verse coverage bitmap from their studies.
+
+    Users are processed in id-ordered batches, each committed on its own.
+    Malformed verse specifications and non-canonical books are skipped.
+
+    Args:
+        batch_size: Number of users rebuilt per transaction
+        progress: Optional callback receiving the running user count
+
+    Returns:
+        Number of users whose coverage was rebuilt
+    """
+    last_user_id = 0
+    total = 0
+
+    while True:
+        user_ids = [
+            user_id for (user_id,) in db.session.query(BibleStudy.user_id).filter(
+                BibleStudy.user_id > last_user_id
+            ).distinct().order_by(BibleStudy.user_id).limit(batch_size)
+        ]
+        if not user_ids:
+            break
+
+        coverages = {user_id: VerseCoverage() for user_id in user_ids}
+        rows = db.session.query(
+            BibleStudy.user_id, BibleStudy.book, BibleStudy.chapter, BibleStudy.verses
+        ).filter(BibleStudy.user_id.in_(user_ids))
+
+        for user_id, book, chapter, verses in rows:
+            book_id = normalize_book(book)
+            if not book_id:
+                continue
+            try:
+                coverages[user_id].mark(book_id, chapter, verses)
+            except ValueError:
+                continue
+
+        for user_id, coverage in coverages.items():
+            db.session.merge(BibleCoverage(
+                user_id=user_id,
+                bitmap=coverage.to_bytes(),
+                verses_read=coverage.count(),
+                updated_at=datetime.utcnow()
+            ))
+        db.session.commit()
+
+        last_user_id = user_ids[-1]
+        total += len(user_ids)
+        if progress:
+            progress(total)
+
+    return total
@@ -0,0 +1,431 @@
+"""Core functionality for Bible references and verse coverage tracking."""
+
+import re
+import zlib
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+# Books of the Protestant canon in order, with the number of verses in
+# each chapter (KJV versification). A book's ID is its 1-based position.
+BOOKS = (
+    ('Genesis', (31, 25, 24, 26, 32, 22, 24, 22, 29, 32, 32, 20, 18, 24, 21, 16, 27, 33, 38, 18,
+                 34, 24, 20, 67, 34, 35, 46, 22, 35, 43, 55, 32, 20, 31, 29, 43, 36, 30, 23, 23,
+                 57, 38, 34, 34, 28, 34, 31, 22, 33, 26)),
+    ('Exodus', (22, 25, 22, 31, 23, 30, 25, 32, 35, 29, 10, 51, 22, 31, 27, 36, 16, 27, 25, 26,
+                36, 31, 33, 18, 40, 37, 21, 43, 46, 38, 18, 35, 23, 35, 35, 38, 29, 31, 43, 38)),
+    ('Leviticus', (17, 16, 17, 35, 19, 30, 38, 36, 24, 20, 47, 8, 59, 57, 33, 34, 16, 30, 37, 27,
+                   24, 33, 44, 23, 55, 46, 34)),
+    ('Numbers', (54, 34, 51, 49, 31, 27, 89, 26, 23, 36, 35, 16, 33, 45, 41, 50, 13, 32, 22, 29,
+                 35, 41, 30, 25, 18, 65, 23, 31, 40, 16, 54, 42, 56, 29, 34, 13)),
+    ('Deuteronomy', (46, 37, 29, 49, 33, 25, 26, 20, 29, 22, 32, 32, 18, 29, 23, 22, 20, 22, 21, 20,
+                     23, 30, 25, 22, 19, 19, 26, 68, 29, 20, 30, 52, 29, 12)),
+    ('Joshua', (18, 24, 17, 24, 15, 27, 26, 35, 27, 43, 23, 24, 33, 15, 63, 10, 18, 28, 51, 9,
+                45, 34, 16, 33)),
+    ('Judges', (36, 23, 31, 24, 31, 40, 25, 35, 57, 18, 40, 15, 25, 20, 20, 31, 13, 31, 30, 48,
+                25)),
+    ('Ruth', (22, 23, 18, 22)),
+    ('1 Samuel', (28, 36, 21, 22, 12, 21, 17, 22, 27, 27, 15, 25, 23, 52, 35, 23, 58, 30, 24, 42,
+                  15, 23, 29, 22, 44, 25, 12, 25, 11, 31, 13)),
+    ('2 Samuel', (27, 32, 39, 12, 25, 23, 29, 18, 13, 19, 27, 31, 39, 33, 37, 23, 29, 33, 43, 26,
+                  22, 51, 39, 25)),
+    ('1 Kings', (53, 46, 28, 34, 18, 38, 51, 66, 28, 29, 43, 33, 34, 31, 34, 34, 24, 46, 21, 43,
+                 29, 53)),
+    ('2 Kings', (18, 25, 27, 44, 27, 33, 20, 29, 37, 36, 21, 21, 25, 29, 38, 20, 41, 37, 37, 21,
+                 26, 20, 37, 20, 30)),
+    ('1 Chronicles', (54, 55, 24, 43, 26, 81, 40, 40, 44, 14, 47, 40, 14, 17, 29, 43, 27, 17, 19, 8,
+                      30, 19, 32, 31, 31, 32, 34, 21, 30)),
+    ('2 Chronicles', (17, 18, 17, 22, 14, 42, 22, 18, 31, 19, 23, 16, 22, 15, 19, 14, 19, 34, 11, 37,
+                      20, 12, 21, 27, 28, 23, 9, 27, 36, 27, 21, 33, 25, 33, 27, 23)),
+    ('Ezra', (11, 70, 13, 24, 17, 22, 28, 36, 15, 44)),
+    ('Nehemiah', (11, 20, 32, 23, 19, 19, 73, 18, 38, 39, 36, 47, 31)),
+    ('Esther', (22, 23, 15, 17, 14, 14, 10, 17, 32, 3)),
+    ('Job', (22, 13, 26, 21, 27, 30, 21, 22, 35, 22, 20, 25, 28, 22, 35, 22, 16, 21, 29, 29,
+             34, 30, 17, 25, 6, 14, 23, 28, 25, 31, 40, 22, 33, 37, 16, 33, 24, 41, 30, 24,
+             34, 17)),
+    ('Psalms', (6, 12, 8, 8, 12, 10, 17, 9, 20, 18, 7, 8, 6, 7, 5, 11, 15, 50, 14, 9,
+                13, 31, 6, 10, 22, 12, 14, 9, 11, 12, 24, 11, 22, 22, 28, 12, 40, 22, 13, 17,
+                13, 11, 5, 26, 17, 11, 9, 14, 20, 23, 19, 9, 6, 7, 23, 13, 11, 11, 17, 12,
+                8, 12, 11, 10, 13, 20, 7, 35, 36, 5, 24, 20, 28, 23, 10, 12, 20, 72, 13, 19,
+                16, 8, 18, 12, 13, 17, 7, 18, 52, 17, 16, 15, 5, 23, 11, 13, 12, 9, 9, 5,
+                8, 28, 22, 35, 45, 48, 43, 13, 31, 7, 10, 10, 9, 8, 18, 19, 2, 29, 176, 7,
+                8, 9, 4, 8, 5, 6, 5, 6, 8, 8, 3, 18, 3, 3, 21, 26, 9, 8, 24, 13,
+                10, 7, 12, 15, 21, 10, 20, 14, 9, 6)),
+    ('Proverbs', (33, 22, 35, 27, 23, 35, 27, 36, 18, 32, 31, 28, 25, 35, 33, 33, 28, 24, 29, 30,
+                  31, 29, 35, 34, 28, 28, 27, 28, 27, 33, 31)),
+    ('Ecclesiastes', (18, 26, 22, 16, 20, 12, 29, 17, 18, 20, 10, 14)),
+    ('Song of Solomon', (17, 17, 11, 16, 16, 13, 13, 14)),
+    ('Isaiah', (31, 22, 26, 6, 30, 13, 25, 22, 21, 34, 16, 6, 22, 32, 9, 14, 14, 7, 25, 6,
+                17, 25, 18, 23, 12, 21, 13, 29, 24, 33, 9, 20, 24, 17, 10, 22, 38, 22, 8, 31,
+                29, 25, 28, 28, 25, 13, 15, 22, 26, 11, 23, 15, 12, 17, 13, 12, 21, 14, 21, 22,
+                11, 12, 19, 12, 25, 24)),
+    ('Jeremiah', (19, 37, 25, 31, 31, 30, 34, 22, 26, 25, 23, 17, 27, 22, 21, 21, 27, 23, 15, 18,
+                  14, 30, 40, 10, 38, 24, 22, 17, 32, 24, 40, 44, 26, 22, 19, 32, 21, 28, 18, 16,
+                  18, 22, 13, 30, 5, 28, 7, 47, 39, 46, 64, 34)),
+    ('Lamentations', (22, 22, 66, 22, 22)),
+    ('Ezekiel', (28, 10, 27, 17, 17, 14, 27, 18, 11, 22, 25, 28, 23, 23, 8, 63, 24, 32, 14, 49,
+                 32, 31, 49, 27, 17, 21, 36, 26, 21, 26, 18, 32, 33, 31, 15, 38, 28, 23, 29, 49,
+                 26, 20, 27, 31, 25, 24, 23, 35)),
+    ('Daniel', (21, 49, 30, 37, 31, 28, 28, 27, 27, 21, 45, 13)),
+    ('Hosea', (11, 23, 5, 19, 15, 11, 16, 14, 17, 15, 12, 14, 16, 9)),
+    ('Joel', (20, 32, 21)),
+    ('Amos', (15, 16, 15, 13, 27, 14, 17, 14, 15)),
+    ('Obadiah', (21,)),
+    ('Jonah', (17, 10, 10, 11)),
+    ('Micah', (16, 13, 12, 13, 15, 16, 20)),
+    ('Nahum', (15, 13, 19)),
+    ('Habakkuk', (17, 20, 19)),
+    ('Zephaniah', (18, 15, 20)),
+    ('Haggai', (15, 23)),
+    ('Zechariah', (21, 13, 10, 14, 11, 15, 14, 23, 17, 12, 17, 14, 9, 21)),
+    ('Malachi', (14, 17, 18, 6)),
+    ('Matthew', (25, 23, 17, 25, 48, 34, 29, 34, 38, 42, 30, 50, 58, 36, 39, 28, 27, 35, 30, 34,
+                 46, 46, 39, 51, 46, 75, 66, 20)),
+    ('Mark', (45, 28, 35, 41, 43, 56, 37, 38, 50, 52, 33, 44, 37, 72, 47, 20)),
+    ('Luke', (80, 52, 38, 44, 39, 49, 50, 56, 62, 42, 54, 59, 35, 35, 32, 31, 37, 43, 48, 47,
+              38, 71, 56, 53)),
+    ('John', (51, 25, 36, 54, 47, 71, 53, 59, 41, 42, 57, 50, 38, 31, 27, 33, 26, 40, 42, 31,
+              25)),
+    ('Acts', (26, 47, 26, 37, 42, 15, 60, 40, 43, 48, 30, 25, 52, 28, 41, 40, 34, 28, 41, 38,
+              40, 30, 35, 27, 27, 32, 44, 31)),
+    ('Romans', (32, 29, 31, 25, 21, 23, 25, 39, 33, 21, 36, 21, 14, 23, 33, 27)),
+    ('1 Corinthians', (31, 16, 23, 21, 13, 20, 40, 13, 27, 33, 34, 31, 13, 40, 58, 24)),
+    ('2 Corinthians', (24, 17, 18, 18, 21, 18, 16, 24, 15, 18, 33, 21, 14)),
+    ('Galatians', (24, 21, 29, 31, 26, 18)),
+    ('Ephesians', (23, 22, 21, 32, 33, 24)),
+    ('Philippians', (30, 30, 21, 23)),
+    ('Colossians', (29, 23, 25, 18)),
+    ('1 Thessalonians', (10, 20, 13, 18, 28)),
+    ('2 Thessalonians', (12, 17, 18)),
+    ('1 Timothy', (20, 15, 16, 16, 25, 21)),
+    ('2 Timothy', (18, 26, 17, 22)),
+    ('Titus', (16, 15, 15)),
+    ('Philemon', (25,)),
+    ('Hebrews', (14, 18, 19, 16, 14, 20, 28, 13, 28, 39, 40, 29, 25)),
+    ('James', (27, 26, 18, 17, 20)),
+    ('1 Peter', (25, 25, 22, 19, 14)),
+    ('2 Peter', (21, 22, 18)),
+    ('1 John', (10, 29, 24, 21, 21)),
+    ('2 John', (13,)),
+    ('3 John', (14,)),
+    ('Jude', (25,)),
+    ('Revelation', (20, 29, 22, 11, 14, 17, 17, 13, 21, 11, 19, 17, 18, 20, 8, 21, 18, 24, 21, 15,
+                    27, 21))
+)
+
+def _build_offsets():
+    """Compute the bit offset of every chapter and the bit span of every book."""
+    chapter_offsets = {}
+    book_spans = {}
+    offset = 0
+    for book_id, (_, chapters) in enumerate(BOOKS, start=1):
+        start = offset
+        chapter_offsets[book_id] = []
+        for verse_count in chapters:
+            chapter_offsets[book_id].append(offset)
+            offset += verse_count
+        book_spans[book_id] = (start, offset)
+    return chapter_offsets, book_spans, offset
+
+CHAPTER_OFFSETS, BOOK_SPANS, TOTAL_VERSES = _build_offsets()
+
+BOOK_MASKS = {
+    book_id: ((1 << (end - start)) - 1) << start
+    for book_id, (start, end) in BOOK_SPANS.items()
+}
+
+# Common abbreviations and alternative names, keyed by canonical name
+BOOK_ALIASES = {
+    'Genesis': ('gen', 'ge', 'gn'),
+    'Exodus': ('exod', 'exo', 'ex'),
+    'Leviticus': ('lev', 'lv'),
+    'Numbers': ('num', 'nu', 'nm', 'nb'),
+    'Deuteronomy': ('deut', 'dt', 'de'),
+    'Joshua': ('josh', 'jos'),
+    'Judges': ('judg', 'jdg', 'jg'),
+    'Ruth': ('ru', 'rth'),
+    '1 Samuel': ('1 sam', '1 sa', '1 sm'),
+    '2 Samuel': ('2 sam', '2 sa', '2 sm'),
+    '1 Kings': ('1 kgs', '1 ki'),
+    '2 Kings': ('2 kgs', '2 ki'),
+    '1 Chronicles': ('1 chr', '1 chron', '1 ch'),
+    '2 Chronicles': ('2 chr', '2 chron', '2 ch'),
+    'Ezra': ('ezr',),
+    'Nehemiah': ('neh', 'ne'),
+    'Esther': ('esth', 'est'),
+    'Job': ('jb',),
+    'Psalms': ('psalm', 'ps', 'psa', 'pss'),
+    'Proverbs': ('prov', 'pr', 'prv'),
+    'Ecclesiastes': ('eccl', 'eccles', 'ecc', 'qoheleth'),
+    'Song of Solomon': ('song', 'song of songs', 'sos', 'canticles'),
+    'Isaiah': ('isa', 'is'),
+    'Jeremiah': ('jer', 'je'),
+    'Lamentations': ('lam', 'la'),
+    'Ezekiel': ('ezek', 'eze', 'ezk'),
+    'Daniel': ('dan', 'da', 'dn'),
+    'Hosea': ('hos', 'ho'),
+    'Joel': ('jl',),
+    'Amos': ('am',),
+    'Obadiah': ('obad', 'ob'),
+    'Jonah': ('jon', 'jnh'),
+    'Micah': ('mic', 'mc'),
+    'Nahum': ('nah', 'na'),
+    'Habakkuk': ('hab', 'hb'),
+    'Zephaniah': ('zeph', 'zep', 'zp'),
+    'Haggai': ('hag', 'hg'),
+    'Zechariah': ('zech', 'zec', 'zc'),
+    'Malachi': ('mal', 'ml'),
+    'Matthew': ('matt', 'mt'),
+    'Mark': ('mk', 'mrk'),
+    'Luke': ('lk', 'luk'),
+    'John': ('jn', 'jhn'),
+    'Acts': ('ac', 'acts of the apostles'),
+    'Romans': ('rom', 'ro', 'rm'),
+    '1 Corinthians': ('1 cor', '1 co'),
+    '2 Corinthians': ('2 cor', '2 co'),
+    'Galatians': ('gal', 'ga'),
+    'Ephesians': ('eph', 'ephes'),
+    'Philippians': ('phil', 'php', 'pp'),
+    'Colossians': ('col',),
+    '1 Thessalonians': ('1 thess', '1 thes', '1 th'),
+    '2 Thessalonians': ('2 thess', '2 thes', '2 th'),
+    '1 Timothy': ('1 tim', '1 ti'),
+    '2 Timothy': ('2 tim', '2 ti'),
+    'Titus': ('tit',),
+    'Philemon': ('philem', 'phm', 'pm'),
+    'Hebrews': ('heb',),
+    'James': ('jas', 'jm'),
+    '1 Peter': ('1 pet', '1 pe', '1 pt'),
+    '2 Peter': ('2 pet', '2 pe', '2 pt'),
+    '1 John': ('1 jn', '1 jhn', '1 jo'),
+    '2 John': ('2 jn', '2 jhn', '2 jo'),
+    '3 John': ('3 jn', '3 jhn', '3 jo'),
+    'Jude': ('jud', 'jd'),
+    'Revelation': ('rev', 're', 'revelations', 'apocalypse')
+}
+
+# Leading ordinals accepted in front of numbered books ("I Cor", "Second Kings")
+_ORDINALS = {
+    'i': '1', '1st': '1', 'first': '1',
+    'ii': '2', '2nd': '2', 'second': '2',
+    'iii': '3', '3rd': '3', 'third': '3'
+}
+
+def _normalize_key(name: str) -> str:
+    """Normalize a book name to a compact lookup key ("I Cor." -> "1cor")."""
+    tokens = name.lower().replace('.', ' ').split()
+    if len(tokens) > 1 and tokens[0] in _ORDINALS:
+        tokens[0] = _ORDINALS[tokens[0]]
+    return ''.join(tokens)
+
+class _BookTrie:
+    """Character trie over normalized book names and abbreviations.
+
+    Exact names and aliases resolve directly; any other prefix resolves
+    when it is shared by a single book ("Deu", "Zepha", "1 Thessa").
+    """
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key: str, book_id: int):
+        node = self.root
+        for char in key:
+            node = node.setdefault(char, {})
+            node.setdefault('ids', set()).add(book_id)
+        node['id'] = book_id
+
+    def lookup(self, key: str) -> Optional[int]:
+        node = self.root
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return None
+        if 'id' in node:
+            return node['id']
+        if len(node.get('ids', ())) == 1:
+            return next(iter(node['ids']))
+        return None
+
+def _build_trie():
+    trie = _BookTrie()
+    for book_id, (name, _) in enumerate(BOOKS, start=1):
+        trie.insert(_normalize_key(name), book_id)
+        for alias in BOOK_ALIASES.get(name, ()):
+            trie.insert(_normalize_key(alias), book_id)
+    return trie
+
+_BOOK_TRIE = _build_trie()
+
+_REFERENCE_RE = re.compile(
+    r'^\s*(?P<book>(?:\d\s*)?[^\d:]+?)\s*'
+    r'(?:(?P<chapter>\d+)(?:\s*:\s*(?P<verses>\d[\d,\-–\s]*))?)?\s*$'
+)
+
+Reference = namedtuple('Reference', ['book_id', 'chapter', 'verses'])
+
+def book_name(book_id: int) -> str:
+    """Get the canonical name of a book."""
+    return BOOKS[book_id - 1][0]
+
+def normalize_book(name: Optional[str]) -> Optional[int]:
+    """Map a book name or abbreviation to its canonical book ID.
+
+    Args:
+        name: Book name, e.g. "1 Corinthians", "I Cor.", "1Co"
+
+    Returns:
+        Book ID (1-66) or None if the name is unknown or ambiguous
+    """
+    if not name:
+        return None
+    key = _normalize_key(name)
+    if len(key) < 2:
+        return None
+    return _BOOK_TRIE.lookup(key)
+
+def parse_reference(reference: str) -> Optional[Reference]:
+    """Parse a Scripture reference such as "1 Cor 6:19-20".
+
+    Args:
+        reference: Reference text with an optional chapter and verses
+
+    Returns:
+        Reference with the canonical book ID, or None if unparseable
+    """
+    match = _REFERENCE_RE.match(reference or '')
+    if not match:
+        return None
+    book_id = normalize_book(match.group('book'))
+    if not book_id:
+        return None
+    chapter = match.group('chapter')
+    verses = match.group('verses')
+    return Reference(
+        book_id,
+        int(chapter) if chapter else None,
+        verses.replace(' ', '') if verses else None
+    )
+
+def verse_count(book_id: int, chapter: int) -> int:
+    """Get the number of verses in a chapter, 0 if it does not exist."""
+    chapters = BOOKS[book_id - 1][1]
+    if 1 <= chapter <= len(chapters):
+        return chapters[chapter - 1]
+    return 0
+
+def parse_verse_ranges(spec: Optional[str], max_verse: int) -> List[Tuple[int, int]]:
+    """Parse a verse specification such as "1-5,7,9-12".
+
+    An empty specification covers the whole chapter. Ranges are clipped
+    to the chapter length.
+
+    Args:
+        spec: Comma separated verses and ranges
+        max_verse: Number of verses in the chapter
+
+    Returns:
+        List of inclusive (start, end) verse ranges
+
+    Raises:
+        ValueError: If the specification is malformed
+    """
+    if spec is None or not spec.strip():
+        return [(1, max_verse)]
+
+    ranges = []
+    for part in spec.replace('–', '-').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition('-')
+        if not start.strip().isdigit() or (sep and not end.strip().isdigit()):
+            raise ValueError(f"Invalid verse range: {part}")
+        start = int(start)
+        end = int(end) if sep else start
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid verse range: {part}")
+        if start <= max_verse:
+            ranges.append((start, min(end, max_verse)))
+
+    return ranges
+
+class VerseCoverage:
+    """Bitmap with one bit per verse of the canon (~31k bits)."""
+
+    NBYTES = (TOTAL_VERSES + 7) // 8
+
+    def __init__(self, bits: int = 0):
+        self.bits = bits
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> 'VerseCoverage':
+        """Load a coverage bitmap stored with to_bytes."""
+        if not data:
+            return cls()
+        return cls(int.from_bytes(zlib.decompress(data), 'little'))
+
+    def to_bytes(self) -> bytes:
+        """Serialize as zlib-compressed packed bits.
+
+        Coverage is made of long runs of read and unread verses, so it
+        compresses to a small fraction of the 3.9KB raw bitmap.
+        """
+        return zlib.compress(self.bits.to_bytes(self.NBYTES, 'little'))
+
+    def mark(self, book_id: int, chapter: int, verses: Optional[str] = None) -> int:
+        """Mark verses of a chapter as read.
+
+        Args:
+            book_id: Book ID (1-66)
+            chapter: Chapter number
+            verses: Verse specification, whole chapter if empty
+
+        Returns:
+            Number of verses that were not covered before
+        """
+        max_verse = verse_count(book_id, chapter)
+        if not max_verse:
+            return 0
+
+        base = CHAPTER_OFFSETS[book_id][chapter - 1]
+        mask = 0
+        for start, end in parse_verse_ranges(verses, max_verse):
+            mask |= ((1 << (end - start + 1)) - 1) << (base + start - 1)
+
+        new_bits = mask & ~self.bits
+        self.bits |= mask
+        return bin(new_bits).count('1')
+
+    def count(self, book_id: Optional[int] = None) -> int:
+        """Count covered verses in the whole canon or a single book."""
+        if book_id is None:
+            return bin(self.bits).count('1')
+        return bin(self.bits & BOOK_MASKS[book_id]).count('1')
+
+    def progress(self, book_id: Optional[int] = None) -> Dict:
+        """Summarize coverage as counts and percentages.
+
+        Args:
+            book_id: Restrict the per-book breakdown to one book
+
+        Returns:
+            Dictionary with overall coverage and per-book coverage
+        """
+        read = self.count()
+        books = {}
+        for bid in ([book_id] if book_id else BOOK_SPANS):
+            start, end = BOOK_SPANS[bid]
+            book_read = self.count(bid)
+            if book_read or book_id:
+                books[book_name(bid)] = {
+                    'verses_read': book_read,
+                    'total_verses': end - start,
+                    'percent': round(100.0 * book_read / (end - start), 2)
+                }
+
+        return {
+            'verses_read': read,
+            'total_verses': TOTAL_VERSES,
+            'percent': round(100.0 * read / TOTAL_VERSES, 2),
+            'books': books
+        }
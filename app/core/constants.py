@@ -0,0 +1,30 @@
+"""Constants shared across the core modules, free of heavy imports."""
+
+# Doctrinal topics with their key verses and principles (see DoctrinalGuard)
+DOCTRINAL_TOPICS = {
+    'sabbath': {
+        'key_verses': [
+            'Genesis 2:2-3',
+            'Exodus 20:8-11',
+            'Isaiah 58:13-14'
+        ],
+        'principles': [
+            'Seventh day (Saturday) observance',
+            'Sunset to sunset timing',
+            'Rest from secular work',
+            'Worship and fellowship'
+        ]
+    },
+    'health': {
+        'key_verses': [
+            '1 Corinthians 6:19-20',
+            '3 John 1:2'
+        ],
+        'principles': [
+            'Plant-based diet emphasis',
+            'Abstinence from harmful substances',
+            'Exercise and rest',
+            'Water, air, sunlight benefits'
+        ]
+    }
+}
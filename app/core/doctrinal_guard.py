@@ -3,43 +3,34 @@
 from typing import Dict, List, Optional
 import openai
 from app.config import Config
+from app.core.bible import Reference, parse_reference
+from app.core.constants import DOCTRINAL_TOPICS
 
 class DoctrinalGuard:
     """Ensures AI responses align with SDA teachings."""
     
-    TOPICS = {
-        'sabbath': {
-            'key_verses': [
-                'Genesis 2:2-3',
-                'Exodus 20:8-11',
-                'Isaiah 58:13-14'
-            ],
-            'principles': [
-                'Seventh day (Saturday) observance',
-                'Sunset to sunset timing',
-                'Rest from secular work',
-                'Worship and fellowship'
-            ]
-        },
-        'health': {
-            'key_verses': [
-                '1 Corinthians 6:19-20',
-                '3 John 1:2'
-            ],
-            'principles': [
-                'Plant-based diet emphasis',
-                'Abstinence from harmful substances',
-                'Exercise and rest',
-                'Water, air, sunlight benefits'
-            ]
-        }
-    }
+    TOPICS = DOCTRINAL_TOPICS
     
     def __init__(self):
         """Initialize the DoctrinalGuard with OpenAI configuration."""
         self.api_key = Config.OPENAI_API_KEY
         openai.api_key = self.api_key
     
+    def get_key_references(self, topic: str) -> List[Reference]:
+        """Get the key verses of a topic as normalized references.
+        
+        Args:
+            topic: The doctrinal topic
+            
+        Returns:
+            List of references with canonical book IDs
+        """
+        if topic not in self.TOPICS:
+            raise ValueError(f"Invalid topic: {topic}")
+        
+        references = [parse_reference(verse) for verse in self.TOPICS[topic]['key_verses']]
+        return [reference for reference in references if reference]
+    
     def validate_response(self, topic: str, response: str) -> Dict[str, any]:
         """Validate an AI response against SDA doctrinal standards.
         
@@ -0,0 +1,82 @@
+"""Core functionality for compiled and cached email template rendering.
+
+Compiled templates are kept on disk through Jinja's bytecode cache, so
+new workers skip parsing. Fragments shared by many recipients (the
+preparation checklist, the weekly Scripture section) are rendered once
+per key and reused, leaving only user-specific placeholders per message.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from app.core.constants import DOCTRINAL_TOPICS
+from app.core.streaks import week_key
+
+FRAGMENT_CACHE_SIZE = 256
+
+# (template, key) -> rendered HTML, least recently used first
+_fragments = OrderedDict()
+
+def init_template_cache(app):
+    """Store compiled templates on disk when a cache directory is configured."""
+    directory = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+def render_email_html(template: str, **context) -> str:
+    """Render an email template without request context processors."""
+    return current_app.jinja_env.get_template(template).render(**context)
+
+def render_fragment(template: str, key: str, **context) -> Markup:
+    """Render a shared fragment once per key and reuse it.
+
+    Args:
+        template: Fragment template name
+        key: Identifies the fragment's content; equal keys must render equally
+        **context: Template context
+
+    Returns:
+        Rendered HTML, safe to embed in another template
+    """
+    cache_key = (template, key)
+    if cache_key in _fragments:
+        _fragments.move_to_end(cache_key)
+        return _fragments[cache_key]
+
+    html = Markup(render_email_html(template, **context))
+    _fragments[cache_key] = html
+    if len(_fragments) > FRAGMENT_CACHE_SIZE:
+        _fragments.popitem(last=False)
+    return html
+
+def checklist_fragment(checklist: Dict[str, List[str]]) -> Markup:
+    """Render a preparation checklist, shared by users with the same items."""
+    key = hashlib.md5(json.dumps(checklist, sort_keys=True).encode('utf-8')).hexdigest()
+    return render_fragment('email/_checklist.html', key, checklist=checklist)
+
+def weekly_scripture(day: Optional[date] = None) -> str:
+    """Get the Scripture reference of the week, rotating through the key verses."""
+    verses = [
+        verse
+        for topic in DOCTRINAL_TOPICS.values()
+        for verse in topic['key_verses']
+    ]
+    _, week, _ = (day or date.today()).isocalendar()
+    return verses[week % len(verses)]
+
+def weekly_scripture_fragment(day: Optional[date] = None) -> Markup:
+    """Render the weekly Scripture section, shared by every email of the week."""
+    day = day or date.today()
+    week = week_key(day)
+    return render_fragment(
+        'email/_weekly_scripture.html', week,
+        week=week, reference=weekly_scripture(day)
+    )
@@ -0,0 +1,230 @@
+"""Core functionality for streaming full-history data exports."""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+from app import db
+from app.models.user import SpiritualRecord, PrayerRequest, BibleStudy, HistoryArchive
+
+EXPORT_MODELS = {
+    'spiritual_records': SpiritualRecord,
+    'prayer_requests': PrayerRequest,
+    'bible_studies': BibleStudy
+}
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'parquet')
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Archive entries hold a whole user-month each, so fetch them in small batches
+ARCHIVE_BATCH_SIZE = 50
+
+def _json_default(value: Any) -> Any:
+    """Serialize values that the json module cannot handle natively."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _csv_value(value: Any) -> Any:
+    """Flatten a column value into something csv.writer can emit."""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def encode_archive_rows(rows: Iterable[Dict[str, Any]]) -> bytes:
+    """Compress row dictionaries into a history archive payload."""
+    lines = '\n'.join(json.dumps(row, default=_json_default) for row in rows)
+    return zlib.compress(lines.encode('utf-8'), 9)
+
+def iter_archived_rows(kind: str, user_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream the archived rows of one exportable table, oldest month first.
+
+    Date and timestamp columns are restored to their Python types so
+    archived rows look exactly like rows read from the live table.
+
+    Args:
+        kind: Table to export (key of EXPORT_MODELS)
+        user_id: Restrict the export to a single user (all users if None)
+
+    Returns:
+        Iterator of row dictionaries keyed by column name
+    """
+    if kind not in EXPORT_MODELS:
+        raise ValueError(f"Invalid export kind: {kind}")
+
+    parsers = {}
+    for column in EXPORT_MODELS[kind].__table__.columns:
+        python_type = column.type.python_type
+        if python_type in (date, datetime):
+            parsers[column.key] = python_type.fromisoformat
+
+    query = db.session.query(HistoryArchive.payload).filter(HistoryArchive.kind == kind)
+    if user_id is not None:
+        query = query.filter(HistoryArchive.user_id == user_id)
+    query = query.order_by(
+        HistoryArchive.month, HistoryArchive.user_id, HistoryArchive.id
+    ).yield_per(ARCHIVE_BATCH_SIZE)
+
+    for (payload,) in query:
+        for line in zlib.decompress(payload).decode('utf-8').split('\n'):
+            row = json.loads(line)
+            for name, parse in parsers.items():
+                if row.get(name) is not None:
+                    row[name] = parse(row[name])
+            yield row
+
+def iter_rows(kind: str, user_id: Optional[int] = None,
+              batch_size: int = DEFAULT_BATCH_SIZE,
+              include_archived: bool = True) -> Iterator[Dict[str, Any]]:
+    """Stream the rows of one exportable table as dictionaries.
+
+    Rows are fetched as plain column tuples through a server-side cursor,
+    so memory use stays flat regardless of how much history is exported.
+    Archived history comes first, followed by the live table.
+
+    Args:
+        kind: Table to export (key of EXPORT_MODELS)
+        user_id: Restrict the export to a single user (all users if None)
+        batch_size: Number of rows fetched per round trip
+        include_archived: Also stream rows moved to the history archive
+
+    Returns:
+        Iterator of row dictionaries keyed by column name
+    """
+    if kind not in EXPORT_MODELS:
+        raise ValueError(f"Invalid export kind: {kind}")
+
+    if include_archived:
+        yield from iter_archived_rows(kind, user_id)
+
+    model = EXPORT_MODELS[kind]
+    columns = list(model.__table__.columns)
+
+    query = db.session.query(*columns)
+    if user_id is not None:
+        query = query.filter(model.user_id == user_id)
+    query = query.order_by(model.id).yield_per(batch_size)
+
+    names = [column.key for column in columns]
+    for row in query:
+        yield dict(zip(names, row))
+
+def iter_ndjson(kinds: Iterable[str], user_id: Optional[int] = None,
+                batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """Stream one or more tables as newline-delimited JSON.
+
+    Args:
+        kinds: Tables to export
+        user_id: Restrict the export to a single user (all users if None)
+        batch_size: Number of rows fetched per round trip
+
+    Returns:
+        Iterator of JSON lines, each tagged with its table in ``type``
+    """
+    for kind in kinds:
+        for row in iter_rows(kind, user_id, batch_size):
+            row['type'] = kind
+            yield json.dumps(row, default=_json_default) + '\n'
+
+def iter_csv(kind: str, user_id: Optional[int] = None,
+             batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """Stream a single table as CSV, header first.
+
+    Args:
+        kind: Table to export
+        user_id: Restrict the export to a single user (all users if None)
+        batch_size: Number of rows fetched per round trip
+
+    Returns:
+        Iterator of CSV lines
+    """
+    if kind not in EXPORT_MODELS:
+        raise ValueError(f"Invalid export kind: {kind}")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    names = [column.key for column in EXPORT_MODELS[kind].__table__.columns]
+
+    writer.writerow(names)
+    yield buffer.getvalue()
+
+    for row in iter_rows(kind, user_id, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([_csv_value(row[name]) for name in names])
+        yield buffer.getvalue()
+
+def write_parquet(kind: str, path: str, user_id: Optional[int] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Write a single table to a Parquet file for offline analytics.
+
+    Requires the optional ``pyarrow`` dependency. Rows are written one
+    row group per batch, so memory stays bounded by ``batch_size``.
+
+    Args:
+        kind: Table to export
+        path: Destination file path
+        user_id: Restrict the export to a single user (all users if None)
+        batch_size: Number of rows per row group
+
+    Returns:
+        Number of rows written
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires the pyarrow package")
+
+    if kind not in EXPORT_MODELS:
+        raise ValueError(f"Invalid export kind: {kind}")
+
+    columns = list(EXPORT_MODELS[kind].__table__.columns)
+    schema_fields = []
+    encoders = {}
+    for column in columns:
+        python_type = column.type.python_type
+        if python_type is bool:
+            arrow_type = pa.bool_()
+        elif python_type is int:
+            arrow_type = pa.int64()
+        elif python_type is float:
+            arrow_type = pa.float64()
+        elif python_type is datetime:
+            arrow_type = pa.timestamp('us')
+        elif python_type is date:
+            arrow_type = pa.date32()
+        elif python_type is str:
+            arrow_type = pa.string()
+        else:
+            # JSON documents are stored as their serialized text
+            arrow_type = pa.string()
+            encoders[column.key] = lambda v: json.dumps(v) if v is not None else None
+        schema_fields.append(pa.field(column.key, arrow_type))
+    schema = pa.schema(schema_fields)
+
+    def flush(writer, batch):
+        table = pa.Table.from_pylist(batch, schema=schema)
+        writer.write_table(table)
+
+    total = 0
+    batch = []
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for row in iter_rows(kind, user_id, batch_size):
+            for name, encode in encoders.items():
+                row[name] = encode(row[name])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush(writer, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            flush(writer, batch)
+            total += len(batch)
+
+    return total
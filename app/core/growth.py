@@ -0,0 +1,405 @@
+"""Core functionality for columnar and incremental spiritual growth analysis."""
+
+import io
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from app import db
+from app.models.user import SpiritualRecord, GrowthState, GrowthAnalytics, METRIC_COLUMNS
+from app.core.growth_model import GrowthModel, N_CLUSTERS, current_model
+
+DEFAULT_BATCH_SIZE = 5000
+
+WEEKLY_WINDOW = 7
+MONTHLY_WINDOW = 30
+
+# Slope (per record) beyond which a metric counts as rising or falling
+TREND_THRESHOLD = 0.1
+
+# Weekly chart points kept per user
+CHART_WEEKS = 104
+
+def load_growth_columns(user_id: int, batch_size: int = DEFAULT_BATCH_SIZE,
+                        after_id: int = 0,
+                        upto_id: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Fetch a user's record dates and metric values as NumPy arrays.
+
+    The arrays are sized from a count query and filled batch by batch
+    from plain tuples, so no ORM objects or per-row dictionaries are
+    created however long the history is.
+
+    Args:
+        user_id: User ID
+        batch_size: Number of rows fetched per round trip
+        after_id: Only include records with a greater ID
+        upto_id: Only include records up to this ID
+
+    Returns:
+        Tuple of (dates as datetime64[D], values of shape (n, len(METRIC_COLUMNS)))
+        ordered by date, with missing metrics as 0
+    """
+    filters = [SpiritualRecord.user_id == user_id, SpiritualRecord.id > after_id]
+    if upto_id is not None:
+        filters.append(SpiritualRecord.id <= upto_id)
+
+    count = db.session.query(func.count(SpiritualRecord.id)).filter(*filters).scalar()
+
+    dates = np.empty(count, dtype='datetime64[D]')
+    values = np.empty((count, len(METRIC_COLUMNS)), dtype=np.float64)
+    if not count:
+        return dates, values
+
+    # Rows inserted after the count are left for the next run
+    rows = iter(db.session.query(
+        SpiritualRecord.date,
+        *[func.coalesce(getattr(SpiritualRecord, column), 0) for column in METRIC_COLUMNS]
+    ).filter(
+        *filters
+    ).order_by(SpiritualRecord.date, SpiritualRecord.id).limit(count).yield_per(batch_size))
+
+    filled = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        end = filled + len(batch)
+        dates[filled:end] = [row[0] for row in batch]
+        values[filled:end] = [row[1:] for row in batch]
+        filled = end
+
+    return dates[:filled], values[:filled]
+
+def growth_frame(dates: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+    """Wrap columnar growth data in a DataFrame without copying the values."""
+    frame = pd.DataFrame(values, columns=list(METRIC_COLUMNS), copy=False)
+    frame.insert(0, 'date', dates)
+    return frame
+
+def trend_direction(slope: float) -> str:
+    """Classify a regression slope as increasing, decreasing or stable."""
+    if slope > TREND_THRESHOLD:
+        return 'increasing'
+    elif slope < -TREND_THRESHOLD:
+        return 'decreasing'
+    else:
+        return 'stable'
+
+def cluster_characteristics(means: pd.Series) -> Dict:
+    """Identify main characteristics of a cluster from its metric means"""
+    primary_focus = means.idxmax()
+    secondary_focus = means.drop(primary_focus).idxmax()
+
+    return {
+        'primary_focus': primary_focus,
+        'secondary_focus': secondary_focus,
+        'intensity': 'high' if means[primary_focus] > means.mean() else 'moderate'
+    }
+
+def _series(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(v) else float(v) for v in values]
+
+def describe_clusters(counts: np.ndarray, sums: np.ndarray) -> List[Dict]:
+    """Describe clusters from their record counts and per-metric sums.
+
+    Args:
+        counts: Records per cluster, shape (N_CLUSTERS,)
+        sums: Metric sums per cluster, shape (N_CLUSTERS, len(METRIC_COLUMNS))
+
+    Returns:
+        List of patterns with cluster, size, avg_metrics and characteristics
+    """
+    patterns = []
+    for i in range(N_CLUSTERS):
+        size = int(counts[i])
+        means = pd.Series(
+            sums[i] / size if size else np.full(len(METRIC_COLUMNS), np.nan),
+            index=list(METRIC_COLUMNS)
+        )
+        patterns.append({
+            'cluster': i,
+            'size': size,
+            'avg_metrics': dict(zip(means.index, _series(means.to_numpy()))),
+            'characteristics': cluster_characteristics(means) if size else None
+        })
+    return patterns
+
+def cluster_totals(values: np.ndarray, model: GrowthModel) -> Tuple[np.ndarray, np.ndarray]:
+    """Assign rows with the global model and total them per cluster."""
+    labels = model.predict(values)
+    sums = np.zeros((N_CLUSTERS, values.shape[1]))
+    np.add.at(sums, labels, values)
+    return np.bincount(labels, minlength=N_CLUSTERS), sums
+
+def rolling_means(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing means over ``window`` rows, NaN until the window is full."""
+    return pd.DataFrame(values).rolling(window=window).mean().to_numpy()
+
+class GrowthAccumulator:
+    """Running state that lets growth analysis fold in only new records.
+
+    Keeps the last MONTHLY_WINDOW - 1 rows for the rolling means, the
+    sufficient statistics of a least-squares slope over the record index,
+    and per-cluster counts and sums under the global model version
+    ``model_version`` (empty when no model had been trained).
+    """
+
+    FIELDS = ('count', 'sum_y', 'sum_xy', 'tail', 'model_version', 'cluster_counts', 'cluster_sums')
+
+    def __init__(self, **arrays):
+        for name in self.FIELDS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def empty(cls, model: Optional[GrowthModel]) -> 'GrowthAccumulator':
+        """Create the state of a user with no folded records."""
+        metrics = len(METRIC_COLUMNS)
+        return cls(
+            count=np.int64(0),
+            sum_y=np.zeros(metrics),
+            sum_xy=np.zeros(metrics),
+            tail=np.empty((0, metrics)),
+            model_version=np.str_(model.version if model else ''),
+            cluster_counts=np.zeros(N_CLUSTERS, dtype=np.int64),
+            cluster_sums=np.zeros((N_CLUSTERS, metrics))
+        )
+
+    def fold(self, values: np.ndarray,
+             model: Optional[GrowthModel]) -> Tuple[np.ndarray, np.ndarray]:
+        """Fold new rows (later than every folded row) into the state.
+
+        Args:
+            values: New metric rows in date order
+            model: The model the state was built with
+
+        Returns:
+            Weekly and monthly rolling means of the new rows only
+        """
+        history = np.concatenate([self.tail, values])
+        weekly = rolling_means(history, WEEKLY_WINDOW)[len(self.tail):]
+        monthly = rolling_means(history, MONTHLY_WINDOW)[len(self.tail):]
+
+        if model is not None and len(values):
+            counts, sums = cluster_totals(values, model)
+            self.cluster_counts = self.cluster_counts + counts
+            self.cluster_sums = self.cluster_sums + sums
+        self._fold_regression(values)
+        self.tail = history[-(MONTHLY_WINDOW - 1):]
+        return weekly, monthly
+
+    def _fold_regression(self, values: np.ndarray):
+        x = np.arange(self.count, self.count + len(values), dtype=np.float64)
+        self.sum_y = self.sum_y + values.sum(axis=0)
+        self.sum_xy = self.sum_xy + x @ values
+        self.count = np.int64(self.count + len(values))
+
+    def slopes(self) -> np.ndarray:
+        """Least-squares slope of each metric against the record index."""
+        n = float(self.count)
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        denominator = n * sum_xx - sum_x ** 2
+        if denominator == 0:
+            return np.zeros_like(self.sum_y)
+        return (n * self.sum_xy - sum_x * self.sum_y) / denominator
+
+    def patterns(self) -> List[Dict]:
+        """Describe the user's records per global cluster."""
+        if not self.model_version:
+            return []
+        return describe_clusters(self.cluster_counts, self.cluster_sums)
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **{name: getattr(self, name) for name in self.FIELDS})
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'GrowthAccumulator':
+        with np.load(io.BytesIO(data)) as arrays:
+            return cls(**{name: arrays[name] for name in cls.FIELDS})
+
+def weekly_points(dates: np.ndarray, weekly: np.ndarray,
+                  monthly: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample per-record rolling means to one chart point per week.
+
+    Each week (starting Monday) takes the rolling means at its last record.
+
+    Args:
+        dates: Record dates (datetime64[D]) in order
+        weekly: Weekly rolling means of the same records
+        monthly: Monthly rolling means of the same records
+
+    Returns:
+        Tuple of (week start days since epoch as int32, float32 points of
+        shape (weeks, len(METRIC_COLUMNS), 2))
+    """
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    # 1970-01-01 was a Thursday
+    starts = days - (days + 3) % 7
+    last = np.flatnonzero(np.append(np.diff(starts) != 0, True)) if len(starts) else starts
+    points = np.stack([weekly[last], monthly[last]], axis=2).astype(np.float32)
+    return starts[last].astype(np.int32), points
+
+def merge_points(weeks: np.ndarray, points: np.ndarray, new_weeks: np.ndarray,
+                 new_points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Append new chart points, replacing a stored week they cover again."""
+    if len(new_weeks):
+        keep = weeks < new_weeks[0]
+        weeks = np.concatenate([weeks[keep], new_weeks])
+        points = np.concatenate([points[keep], new_points])
+    return weeks[-CHART_WEEKS:], points[-CHART_WEEKS:]
+
+def encode_points(weeks: np.ndarray, points: np.ndarray) -> Tuple[bytes, bytes]:
+    """Serialize chart points for the growth_analytics blobs."""
+    return weeks.astype('<i4').tobytes(), points.astype('<f4').tobytes()
+
+def decode_chart(weeks: Optional[bytes], points: Optional[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+    """Read chart points serialized by encode_points."""
+    metrics = len(METRIC_COLUMNS)
+    if not weeks:
+        return np.empty(0, dtype=np.int32), np.empty((0, metrics, 2), dtype=np.float32)
+    weeks = np.frombuffer(weeks, dtype='<i4')
+    return weeks, np.frombuffer(points, dtype='<f4').reshape(len(weeks), metrics, 2)
+
+def decode_points(entry: GrowthAnalytics) -> Tuple[np.ndarray, np.ndarray]:
+    """Read the chart points stored for a user."""
+    return decode_chart(entry.weeks, entry.points)
+
+def build_trends(accumulator: GrowthAccumulator, points: np.ndarray) -> Dict:
+    """Summarize each metric's trend direction and latest rolling means.
+
+    Args:
+        accumulator: State holding the regression statistics
+        points: Chart points as returned by weekly_points
+
+    Returns:
+        Dictionary of metric to trend, weekly_avg and monthly_avg
+    """
+    slopes = accumulator.slopes()
+    latest = points[-1] if len(points) else np.full((len(METRIC_COLUMNS), 2), np.nan)
+    trends = {}
+    for i, column in enumerate(METRIC_COLUMNS):
+        weekly, monthly = _series(latest[i])
+        trends[column] = {
+            'trend': trend_direction(slopes[i]),
+            'weekly_avg': weekly,
+            'monthly_avg': monthly
+        }
+    return trends
+
+def growth_chart(entry: GrowthAnalytics, weeks: Optional[int] = None) -> Dict:
+    """Serialize a user's growth analytics for charts.
+
+    Args:
+        entry: The user's analytics row
+        weeks: Only include the most recent weeks
+
+    Returns:
+        Dictionary with the week start dates, per-metric series, patterns
+        and insights
+    """
+    week_starts, points = decode_points(entry)
+    if weeks is not None:
+        start = max(len(week_starts) - weeks, 0)
+        week_starts, points = week_starts[start:], points[start:]
+
+    return {
+        'weeks': [str(day) for day in week_starts.astype('datetime64[D]')],
+        'metrics': {
+            column: {
+                'weekly_avg': _series(points[:, i, 0]),
+                'monthly_avg': _series(points[:, i, 1]),
+                'trend': (entry.trends or {}).get(column, {}).get('trend')
+            }
+            for i, column in enumerate(METRIC_COLUMNS)
+        },
+        'patterns': entry.patterns or [],
+        'insights': entry.insights or [],
+        'updated_at': entry.updated_at.isoformat() if entry.updated_at else None
+    }
+
+def growth_insights(trends: Dict, patterns: List[Dict]) -> List[str]:
+    """Generate personalized spiritual insights"""
+    insights = []
+
+    # Analyze trends
+    for metric, data in trends.items():
+        if data['trend'] == 'increasing':
+            insights.append(f"Your {metric} is showing positive growth")
+        elif data['trend'] == 'decreasing':
+            insights.append(f"Your {metric} might need more attention")
+
+    # Analyze patterns
+    for pattern in patterns:
+        if pattern['size'] > 0:
+            characteristics = pattern['characteristics']
+            insights.append(
+                f"We noticed a pattern of {characteristics['primary_focus']} "
+                f"with {characteristics['secondary_focus']}"
+            )
+
+    return insights
+
+def analyze_growth(user_id: int, full: bool = False) -> Optional[GrowthAnalytics]:
+    """Update a user's growth analytics from their new records.
+
+    Only records added since the stored watermark are read. The state is
+    rebuilt from the full history when there is none, when ``full`` is
+    set, when no analytics are stored, when a new record is dated before
+    the last folded one, or when a newer global model has been trained.
+    The updated rows are added to the session; the caller commits.
+
+    Args:
+        user_id: User ID
+        full: Force a rebuild from the full history
+
+    Returns:
+        The user's analytics, or None if the user has no records
+    """
+    upto_id = db.session.query(func.max(SpiritualRecord.id)).filter(
+        SpiritualRecord.user_id == user_id
+    ).scalar()
+    if upto_id is None:
+        return None
+
+    entry = GrowthState.query.get(user_id)
+    analytics = GrowthAnalytics.query.get(user_id)
+    model = current_model()
+    rebuild = full or entry is None or analytics is None
+
+    if not rebuild:
+        accumulator = GrowthAccumulator.from_bytes(entry.state)
+        rebuild = str(accumulator.model_version) != (model.version if model else '')
+
+    if not rebuild:
+        if entry.watermark_id >= upto_id:
+            return analytics
+        dates, values = load_growth_columns(user_id, after_id=entry.watermark_id, upto_id=upto_id)
+        rebuild = len(dates) > 0 and dates[0] < np.datetime64(entry.last_date)
+
+    if rebuild:
+        dates, values = load_growth_columns(user_id, upto_id=upto_id)
+        accumulator = GrowthAccumulator.empty(model)
+        entry = entry or GrowthState(user_id=user_id)
+        analytics = analytics or GrowthAnalytics(user_id=user_id)
+        analytics.weeks = None
+        db.session.add_all([entry, analytics])
+
+    weekly, monthly = accumulator.fold(values, model)
+    weeks, points = merge_points(*decode_points(analytics), *weekly_points(dates, weekly, monthly))
+
+    entry.watermark_id = upto_id
+    entry.last_date = dates[-1].astype(object) if len(dates) else entry.last_date
+    entry.record_count = int(accumulator.count)
+    entry.model_version = str(accumulator.model_version)
+    entry.state = accumulator.to_bytes()
+
+    analytics.weeks, analytics.points = encode_points(weeks, points)
+    analytics.trends = build_trends(accumulator, points)
+    analytics.patterns = accumulator.patterns()
+    analytics.insights = growth_insights(analytics.trends, analytics.patterns)
+    analytics.record_count = entry.record_count
+
+    return analytics
@@ -0,0 +1,409 @@
+"""Core functionality for cohort-wide growth analysis.
+
+Like ``analyze_growth``, the job only reads the records added since each
+user's stored ``growth_state`` watermark and folds them into the stored
+state. A user's full history is read only when they have no state, a new
+record is dated before the last folded one, or the state was built with
+an older model.
+
+Users are planned in chunks of about ``chunk_rows`` records. Each chunk's
+records are read into shared memory and analyzed by a pool process while
+the next chunks are read, with a bounded number of chunks in flight.
+Results are written back in bulk, replacing one
+``analyze_spiritual_growth`` task and its queries per user.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from itertools import islice
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models.user import User, SpiritualRecord, GrowthState, GrowthAnalytics, METRIC_COLUMNS
+from app.core.growth import (
+    CHART_WEEKS, GrowthAccumulator, build_trends, decode_chart, encode_points, growth_insights,
+    merge_points, weekly_points
+)
+from app.core.growth_model import GrowthModel, current_model
+
+DEFAULT_BATCH_SIZE = 20000
+
+# Records per unit of work handed to a pool process
+DEFAULT_CHUNK_ROWS = 200000
+
+# Users whose results are written per statement
+WRITE_BATCH_SIZE = 500
+
+class SharedArray:
+    """NumPy array backed by a named shared memory block."""
+
+    def __init__(self, block: shared_memory.SharedMemory, shape: Tuple, dtype: str):
+        self.block = block
+        self.array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    @classmethod
+    def copy_of(cls, array: np.ndarray) -> 'SharedArray':
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(block, array.shape, array.dtype.str)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec: Tuple) -> 'SharedArray':
+        name, shape, dtype = spec
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype)
+
+    @property
+    def spec(self) -> Tuple:
+        """Picklable description for attaching from another process."""
+        return self.block.name, self.array.shape, self.array.dtype.str
+
+    def close(self):
+        del self.array
+        self.block.close()
+
+def plan_cohort(upto_id: int, model_version: str) -> List[Tuple[int, bool, int]]:
+    """Decide which active users to fold forward and which to rebuild.
+
+    Args:
+        upto_id: Highest record ID included in this run
+        model_version: Version of the current growth model ('' for none)
+
+    Returns:
+        List of (user_id, rebuild, estimated rows to read) ordered by user
+    """
+    # Each user's records after their watermark (all of them without a state)
+    new = db.session.query(
+        SpiritualRecord.user_id.label('user_id'),
+        func.count(SpiritualRecord.id).label('rows'),
+        func.min(SpiritualRecord.date).label('first_date')
+    ).outerjoin(
+        GrowthState, GrowthState.user_id == SpiritualRecord.user_id
+    ).filter(
+        SpiritualRecord.id > func.coalesce(GrowthState.watermark_id, 0),
+        SpiritualRecord.id <= upto_id
+    ).group_by(SpiritualRecord.user_id).subquery()
+
+    rows = db.session.query(
+        User.id, GrowthState.user_id, GrowthState.last_date, GrowthState.record_count,
+        GrowthState.model_version, GrowthAnalytics.user_id, new.c.rows, new.c.first_date
+    ).outerjoin(
+        GrowthState, GrowthState.user_id == User.id
+    ).outerjoin(
+        GrowthAnalytics, GrowthAnalytics.user_id == User.id
+    ).outerjoin(
+        new, new.c.user_id == User.id
+    ).filter(
+        User.active == True,
+        or_(new.c.user_id != None, GrowthState.user_id != None)
+    ).order_by(User.id)
+
+    plan = []
+    for user_id, state, last_date, record_count, version, analytics, new_rows, first_date in rows:
+        new_rows = new_rows or 0
+        if state is None or analytics is None:
+            rebuild = True
+        elif (version or '') != model_version:
+            rebuild = True
+        elif not new_rows:
+            continue
+        else:
+            rebuild = first_date < last_date
+        if rebuild:
+            new_rows += record_count or 0
+        if new_rows:
+            plan.append((user_id, rebuild, new_rows))
+    return plan
+
+def plan_chunks(plan: List[Tuple[int, bool, int]], chunk_rows: int) -> List[List[Tuple[int, bool, int]]]:
+    """Split a cohort plan into chunks of about ``chunk_rows`` records."""
+    chunks, current, rows = [], [], 0
+    for entry in plan:
+        current.append(entry)
+        rows += entry[2]
+        if rows >= chunk_rows:
+            chunks.append(current)
+            current, rows = [], 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+def load_cohort_columns(users: List[Tuple[int, bool, int]], upto_id: int,
+                        batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, np.ndarray]:
+    """Fetch the records a chunk of planned users needs, as columns.
+
+    Users being rebuilt get their full history, the others only their
+    records after the stored watermark. Only records up to ``upto_id``
+    are read, so the run is a consistent cut that later runs continue
+    from.
+
+    Returns:
+        Dictionary of ``user_id``, ``date`` (datetime64[D]) and ``values``
+        (n, len(METRIC_COLUMNS)) arrays ordered by user and date
+    """
+    user_ids = [user_id for user_id, _, _ in users]
+    rebuild_ids = [user_id for user_id, rebuild, _ in users if rebuild]
+    filters = [
+        SpiritualRecord.user_id.in_(user_ids),
+        SpiritualRecord.id <= upto_id,
+        or_(SpiritualRecord.user_id.in_(rebuild_ids), SpiritualRecord.id > GrowthState.watermark_id)
+    ]
+
+    def query(*columns):
+        return db.session.query(*columns).outerjoin(
+            GrowthState, GrowthState.user_id == SpiritualRecord.user_id
+        ).filter(*filters)
+
+    count = query(func.count(SpiritualRecord.id)).scalar()
+    columns = {
+        'user_id': np.empty(count, dtype=np.int64),
+        'date': np.empty(count, dtype='datetime64[D]'),
+        'values': np.empty((count, len(METRIC_COLUMNS)), dtype=np.float64)
+    }
+    if not count:
+        return columns
+
+    rows = iter(query(
+        SpiritualRecord.user_id,
+        SpiritualRecord.date,
+        *[func.coalesce(getattr(SpiritualRecord, column), 0) for column in METRIC_COLUMNS]
+    ).order_by(
+        SpiritualRecord.user_id, SpiritualRecord.date, SpiritualRecord.id
+    ).limit(count).yield_per(batch_size))
+
+    filled = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        end = filled + len(batch)
+        columns['user_id'][filled:end] = [row[0] for row in batch]
+        columns['date'][filled:end] = [row[1] for row in batch]
+        columns['values'][filled:end] = [row[2:] for row in batch]
+        filled = end
+
+    return {name: array[:filled] for name, array in columns.items()}
+
+def load_stored_states(user_ids: List[int]) -> Dict[int, Dict]:
+    """Fetch the stored state and chart of users being folded forward."""
+    if not user_ids:
+        return {}
+    rows = db.session.query(
+        GrowthState.user_id, GrowthState.state, GrowthAnalytics.weeks, GrowthAnalytics.points
+    ).join(
+        GrowthAnalytics, GrowthAnalytics.user_id == GrowthState.user_id
+    ).filter(GrowthState.user_id.in_(user_ids))
+    return {
+        user_id: {'state': state, 'weeks': weeks, 'points': points}
+        for user_id, state, weeks, points in rows
+    }
+
+def user_ranges(user_ids: np.ndarray) -> List[Tuple[int, int, int]]:
+    """Get the (user_id, start, end) row range of each user in user-ordered rows."""
+    if not len(user_ids):
+        return []
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(user_ids)) + 1])
+    ends = np.append(starts[1:], len(user_ids))
+    return [
+        (int(user_ids[start]), start, end)
+        for start, end in zip(starts.tolist(), ends.tolist())
+    ]
+
+def user_chunks(user_ids: np.ndarray, chunk_rows: int) -> List[List[Tuple[int, int, int]]]:
+    """Split user-ordered rows into chunks of whole users.
+
+    Returns:
+        List of chunks, each a list of (user_id, start, end) row ranges
+    """
+    chunks, current, rows = [], [], 0
+    for user_id, start, end in user_ranges(user_ids):
+        current.append((user_id, start, end))
+        rows += end - start
+        if rows >= chunk_rows:
+            chunks.append(current)
+            current, rows = [], 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+def analyze_chunk(specs: Dict[str, Tuple], users: List[Tuple[int, int, int, Optional[Dict]]],
+                  model: Optional[GrowthModel], upto_id: int) -> List[Dict]:
+    """Analyze a range of users from a shared extract.
+
+    Runs in a pool process; needs no application context.
+
+    Args:
+        specs: Shared ``date`` and ``values`` arrays
+        users: (user_id, start, end, stored) per user, where ``stored`` is
+            the state and chart to fold the rows into, or None to rebuild
+            from the rows alone
+        model: Current growth model
+        upto_id: Highest record ID in the extract
+
+    Returns:
+        List of per-user results for save_growth_results
+    """
+    shared = {name: SharedArray.attach(spec) for name, spec in specs.items()}
+    try:
+        results = []
+        for user_id, start, end, stored in users:
+            # Copied so no view outlives the shared block
+            values = shared['values'].array[start:end].copy()
+            dates = shared['date'].array[start:end].copy()
+            if stored:
+                accumulator = GrowthAccumulator.from_bytes(stored['state'])
+                chart = decode_chart(stored['weeks'], stored['points'])
+            else:
+                accumulator = GrowthAccumulator.empty(model)
+                chart = decode_chart(None, None)
+            weekly, monthly = accumulator.fold(values, model)
+            weeks, points = merge_points(*chart, *weekly_points(dates, weekly, monthly))
+            trends = build_trends(accumulator, points)
+            patterns = accumulator.patterns()
+            results.append({
+                'user_id': user_id,
+                'chart': encode_points(weeks, points),
+                'trends': trends,
+                'patterns': patterns,
+                'insights': growth_insights(trends, patterns),
+                'watermark_id': upto_id,
+                'last_date': dates[-1].astype(object),
+                'record_count': int(accumulator.count),
+                'model_version': str(accumulator.model_version),
+                'state': accumulator.to_bytes()
+            })
+        return results
+    finally:
+        for array in shared.values():
+            array.close()
+
+def _release(shared: Dict[str, SharedArray]):
+    for array in shared.values():
+        array.close()
+        array.block.unlink()
+
+def iter_cohort_growth(workers: Optional[int] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                       batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Analyze the growth of every active user with new records across a process pool.
+
+    Chunks are read one at a time while earlier ones are analyzed, and at
+    most one more chunk than there are pool processes is held in shared
+    memory.
+
+    Args:
+        workers: Pool processes (defaults to the CPU count)
+        chunk_rows: Approximate records per unit of work
+        batch_size: Rows fetched per round trip for the extract
+
+    Yields:
+        Lists of per-user results as chunks complete
+    """
+    upto_id = db.session.query(func.max(SpiritualRecord.id)).scalar() or 0
+    model = current_model()
+    chunks = plan_chunks(plan_cohort(upto_id, model.version if model else ''), chunk_rows)
+    if not chunks:
+        return
+
+    max_in_flight = (workers or os.cpu_count() or 1) + 1
+    pending = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in chunks:
+                columns = load_cohort_columns(chunk, upto_id, batch_size)
+                stored = load_stored_states([user_id for user_id, rebuild, _ in chunk if not rebuild])
+                users = [
+                    (user_id, start, end, stored.get(user_id))
+                    for user_id, start, end in user_ranges(columns['user_id'])
+                ]
+                if not users:
+                    continue
+
+                shared = {
+                    name: SharedArray.copy_of(columns[name])
+                    for name in ('date', 'values')
+                }
+                del columns
+                specs = {name: array.spec for name, array in shared.items()}
+                pending[pool.submit(analyze_chunk, specs, users, model, upto_id)] = shared
+
+                while len(pending) >= max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _release(pending.pop(future))
+                        yield future.result()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _release(pending.pop(future))
+                    yield future.result()
+    finally:
+        for shared in pending.values():
+            _release(shared)
+
+def _upsert(model, rows: List[Dict]):
+    """Insert rows keyed by user_id, replacing existing ones."""
+    statement = insert(model).values(rows)
+    db.session.execute(statement.on_conflict_do_update(
+        index_elements=[model.user_id],
+        set_={column: statement.excluded[column] for column in rows[0] if column != 'user_id'}
+    ))
+
+def save_growth_results(results: List[Dict]):
+    """Bulk upsert growth analytics and states; the caller commits."""
+    now = datetime.utcnow()
+    for start in range(0, len(results), WRITE_BATCH_SIZE):
+        batch = results[start:start + WRITE_BATCH_SIZE]
+
+        _upsert(GrowthAnalytics, [
+            {
+                'user_id': result['user_id'],
+                'weeks': result['chart'][0],
+                'points': result['chart'][1],
+                'trends': result['trends'],
+                'patterns': result['patterns'],
+                'insights': result['insights'],
+                'record_count': result['record_count'],
+                'updated_at': now
+            }
+            for result in batch
+        ])
+        _upsert(GrowthState, [
+            {
+                'user_id': result['user_id'],
+                'watermark_id': result['watermark_id'],
+                'last_date': result['last_date'],
+                'record_count': result['record_count'],
+                'model_version': result['model_version'],
+                'state': result['state'],
+                'updated_at': now
+            }
+            for result in batch
+        ])
+
+def analyze_cohort_growth(workers: Optional[int] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                          progress: Optional[Callable[[int], None]] = None) -> int:
+    """Analyze and store the growth of every active user with new records.
+
+    Each completed chunk is written and committed on its own.
+
+    Args:
+        workers: Pool processes (defaults to the CPU count)
+        chunk_rows: Approximate records per unit of work
+        progress: Optional callback receiving the running user count
+
+    Returns:
+        Number of users analyzed
+    """
+    total = 0
+    for results in iter_cohort_growth(workers, chunk_rows):
+        save_growth_results(results)
+        db.session.commit()
+        total += len(results)
+        if progress:
+            progress(total)
+    return total
@@ -0,0 +1,151 @@
+"""Core functionality for the cohort-wide growth clustering model.
+
+The scaler and cluster centroids are fitted periodically on a random
+sample of everyone's records and saved as a versioned artifact in the
+``growth_models`` table, where every web and worker process can see it.
+Workers load the newest artifact once and then only transform and
+predict, so clusters mean the same thing for every user and a user with
+a handful of records can still be assigned.
+"""
+
+import io
+import time
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from flask import current_app
+from sqlalchemy import func
+from app import db
+from app.models.user import GrowthModelArtifact, SpiritualRecord, METRIC_COLUMNS
+
+N_CLUSTERS = 3
+
+DEFAULT_SAMPLE_SIZE = 100000
+
+
+class GrowthModel:
+    """Fitted scaler and centroids, applied with plain NumPy."""
+
+    def __init__(self, version: str, mean: np.ndarray, scale: np.ndarray, centroids: np.ndarray):
+        self.version = version
+        self.mean = mean
+        self.scale = scale
+        self.centroids = centroids
+
+    def transform(self, values: np.ndarray) -> np.ndarray:
+        """Standardize metric rows like the fitted StandardScaler."""
+        return (values - self.mean) / self.scale
+
+    def predict(self, values: np.ndarray) -> np.ndarray:
+        """Assign metric rows to their nearest centroid."""
+        scaled = self.transform(values)
+        # |x - c|^2 without the |x|^2 term, which is the same for every centroid
+        distances = (self.centroids ** 2).sum(axis=1) - 2 * scaled @ self.centroids.T
+        return distances.argmin(axis=1)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the model as an ``.npz`` archive."""
+        buffer = io.BytesIO()
+        np.savez(buffer, mean=self.mean, scale=self.scale, centroids=self.centroids)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, version: str, data: bytes) -> 'GrowthModel':
+        with np.load(io.BytesIO(data)) as arrays:
+            return cls(version, arrays['mean'], arrays['scale'], arrays['centroids'])
+
+def save_model(model: GrowthModel, keep: int):
+    """Store a model as the newest version, keeping the ``keep`` newest versions.
+
+    Args:
+        model: Fitted model
+        keep: Number of versions kept, including this one
+    """
+    db.session.add(GrowthModelArtifact(version=model.version, artifact=model.to_bytes()))
+    db.session.flush()
+    stale = list_versions()[:-keep]
+    if stale:
+        GrowthModelArtifact.query.filter(
+            GrowthModelArtifact.version.in_(stale)
+        ).delete(synchronize_session=False)
+    db.session.commit()
+
+def list_versions() -> List[str]:
+    """Get the saved model versions, oldest first."""
+    rows = db.session.query(GrowthModelArtifact.version).order_by(GrowthModelArtifact.version)
+    return [version for (version,) in rows]
+
+def sample_metric_rows(sample_size: int = DEFAULT_SAMPLE_SIZE) -> np.ndarray:
+    """Get a random sample of metric rows across all users."""
+    rows = db.session.query(
+        *[func.coalesce(getattr(SpiritualRecord, column), 0) for column in METRIC_COLUMNS]
+    ).order_by(func.random()).limit(sample_size).all()
+    return np.array(rows, dtype=np.float64).reshape(-1, len(METRIC_COLUMNS))
+
+def fit_growth_model(values: np.ndarray, version: Optional[str] = None) -> GrowthModel:
+    """Fit the scaler and MiniBatchKMeans centroids on sampled metric rows.
+
+    Args:
+        values: Sampled rows of shape (n, len(METRIC_COLUMNS)), n >= N_CLUSTERS
+        version: Artifact version (defaults to the current UTC time)
+
+    Returns:
+        The fitted model
+    """
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.cluster import MiniBatchKMeans
+
+    scaler = StandardScaler().fit(values)
+    kmeans = MiniBatchKMeans(n_clusters=N_CLUSTERS, random_state=42, n_init=3)
+    kmeans.fit(scaler.transform(values))
+
+    return GrowthModel(
+        version or datetime.utcnow().strftime('%Y%m%d%H%M%S'),
+        scaler.mean_, scaler.scale_, kmeans.cluster_centers_
+    )
+
+def train_growth_model(sample_size: int = DEFAULT_SAMPLE_SIZE) -> Optional[GrowthModel]:
+    """Fit a new model on a sample and save it as the newest version.
+
+    Older versions beyond ``GROWTH_MODEL_KEEP`` are removed.
+
+    Returns:
+        The new model, or None if there are too few records to fit one
+    """
+    values = sample_metric_rows(sample_size)
+    if len(values) < N_CLUSTERS:
+        return None
+
+    model = fit_growth_model(values)
+    save_model(model, current_app.config['GROWTH_MODEL_KEEP'])
+    return model
+
+# Model loaded by this worker process, and when the newest version was last checked
+_model = None
+_checked_at = None
+
+def current_model() -> Optional[GrowthModel]:
+    """Get the newest saved model.
+
+    The newest version is looked up at most once per
+    ``GROWTH_MODEL_CHECK_INTERVAL`` seconds, and loaded only when it
+    changed.
+
+    Returns:
+        The model, or None if none has been trained yet
+    """
+    global _model, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < current_app.config['GROWTH_MODEL_CHECK_INTERVAL']:
+        return _model
+    _checked_at = now
+
+    version = db.session.query(func.max(GrowthModelArtifact.version)).scalar()
+    if version is None:
+        _model = None
+        current_app.logger.warning(
+            "No growth model has been trained; growth patterns are empty until `flask train-growth-model` runs"
+        )
+    elif _model is None or _model.version != version:
+        _model = GrowthModel.from_bytes(version, GrowthModelArtifact.query.get(version).artifact)
+    return _model
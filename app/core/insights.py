@@ -0,0 +1,137 @@
+"""Core functionality for set-based weekly insight generation.
+
+The last week of every active user is read in one scan and analyzed as a
+single grouped frame, instead of one query and one Python pass per user.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from app import db
+from app.models.user import User, SpiritualRecord, METRIC_COLUMNS
+from app.core.streaks import WEEKLY_GOALS
+
+WEEKLY_COLUMNS = ['user_id', 'date', 'category', *METRIC_COLUMNS]
+
+def load_weekly_activity(since: date) -> pd.DataFrame:
+    """Get the records of all active, verified users since a day.
+
+    Args:
+        since: First day of the window
+
+    Returns:
+        Frame with one row per record and the numeric metric columns
+    """
+    rows = db.session.query(
+        SpiritualRecord.user_id,
+        SpiritualRecord.date,
+        SpiritualRecord.category,
+        *[func.coalesce(getattr(SpiritualRecord, column), 0) for column in METRIC_COLUMNS]
+    ).join(User, User.id == SpiritualRecord.user_id).filter(
+        User.active == True,
+        User.email_verified == True,
+        SpiritualRecord.date >= since
+    ).all()
+
+    return pd.DataFrame(rows, columns=WEEKLY_COLUMNS)
+
+def summarize_week(frame: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate a week of records per user.
+
+    Returns:
+        Frame indexed by user ID with metric totals, record and day counts,
+        and per-day averages for Bible study and prayer
+    """
+    grouped = frame.groupby('user_id')
+    summary = grouped[list(METRIC_COLUMNS)].sum()
+    summary['records'] = grouped.size()
+    summary['active_days'] = grouped['date'].nunique()
+
+    for column, prefix in (('bible_study_minutes', 'bible_study'), ('prayer_minutes', 'prayer')):
+        days = frame[frame[column] > 0].groupby('user_id')['date'].nunique()
+        summary[f'{prefix}_days'] = days.reindex(summary.index, fill_value=0)
+        summary[f'{prefix}_average'] = (
+            summary[column] / summary[f'{prefix}_days'].replace(0, np.nan)
+        ).fillna(0)
+
+    return summary
+
+def weekly_targets(users: Iterable[User]) -> pd.DataFrame:
+    """Get the weekly Bible study and prayer targets from users' daily goals.
+
+    Returns:
+        Frame indexed by user ID with ``study_target`` and ``prayer_target``;
+        users without a goal get NaN
+    """
+    targets = {'study_target': {}, 'prayer_target': {}}
+    for user in users:
+        goals = (user.profile or {}).get('spiritual_goals') or {}
+        for column, metric in (('study_target', 'study_minutes'), ('prayer_target', 'prayer_minutes')):
+            section, key = WEEKLY_GOALS[metric]
+            daily = (goals.get(section) or {}).get(key)
+            targets[column][user.id] = daily * 7 if daily else np.nan
+    return pd.DataFrame(targets, dtype=float)
+
+def collect_messages(index: pd.Index, rules: List[Tuple[pd.Series, str]]) -> Dict[int, List[str]]:
+    """Turn per-rule boolean masks into per-user message lists."""
+    collected = {}
+    for mask, message in rules:
+        for user_id in index[mask.to_numpy()]:
+            collected.setdefault(int(user_id), []).append(message)
+    return collected
+
+def build_weekly_insights(frame: pd.DataFrame, targets: pd.DataFrame) -> Dict[int, Dict]:
+    """Analyze a week of records for every user at once.
+
+    Args:
+        frame: Records as returned by load_weekly_activity
+        targets: Weekly targets as returned by weekly_targets
+
+    Returns:
+        Dictionary of user ID to insights (summary, achievements,
+        suggestions, bible_study, prayer_life)
+    """
+    if frame.empty:
+        return {}
+
+    summary = summarize_week(frame).join(targets, how='left')
+
+    achievements = collect_messages(summary.index, [
+        (summary['active_days'] >= 7, 'Recorded spiritual activity every day this week'),
+        (summary['bible_study_days'] >= 5, 'Studied the Bible on five or more days'),
+        (summary['bible_study_minutes'] >= summary['study_target'], 'Met your weekly Bible study goal'),
+        (summary['prayer_minutes'] >= summary['prayer_target'], 'Met your weekly prayer goal'),
+        (summary['service_hours'] > 0, 'Served others this week')
+    ])
+    suggestions = collect_messages(summary.index, [
+        (summary['bible_study_minutes'] == 0, 'Set aside time for Bible study this week'),
+        (summary['prayer_minutes'] == 0, 'Begin each day with a few minutes of prayer'),
+        (summary['active_days'] < 4, 'Try recording your spiritual activities on more days'),
+        (summary['service_hours'] == 0, 'Look for an opportunity to serve someone this week')
+    ])
+
+    insights = {}
+    for user_id, row in zip(summary.index, summary.to_dict('records')):
+        user_id = int(user_id)
+        insights[user_id] = {
+            'summary': {
+                'records': int(row['records']),
+                'active_days': int(row['active_days']),
+                **{column: round(float(row[column]), 1) for column in METRIC_COLUMNS}
+            },
+            'achievements': achievements.get(user_id, []),
+            'suggestions': suggestions.get(user_id, []),
+            'bible_study': {
+                'minutes': round(float(row['bible_study_minutes']), 1),
+                'days': int(row['bible_study_days']),
+                'average_minutes': round(float(row['bible_study_average']), 1)
+            },
+            'prayer_life': {
+                'minutes': round(float(row['prayer_minutes']), 1),
+                'days': int(row['prayer_days']),
+                'average_minutes': round(float(row['prayer_average']), 1)
+            }
+        }
+    return insights
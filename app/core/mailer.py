@@ -0,0 +1,370 @@
+"""Core functionality for queued, batched email delivery.
+
+Emails are rendered when they are queued and pushed to a Redis outbox.
+Up to ``MAIL_MAX_DRAINERS`` workers drain the outbox at once, each over
+its own persistent SMTP session. Every send reserves a slot of one
+cluster-wide rate limit, so together they send ``MAIL_SEND_RATE``
+messages per second. Failed messages are retried with exponential
+backoff before being moved to a dead letter list.
+
+Messages being sent sit in the draining process's processing list until
+they are sent, retried or dead-lettered. Drainers send a heartbeat with
+every message; the lists of drainers whose heartbeat expired are put back
+on the outbox by the next drain, so delivery is at-least-once: a message
+in flight when its worker died can be sent twice.
+"""
+
+import json
+import os
+import smtplib
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from flask_mail import Message
+from app import mail
+from app.core.email_templates import render_email_html
+
+OUTBOX_KEY = 'mail:outbox'
+RETRY_KEY = 'mail:retry'
+DEAD_KEY = 'mail:dead'
+PROCESSING_KEY = 'mail:processing:{consumer}'
+
+# Set of every processing list ever used, for recovery
+PROCESSING_LISTS_KEY = 'mail:processing'
+
+# Draining consumers, scored by when their heartbeat expires
+DRAINERS_KEY = 'mail:drainers'
+DRAINER_TTL = 60  # seconds without a heartbeat before a drainer's messages are recovered
+
+# Earliest time of the next send under the cluster-wide rate limit
+SEND_RATE_KEY = 'mail:send_rate'
+
+# Atomically move retries whose backoff has elapsed back onto the outbox
+_PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+    redis.call('RPUSH', KEYS[2], unpack(due))
+end
+return #due
+"""
+
+# Register a drainer unless the maximum number are alive
+_JOIN_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if not redis.call('ZSCORE', KEYS[1], ARGV[2]) and redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+return 1
+"""
+
+# Refresh a drainer's heartbeat and reserve its next send under the rate
+# limit (GCRA). Returns the seconds to wait for the reserved send, or -1
+# if the drainer's heartbeat expired meanwhile.
+_RESERVE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local expires = redis.call('ZSCORE', KEYS[1], ARGV[2])
+if not expires or tonumber(expires) < now then
+    return '-1'
+end
+redis.call('ZADD', KEYS[1], ARGV[3], ARGV[2])
+local interval = tonumber(ARGV[4])
+local next_send = math.max(tonumber(redis.call('GET', KEYS[2]) or now), now)
+if interval > 0 then
+    redis.call('SET', KEYS[2], tostring(next_send + interval),
+               'PX', math.ceil((next_send + interval - now) * 1000) + 1000)
+end
+return tostring(next_send - now)
+"""
+
+# Move a processing list back to the front of the outbox unless its
+# drainer is alive (or ARGV[3] is '1')
+_RECOVER_SCRIPT = """
+if ARGV[3] ~= '1' then
+    local expires = redis.call('ZSCORE', KEYS[3], ARGV[1])
+    if expires and tonumber(expires) >= tonumber(ARGV[2]) then
+        return -1
+    end
+end
+local moved = 0
+while redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT') do
+    moved = moved + 1
+end
+redis.call('SREM', KEYS[4], KEYS[1])
+return moved
+"""
+
+# Errors that will not go away by retrying the same message
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused)
+
+def render_email(subject: str, recipients: List[str], template: str, **context) -> Dict:
+    """Render an email into an outbox message.
+
+    Args:
+        subject: Email subject
+        recipients: Recipient addresses
+        template: HTML template name
+        **context: Template context
+
+    Returns:
+        Message dictionary ready for Outbox.push
+    """
+    return {
+        'subject': subject,
+        'recipients': recipients,
+        'html': render_email_html(template, **context),
+        'attempts': 0
+    }
+
+class Outbox:
+    """Redis list of rendered emails waiting to be sent."""
+
+    def __init__(self, redis, consumer: Optional[str] = None):
+        self.redis = redis
+        self.consumer = consumer or f'{socket.gethostname()}-{os.getpid()}'
+        self.processing_key = PROCESSING_KEY.format(consumer=self.consumer)
+        self._promote = redis.register_script(_PROMOTE_SCRIPT)
+        self._join = redis.register_script(_JOIN_SCRIPT)
+        self._reserve = redis.register_script(_RESERVE_SCRIPT)
+        self._recover = redis.register_script(_RECOVER_SCRIPT)
+
+    def push(self, *messages: Dict, client=None):
+        """Append rendered messages to the outbox."""
+        if messages:
+            (client or self.redis).rpush(OUTBOX_KEY, *[json.dumps(m) for m in messages])
+
+    def take(self, count: int) -> List[Tuple[str, Dict]]:
+        """Move up to ``count`` messages from the outbox to this consumer's processing list.
+
+        Every message taken must be finished with ack, retry_later or dead.
+
+        Returns:
+            List of (raw, message) pairs; ``raw`` identifies the message
+            in the processing list
+        """
+        pipe = self.redis.pipeline()
+        pipe.sadd(PROCESSING_LISTS_KEY, self.processing_key)
+        for _ in range(count):
+            pipe.lmove(OUTBOX_KEY, self.processing_key, 'LEFT', 'RIGHT')
+        _, *raw = pipe.execute()
+        return [(m.decode(), json.loads(m)) for m in raw if m is not None]
+
+    def ack(self, raw: str, client=None):
+        """Remove a sent message from the processing list."""
+        (client or self.redis).lrem(self.processing_key, 1, raw)
+
+    def join(self, max_drainers: int) -> bool:
+        """Register this consumer as a drainer, unless ``max_drainers`` are alive.
+
+        Returns:
+            True if this consumer may drain
+        """
+        now = time.time()
+        return bool(self._join(
+            keys=[DRAINERS_KEY], args=[now, self.consumer, now + DRAINER_TTL, max_drainers]
+        ))
+
+    def leave(self):
+        """Unregister this consumer as a drainer."""
+        self.redis.zrem(DRAINERS_KEY, self.consumer)
+
+    def reserve_send(self, interval: float) -> Optional[float]:
+        """Send a heartbeat and reserve the next send under the global rate limit.
+
+        Args:
+            interval: Seconds between sends across all drainers (0 for no limit)
+
+        Returns:
+            Seconds to wait before sending, or None if this drainer's
+            heartbeat expired and its messages may have been recovered
+        """
+        now = time.time()
+        wait = float(self._reserve(
+            keys=[DRAINERS_KEY, SEND_RATE_KEY],
+            args=[now, self.consumer, now + DRAINER_TTL, interval]
+        ))
+        return None if wait < 0 else wait
+
+    def recover(self) -> int:
+        """Put the messages of drainers whose heartbeat expired back on the outbox.
+
+        This consumer's own list is always recovered: it holds what an
+        earlier drain of this process left behind.
+
+        Returns:
+            Number of messages requeued
+        """
+        prefix = len(PROCESSING_KEY.format(consumer=''))
+        now = time.time()
+        recovered = 0
+        for key in self.redis.smembers(PROCESSING_LISTS_KEY):
+            key = key.decode()
+            # Taken from the back and pushed to the front to keep their order
+            moved = self._recover(
+                keys=[key, OUTBOX_KEY, DRAINERS_KEY, PROCESSING_LISTS_KEY],
+                args=[key[prefix:], now, int(key == self.processing_key)]
+            )
+            recovered += max(moved, 0)
+        return recovered
+
+    def size(self) -> int:
+        """Number of messages waiting in the outbox."""
+        return self.redis.llen(OUTBOX_KEY)
+
+    def retry_later(self, raw: str, message: Dict, delay: float):
+        """Schedule a failed message to return to the outbox after ``delay`` seconds."""
+        pipe = self.redis.pipeline()
+        pipe.zadd(RETRY_KEY, {json.dumps(message): time.time() + delay})
+        self.ack(raw, client=pipe)
+        pipe.execute()
+
+    def promote_retries(self) -> int:
+        """Move messages whose backoff has elapsed back onto the outbox."""
+        return self._promote(keys=[RETRY_KEY, OUTBOX_KEY], args=[time.time()])
+
+    def next_retry_in(self) -> Optional[float]:
+        """Seconds until the earliest pending retry, or None if there is none."""
+        first = self.redis.zrange(RETRY_KEY, 0, 0, withscores=True)
+        if not first:
+            return None
+        return max(first[0][1] - time.time(), 0)
+
+    def dead(self, raw: str, message: Dict):
+        """Give up on a message, keeping it for inspection."""
+        pipe = self.redis.pipeline()
+        pipe.rpush(DEAD_KEY, json.dumps(message))
+        self.ack(raw, client=pipe)
+        pipe.execute()
+
+# SMTP session kept open across drains in this worker process
+_connection = None
+
+def _open_connection():
+    """Get this process's SMTP session, reconnecting if the server dropped it."""
+    global _connection
+    if _connection is not None:
+        try:
+            # host is None when MAIL_SUPPRESS_SEND is set
+            if _connection.host is None or _connection.host.noop()[0] == 250:
+                return _connection
+        except (smtplib.SMTPException, OSError):
+            pass
+        _close_connection()
+
+    connection = mail.connect()
+    _connection = connection.__enter__()
+    return _connection
+
+def _close_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.__exit__(None, None, None)
+        except (smtplib.SMTPException, OSError):
+            pass
+        _connection = None
+
+class BulkMailer:
+    """Drains the outbox over a persistent SMTP session, under a global rate limit."""
+
+    def __init__(self, outbox: Outbox, rate: float, batch_size: int,
+                 max_retries: int, retry_backoff: float, max_drainers: int = 1):
+        self.outbox = outbox
+        self.interval = 1.0 / rate if rate else 0
+        self.batch_size = batch_size
+        self.max_drainers = max_drainers
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    @classmethod
+    def from_app(cls) -> 'BulkMailer':
+        """Create a mailer from the current application's configuration."""
+        config = current_app.config
+        return cls(
+            Outbox(current_app.redis),
+            config['MAIL_SEND_RATE'],
+            config['MAIL_OUTBOX_BATCH_SIZE'],
+            config['MAIL_MAX_RETRIES'],
+            config['MAIL_RETRY_BACKOFF'],
+            config['MAIL_MAX_DRAINERS']
+        )
+
+    def drain(self, limit: int) -> Dict:
+        """Send queued messages until the outbox is empty or ``limit`` is reached.
+
+        At most ``max_drainers`` drains run at once, sharing the send rate.
+        A drain that finds them all running returns at once with
+        ``skipped`` set; the running drains pick up the new messages.
+
+        Args:
+            limit: Maximum number of messages to attempt in this call
+
+        Returns:
+            Counts of sent, retried and dead messages, plus the remaining backlog
+        """
+        stats = {'sent': 0, 'retried': 0, 'dead': 0, 'skipped': False}
+        if not self.outbox.join(self.max_drainers):
+            stats['skipped'] = True
+            return stats
+
+        try:
+            self.outbox.recover()
+            self.outbox.promote_retries()
+            self._send(limit, stats)
+        finally:
+            self.outbox.leave()
+
+        # Read after leaving, so a message pushed by a drain that was
+        # skipped meanwhile is seen here
+        stats['remaining'] = self.outbox.size()
+        stats['next_retry_in'] = self.outbox.next_retry_in()
+        return stats
+
+    def _send(self, limit: int, stats: Dict):
+        connection = None
+        attempted = 0
+        while attempted < limit:
+            messages = self.outbox.take(min(self.batch_size, limit - attempted))
+            if not messages:
+                break
+
+            for raw, message in messages:
+                delay = self.outbox.reserve_send(self.interval)
+                if delay is None:
+                    # Another drain may be recovering our list
+                    current_app.logger.warning("Outbox drainer heartbeat expired; stopping")
+                    return
+
+                attempted += 1
+                if delay > 0:
+                    time.sleep(delay)
+
+                try:
+                    connection = connection or _open_connection()
+                    connection.send(Message(
+                        subject=message['subject'],
+                        recipients=message['recipients'],
+                        html=message['html']
+                    ))
+                    self.outbox.ack(raw)
+                    stats['sent'] += 1
+                except Exception as e:
+                    if not isinstance(e, PERMANENT_ERRORS):
+                        _close_connection()
+                        connection = None
+                    self._fail(raw, message, e, stats)
+
+    def _fail(self, raw: str, message: Dict, error: Exception, stats: Dict):
+        message['attempts'] += 1
+        message['error'] = str(error)
+        if isinstance(error, PERMANENT_ERRORS) or message['attempts'] > self.max_retries:
+            current_app.logger.error(
+                f"Giving up on email to {message['recipients']}: {str(error)}"
+            )
+            self.outbox.dead(raw, message)
+            stats['dead'] += 1
+        else:
+            self.outbox.retry_later(raw, message, self.retry_backoff * 2 ** (message['attempts'] - 1))
+            stats['retried'] += 1
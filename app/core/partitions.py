@@ -0,0 +1,194 @@
+"""Core functionality for monthly history partitions and archival."""
+
+import re
+from datetime import date, datetime
+from itertools import groupby
+from typing import Callable, List, Optional
+from sqlalchemy import func, text
+from app import db
+from app.models.user import HistoryArchive, PARTITION_KEYS
+from app.core.export import EXPORT_MODELS, DEFAULT_BATCH_SIZE, encode_archive_rows
+
+DEFAULT_MONTHS_AHEAD = 3
+
+_PARTITION_SUFFIX = re.compile(r'_(\d{4})_(\d{2})$')
+
+def month_start(day: date) -> date:
+    """Get the first day of the month containing a day."""
+    return date(day.year, day.month, 1)
+
+def add_months(month: date, months: int) -> date:
+    """Shift the first day of a month by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    """Get the name of a table's partition for a month, e.g. "bible_studies_2026_10"."""
+    return f'{table}_{month:%Y_%m}'
+
+def is_partitioned() -> bool:
+    """Check whether the database supports the partitioned layout."""
+    return db.engine.dialect.name == 'postgresql'
+
+def list_partitions(table: str) -> List[date]:
+    """Get the months that have a partition of a table, oldest first."""
+    rows = db.session.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = :table"
+    ), {'table': table})
+
+    months = []
+    for (name,) in rows:
+        match = _PARTITION_SUFFIX.search(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+def _create_partition(table: str, month: date) -> str:
+    """Create a table's partition for a month (uncommitted).
+
+    Rows of the month already in the default partition (e.g. dated beyond
+    the months prepared ahead) would make a plain CREATE fail, so they are
+    moved into the new partition while the default is detached.
+    """
+    name = partition_name(table, month)
+    default = f'{table}_default'
+    key = PARTITION_KEYS[table]
+    bounds = {'start': month, 'end': add_months(month, 1)}
+    create = text(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') "
+        f"TO ('{bounds['end'].isoformat()}')"
+    )
+
+    stranded = db.session.execute(text(
+        f"SELECT 1 FROM {default} WHERE {key} >= :start AND {key} < :end LIMIT 1"
+    ), bounds).first()
+    if stranded is None:
+        db.session.execute(create)
+        return name
+
+    db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {default}"))
+    db.session.execute(create)
+    db.session.execute(text(
+        f"WITH moved AS (DELETE FROM {default} WHERE {key} >= :start AND {key} < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    db.session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT"))
+    return name
+
+def ensure_partitions(months_ahead: int = DEFAULT_MONTHS_AHEAD,
+                      today: Optional[date] = None) -> List[str]:
+    """Create the monthly partitions of the coming months.
+
+    Each partition is created in its own transaction, so one failure
+    keeps the partitions created before it.
+
+    Args:
+        months_ahead: Number of months after the current one to prepare
+        today: Reference day (defaults to today, UTC)
+
+    Returns:
+        Names of the partitions that were created
+    """
+    if not is_partitioned():
+        return []
+
+    current = month_start(today or datetime.utcnow().date())
+    created = []
+    for table in PARTITION_KEYS:
+        existing = set(list_partitions(table))
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            try:
+                created.append(_create_partition(table, month))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+    return created
+
+def _archive_month(kind: str, month: date, batch_size: int) -> int:
+    """Move one month of a table into the history archive (uncommitted)."""
+    model = EXPORT_MODELS[kind]
+    key = getattr(model, PARTITION_KEYS[kind])
+    end = add_months(month, 1)
+    columns = list(model.__table__.columns)
+    names = [column.key for column in columns]
+
+    rows = db.session.query(*columns).filter(
+        key >= month, key < end
+    ).order_by(model.user_id, model.id).yield_per(batch_size)
+
+    total = 0
+    for user_id, user_rows in groupby(rows, key=lambda row: row.user_id):
+        user_rows = [dict(zip(names, row)) for row in user_rows]
+        db.session.add(HistoryArchive(
+            kind=kind,
+            user_id=user_id,
+            month=month,
+            row_count=len(user_rows),
+            payload=encode_archive_rows(user_rows)
+        ))
+        total += len(user_rows)
+
+    if is_partitioned() and month in list_partitions(kind):
+        name = partition_name(kind, month)
+        db.session.execute(text(f"ALTER TABLE {kind} DETACH PARTITION {name}"))
+        db.session.execute(text(f"DROP TABLE {name}"))
+    elif total:
+        db.session.query(model).filter(
+            key >= month, key < end
+        ).delete(synchronize_session=False)
+
+    return total
+
+def archive_history(horizon_months: int, today: Optional[date] = None,
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    progress: Optional[Callable[[str, date, int], None]] = None) -> int:
+    """Move history older than the horizon into the compressed archive.
+
+    Each table-month is archived in its own transaction: the rows are
+    written to ``history_archive`` (one zlib-compressed NDJSON payload per
+    user) and the month's partition is dropped, or the rows deleted when
+    the table is not partitioned. Exports keep reading archived rows.
+
+    Args:
+        horizon_months: Number of whole months (before the current one) to keep live
+        today: Reference day (defaults to today, UTC)
+        batch_size: Number of rows fetched per round trip
+        progress: Optional callback receiving table, month and rows archived
+
+    Returns:
+        Number of rows archived
+    """
+    cutoff = add_months(month_start(today or datetime.utcnow().date()), -horizon_months)
+
+    total = 0
+    for kind in PARTITION_KEYS:
+        key = getattr(EXPORT_MODELS[kind], PARTITION_KEYS[kind])
+        oldest = db.session.query(func.min(key)).filter(key < cutoff).scalar()
+
+        months = set(m for m in list_partitions(kind) if m < cutoff) if is_partitioned() else set()
+        if oldest is not None:
+            month = month_start(oldest)
+            while month < cutoff:
+                months.add(month)
+                month = add_months(month, 1)
+
+        for month in sorted(months):
+            try:
+                archived = _archive_month(kind, month, batch_size)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            total += archived
+            if progress:
+                progress(kind, month, archived)
+
+    return total
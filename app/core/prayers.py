@@ -0,0 +1,71 @@
+"""Core functionality for prayer request analytics.
+
+Counts, answer times and the hour-of-day distribution are aggregated in
+the database over the (user_id, created_at) index, so analyzing a user
+takes the same two queries however many requests they have made.
+"""
+
+from typing import Dict, List, Optional
+from sqlalchemy import case, extract, func
+from app import db
+from app.models.user import PrayerRequest
+
+# Hours of day reported as peak prayer times
+PEAK_HOURS = 3
+
+def _answer_seconds():
+    """SQL expression for the seconds from a request to its answer."""
+    if db.engine.dialect.name == 'sqlite':
+        return (func.julianday(PrayerRequest.answered_at)
+                - func.julianday(PrayerRequest.created_at)) * 86400
+    return extract('epoch', PrayerRequest.answered_at - PrayerRequest.created_at)
+
+def prayer_hour_histogram(user_id: int) -> List[int]:
+    """Count a user's prayer requests per hour of day (UTC).
+
+    Returns:
+        List of 24 counts indexed by hour
+    """
+    hour = extract('hour', PrayerRequest.created_at)
+    rows = db.session.query(hour, func.count(PrayerRequest.id)).filter(
+        PrayerRequest.user_id == user_id
+    ).group_by(hour).all()
+
+    histogram = [0] * 24
+    for value, count in rows:
+        histogram[int(value)] = count
+    return histogram
+
+def peak_hours(histogram: List[int], limit: int = PEAK_HOURS) -> List[int]:
+    """Get the busiest hours of a histogram, busiest (then earliest) first."""
+    ranked = sorted(range(24), key=lambda hour: (-histogram[hour], hour))
+    return [hour for hour in ranked[:limit] if histogram[hour]]
+
+def prayer_pattern_stats(user_id: int) -> Optional[Dict]:
+    """Aggregate a user's prayer requests in SQL.
+
+    Args:
+        user_id: User ID
+
+    Returns:
+        Dictionary with total_requests, answered_prayers, avg_answer_time
+        (hours, None when nothing has been answered), hourly_distribution
+        and peak_prayer_times; None if the user has no requests
+    """
+    total, answered, avg_seconds = db.session.query(
+        func.count(PrayerRequest.id),
+        func.coalesce(func.sum(case((PrayerRequest.is_answered == True, 1), else_=0)), 0),
+        func.avg(case((PrayerRequest.is_answered == True, _answer_seconds())))
+    ).filter(PrayerRequest.user_id == user_id).one()
+
+    if not total:
+        return None
+
+    histogram = prayer_hour_histogram(user_id)
+    return {
+        'total_requests': total,
+        'answered_prayers': int(answered),
+        'avg_answer_time': round(float(avg_seconds) / 3600, 1) if avg_seconds is not None else None,
+        'hourly_distribution': histogram,
+        'peak_prayer_times': peak_hours(histogram)
+    }
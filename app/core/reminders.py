@@ -0,0 +1,195 @@
+"""Core functionality for scheduling Sabbath preparation reminders.
+
+Each user's next reminder instant is kept as the score of a Redis sorted
+set, so the periodic task only touches the users that are due.
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+import pytz
+from flask import current_app
+from redis.exceptions import RedisError
+from app import db
+from app.models.user import User
+
+REMINDER_QUEUE_KEY = 'reminders:sabbath'
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Delay before retrying users whose reminder could not be processed
+RETRY_DELAY = timedelta(minutes=15)
+
+# Atomically take up to ARGV[2] members scored at or before ARGV[1]
+_POP_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+def get_next_friday(now: datetime) -> datetime:
+    """Get next Friday date"""
+    days_ahead = 4 - now.weekday()  # Friday is 4
+    if days_ahead <= 0:
+        days_ahead += 7
+    return now + timedelta(days=days_ahead)
+
+def get_reminder_window(profile: Dict, now: Optional[datetime] = None):
+    """Get the reminder time and preparation start of the coming Sabbath.
+
+    Args:
+        profile: User profile with ``timezone`` and ``sabbath_preferences``
+        now: Reference instant (defaults to now)
+
+    Returns:
+        Tuple of aware datetimes (reminder_time, prep_time) in the user's timezone
+    """
+    timezone = pytz.timezone(profile.get('timezone', 'UTC'))
+    now = now.astimezone(timezone) if now else datetime.now(timezone)
+
+    prefs = profile.get('sabbath_preferences', {})
+    prep_start_hour = prefs.get('preparation_start_hour', 14)  # Default 2 PM
+    notif_hours = prefs.get('notification_hours_before', 24)
+
+    def preparation_start(day):
+        return timezone.localize(datetime(day.year, day.month, day.day, prep_start_hour))
+
+    prep_time = preparation_start(get_next_friday(now))
+    # get_next_friday skips today, but this Friday counts until preparation starts
+    if now.weekday() == 4 and preparation_start(now) > now:
+        prep_time = preparation_start(now)
+    reminder_time = prep_time - timedelta(hours=notif_hours)
+
+    return reminder_time, prep_time
+
+def next_reminder_at(profile: Dict, now: Optional[datetime] = None) -> datetime:
+    """Get the next instant a user's reminder should go out.
+
+    Inside an open reminder window this is ``now``, so a user who joins or
+    changes preferences mid-window is still reminded this week.
+    """
+    now = now or datetime.now(pytz.utc)
+    reminder_time, _ = get_reminder_window(profile, now)
+    return max(reminder_time, now)
+
+class ReminderQueue:
+    """Redis sorted set of user ids scored by their next reminder time."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._pop_due = redis.register_script(_POP_DUE_SCRIPT)
+
+    def schedule(self, user_id: int, profile: Dict, now: Optional[datetime] = None,
+                 client=None) -> datetime:
+        """Queue a user's next reminder, replacing any earlier entry.
+
+        Args:
+            user_id: User ID
+            profile: The user's profile
+            now: Reference instant; pass a preparation start to skip to the following week
+            client: Optional pipeline to queue the write on
+
+        Returns:
+            The scheduled reminder time
+        """
+        at = next_reminder_at(profile, now)
+        (client or self.redis).zadd(REMINDER_QUEUE_KEY, {user_id: at.timestamp()})
+        return at
+
+    def retry(self, user_ids: List[int], at: datetime, client=None):
+        """Put popped users back on the queue after a failure.
+
+        Users scheduled again in the meantime keep their new entry.
+
+        Args:
+            user_ids: User IDs taken off the queue with pop_due
+            at: When to retry
+            client: Optional pipeline to queue the write on
+        """
+        if user_ids:
+            (client or self.redis).zadd(
+                REMINDER_QUEUE_KEY, {user_id: at.timestamp() for user_id in user_ids}, nx=True
+            )
+
+    def unschedule(self, user_id: int, client=None):
+        """Remove a user from the reminder queue.
+
+        Args:
+            user_id: User ID
+            client: Optional pipeline to queue the write on
+        """
+        (client or self.redis).zrem(REMINDER_QUEUE_KEY, user_id)
+
+    def pop_due(self, now: Optional[datetime] = None, limit: int = DEFAULT_BATCH_SIZE) -> List[int]:
+        """Take the users whose reminder is due off the queue.
+
+        The caller owns the popped users: each must be scheduled again, or
+        put back with retry if processing fails.
+
+        Args:
+            now: Reference instant (defaults to now)
+            limit: Maximum number of users to take
+
+        Returns:
+            List of user IDs
+        """
+        now = now or datetime.now(pytz.utc)
+        due = self._pop_due(keys=[REMINDER_QUEUE_KEY], args=[now.timestamp(), limit])
+        return [int(user_id) for user_id in due]
+
+def schedule_reminder(user) -> None:
+    """Queue a user's next reminder after a profile or verification change.
+
+    The database change has already been committed, so a Redis outage is
+    logged instead of failing the request; ``flask schedule-reminders``
+    repairs the queue.
+    """
+    try:
+        queue = ReminderQueue(current_app.redis)
+        if user.active and user.email_verified:
+            queue.schedule(user.id, user.profile or {})
+        else:
+            queue.unschedule(user.id)
+    except (RedisError, pytz.UnknownTimeZoneError) as e:
+        current_app.logger.warning(f"Reminder scheduling failed for user {user.id}: {str(e)}")
+
+def schedule_all_reminders(batch_size: int = DEFAULT_BATCH_SIZE,
+                           progress: Optional[Callable[[int], None]] = None) -> int:
+    """Rebuild the reminder queue from every active, verified user.
+
+    Args:
+        batch_size: Number of users read and queued per round trip
+        progress: Optional callback receiving the running user count
+
+    Returns:
+        Number of users scheduled
+    """
+    queue = ReminderQueue(current_app.redis)
+    last_id = 0
+    total = 0
+
+    while True:
+        rows = db.session.query(User.id, User.profile).filter(
+            User.id > last_id,
+            User.active == True,
+            User.email_verified == True
+        ).order_by(User.id).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        pipe = queue.redis.pipeline()
+        for user_id, profile in rows:
+            try:
+                queue.schedule(user_id, profile or {}, client=pipe)
+            except pytz.UnknownTimeZoneError:
+                continue
+        pipe.execute()
+
+        last_id = rows[-1][0]
+        total += len(rows)
+        if progress:
+            progress(total)
+
+    return total
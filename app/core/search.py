@@ -0,0 +1,98 @@
+"""Core functionality for full-text search over a user's spiritual history."""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import text
+from app import db
+
+# Searchable tables and the kind code used in the SQLite FTS5 rowid
+SEARCH_KINDS = {
+    'spiritual_records': 0,
+    'prayer_requests': 1,
+    'bible_studies': 2
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+def search_user_content(user_id: int, query: str, kinds: Optional[Iterable[str]] = None,
+                        page: int = 1, per_page: int = 20) -> List[Dict]:
+    """Search a user's prayer requests, Bible studies and records.
+
+    Uses the ``search_vector`` GIN indexes on PostgreSQL and the
+    ``search_index`` FTS5 table on SQLite (see migration 0002).
+
+    Args:
+        user_id: Owner of the searched content
+        query: Free-text search query
+        kinds: Tables to search (all of SEARCH_KINDS if None)
+        page: Page number (1-based)
+        per_page: Results per page
+
+    Returns:
+        List of hits ordered by relevance, each with ``type``, ``id`` and ``rank``
+    """
+    kinds = list(kinds or SEARCH_KINDS)
+    for kind in kinds:
+        if kind not in SEARCH_KINDS:
+            raise ValueError(f"Invalid search kind: {kind}")
+
+    if not _TOKEN_RE.search(query or ''):
+        return []
+
+    limit = per_page
+    offset = (max(page, 1) - 1) * per_page
+
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        rows = _search_postgres(user_id, query, kinds, limit, offset)
+    elif dialect == 'sqlite':
+        rows = _search_sqlite(user_id, query, kinds, limit, offset)
+    else:
+        raise RuntimeError(f"Full-text search is not supported on {dialect}")
+
+    return [{'type': kind, 'id': item_id, 'rank': float(rank)} for kind, item_id, rank in rows]
+
+def _search_postgres(user_id: int, query: str, kinds: List[str],
+                     limit: int, offset: int) -> List[Tuple[str, int, float]]:
+    """Run a ranked tsvector search across the requested tables."""
+    selects = [
+        f"SELECT '{kind}' AS kind, id, ts_rank(search_vector, q) AS rank "
+        f"FROM {kind}, websearch_to_tsquery('english', :query) AS q "
+        f"WHERE user_id = :user_id AND search_vector @@ q"
+        for kind in kinds
+    ]
+    sql = text(
+        "SELECT kind, id, rank FROM (" + " UNION ALL ".join(selects) + ") AS hits "
+        "ORDER BY rank DESC, id DESC LIMIT :limit OFFSET :offset"
+    )
+    result = db.session.execute(sql, {
+        'query': query,
+        'user_id': user_id,
+        'limit': limit,
+        'offset': offset
+    })
+    return result.fetchall()
+
+def _search_sqlite(user_id: int, query: str, kinds: List[str],
+                   limit: int, offset: int) -> List[Tuple[str, int, float]]:
+    """Run a ranked FTS5 search, restricted to the user's own rows."""
+    # Quote every token so user input cannot inject FTS5 query syntax
+    terms = ' '.join(
+        '"' + token.replace('"', '""') + '"'
+        for token in _TOKEN_RE.findall(query)
+    )
+    match = f'owner:"u{int(user_id)}" AND {{title body}}: ({terms})'
+    codes = ', '.join(str(SEARCH_KINDS[kind]) for kind in kinds)
+
+    # owner is only a filter, so it gets no weight in the bm25 ranking
+    sql = text(
+        "SELECT rowid, bm25(search_index, 0.0, 2.0, 1.0) AS rank "
+        "FROM search_index WHERE search_index MATCH :match "
+        f"AND rowid % 3 IN ({codes}) "
+        "ORDER BY rank LIMIT :limit OFFSET :offset"
+    )
+    result = db.session.execute(sql, {'match': match, 'limit': limit, 'offset': offset})
+
+    names = {code: kind for kind, code in SEARCH_KINDS.items()}
+    # bm25 scores are lower-is-better; negate them to match ts_rank ordering
+    return [(names[rowid % 3], rowid // 3, -rank) for rowid, rank in result]
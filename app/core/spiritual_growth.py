@@ -1,7 +1,9 @@
 """Core functionality for spiritual growth tracking and analysis."""
 
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
+from sqlalchemy import func
+from app import db
 from app.models import User, SpiritualProgress
 
 class SpiritualGrowthManager:
@@ -36,25 +38,75 @@ class SpiritualGrowthManager:
         Returns:
             Dictionary containing stats for each spiritual category
         """
-        stats = {}
-        for category in SpiritualGrowthManager.CATEGORIES:
-            progress = SpiritualProgress.query.filter_by(
-                user_id=user.id,
-                category=category
-            ).order_by(SpiritualProgress.created_at.desc()).first()
+        return SpiritualGrowthManager.get_users_stats([user.id]).get(
+            user.id, SpiritualGrowthManager._build_stats({})
+        )
+    
+    @staticmethod
+    def get_users_stats(user_ids: Iterable[int]) -> Dict[int, Dict[str, Dict]]:
+        """Get spiritual growth statistics for many users at once.
+        
+        The latest progress entry of every (user, category) pair is
+        selected in a single window-function query.
+        
+        Args:
+            user_ids: IDs of the users to report on
             
+        Returns:
+            Dictionary mapping each user ID to its per-category stats
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        
+        ranked = db.session.query(
+            SpiritualProgress.user_id,
+            SpiritualProgress.category,
+            SpiritualProgress.progress,
+            SpiritualProgress.created_at,
+            func.row_number().over(
+                partition_by=(SpiritualProgress.user_id, SpiritualProgress.category),
+                order_by=(SpiritualProgress.created_at.desc(), SpiritualProgress.id.desc())
+            ).label('position')
+        ).filter(
+            SpiritualProgress.user_id.in_(user_ids),
+            SpiritualProgress.category.in_(list(SpiritualGrowthManager.CATEGORIES))
+        ).subquery()
+        
+        rows = db.session.query(
+            ranked.c.user_id,
+            ranked.c.category,
+            ranked.c.progress,
+            ranked.c.created_at
+        ).filter(ranked.c.position == 1)
+        
+        latest = {user_id: {} for user_id in user_ids}
+        for user_id, category, progress, created_at in rows:
+            latest[user_id][category] = (progress, created_at)
+        
+        return {
+            user_id: SpiritualGrowthManager._build_stats(entries)
+            for user_id, entries in latest.items()
+        }
+    
+    @staticmethod
+    def _build_stats(latest: Dict[str, tuple]) -> Dict[str, Dict]:
+        """Build per-category stats from the latest (progress, created_at) pairs."""
+        stats = {}
+        for category, info in SpiritualGrowthManager.CATEGORIES.items():
+            progress, created_at = latest.get(category, (0, None))
             stats[category] = {
-                'name': SpiritualGrowthManager.CATEGORIES[category]['name'],
-                'description': SpiritualGrowthManager.CATEGORIES[category]['description'],
-                'progress': progress.progress if progress else 0,
-                'last_updated': progress.created_at if progress else None
+                'name': info['name'],
+                'description': info['description'],
+                'progress': progress,
+                'last_updated': created_at
             }
         
         return stats
     
     @staticmethod
     def record_progress(user: User, category: str, progress: int, notes: Optional[str] = None) -> SpiritualProgress:
-        """Record spiritual progress for a user.
+        """Record and commit spiritual progress for a user.
         
         Args:
             user: User object
@@ -64,18 +116,67 @@ class SpiritualGrowthManager:
             
         Returns:
             Created SpiritualProgress object
+            
+        Raises:
+            ValueError: If the category or progress is invalid
         """
-        if category not in SpiritualGrowthManager.CATEGORIES:
-            raise ValueError(f"Invalid category: {category}")
+        SpiritualGrowthManager._validate_progress(category, progress)
         
-        if not 0 <= progress <= 100:
-            raise ValueError("Progress must be between 0 and 100")
+        return SpiritualGrowthManager._save(user, [
+            {'category': category, 'progress': progress, 'notes': notes}
+        ])[0]
+    
+    @staticmethod
+    def record_progress_bulk(user: User, entries: List[Dict]) -> List[SpiritualProgress]:
+        """Record and commit many progress entries for a user in one transaction.
         
-        record = SpiritualProgress(
-            user_id=user.id,
-            category=category,
-            progress=progress,
-            notes=notes
-        )
+        Every entry is validated before anything is written, so either all
+        entries are stored or none are.
+        
+        Args:
+            user: User object
+            entries: Dictionaries with ``category``, ``progress`` and optional ``notes``
+            
+        Returns:
+            List of created SpiritualProgress objects
+        """
+        for index, entry in enumerate(entries):
+            try:
+                SpiritualGrowthManager._validate_progress(
+                    entry.get('category'), entry.get('progress')
+                )
+            except ValueError as e:
+                raise ValueError(f"Entry {index}: {e}")
+        
+        return SpiritualGrowthManager._save(user, entries)
+    
+    @staticmethod
+    def _save(user: User, entries: List[Dict]) -> List[SpiritualProgress]:
+        """Add validated progress entries and commit them together."""
+        records = [
+            SpiritualProgress(
+                user_id=user.id,
+                category=entry['category'],
+                progress=entry['progress'],
+                notes=entry.get('notes')
+            )
+            for entry in entries
+        ]
+        
+        try:
+            db.session.add_all(records)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        
+        return records
+    
+    @staticmethod
+    def _validate_progress(category: str, progress: int):
+        """Validate a category and progress value."""
+        if category not in SpiritualGrowthManager.CATEGORIES:
+            raise ValueError(f"Invalid category: {category}")
         
-        return record
+        if not isinstance(progress, int) or isinstance(progress, bool) or not 0 <= progress <= 100:
+            raise ValueError("Progress must be an integer between 0 and 100")
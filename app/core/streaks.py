@@ -0,0 +1,188 @@
+"""Core functionality for incremental streak and weekly goal tracking."""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from flask import current_app
+from redis.exceptions import RedisError
+
+STREAK_KEY = 'streak:{user_id}'
+WEEK_KEY = 'goals:{user_id}:{week}'
+
+# Weekly counters are only read for the current and previous week
+WEEK_TTL = 60 * 60 * 24 * 7 * 5
+
+# Users whose counters are read per pipeline round trip
+PROGRESS_BATCH_SIZE = 1000
+
+# Advance the daily streak for an activity day (as a date ordinal).
+# Repeated or backdated days leave the streak untouched.
+_STREAK_SCRIPT = """
+local day = tonumber(ARGV[1])
+local last = tonumber(redis.call('HGET', KEYS[1], 'last_day') or '0')
+if day <= last then
+    return tonumber(redis.call('HGET', KEYS[1], 'current') or '0')
+end
+local current = 1
+if day == last + 1 then
+    current = tonumber(redis.call('HGET', KEYS[1], 'current') or '0') + 1
+end
+redis.call('HSET', KEYS[1], 'current', current, 'last_day', day)
+if current > tonumber(redis.call('HGET', KEYS[1], 'longest') or '0') then
+    redis.call('HSET', KEYS[1], 'longest', current)
+end
+return current
+"""
+
+# Weekly goal metrics mapped to their daily goal in the spiritual_goals profile
+WEEKLY_GOALS = {
+    'study_minutes': ('bible_study', 'study_time_minutes'),
+    'prayer_minutes': ('prayer', 'prayer_time_minutes'),
+    'chapters': ('bible_study', 'daily_chapters')
+}
+
+def week_key(day: date) -> str:
+    """Get the ISO week identifier of a day, e.g. "2026-W42"."""
+    year, week, _ = day.isocalendar()
+    return f'{year}-W{week:02d}'
+
+class StreakTracker:
+    """Keeps per-user streak and weekly goal counters in Redis hashes.
+
+    Every update is O(1): one script call for the streak and a few hash
+    increments for the week, so reads never scan a user's history.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._advance_streak = redis.register_script(_STREAK_SCRIPT)
+
+    def record_activity(self, user_id: int, day: date, study_minutes: float = 0,
+                        prayer_minutes: float = 0, chapters: int = 0):
+        """Fold one activity into the user's streak and weekly counters.
+
+        Args:
+            user_id: ID of the active user
+            day: Day the activity took place
+            study_minutes: Bible study minutes to add to the week
+            prayer_minutes: Prayer minutes to add to the week
+            chapters: Chapters studied to add to the week
+        """
+        key = WEEK_KEY.format(user_id=user_id, week=week_key(day))
+
+        pipe = self.redis.pipeline()
+        self._advance_streak(
+            keys=[STREAK_KEY.format(user_id=user_id)],
+            args=[day.toordinal()],
+            client=pipe
+        )
+        if study_minutes:
+            pipe.hincrbyfloat(key, 'study_minutes', study_minutes)
+        if prayer_minutes:
+            pipe.hincrbyfloat(key, 'prayer_minutes', prayer_minutes)
+        if chapters:
+            pipe.hincrby(key, 'chapters', chapters)
+        pipe.expire(key, WEEK_TTL)
+        pipe.execute()
+
+    def get_progress(self, user_id: int, goals: Optional[Dict] = None,
+                     today: Optional[date] = None) -> Dict:
+        """Get the current streak and this week's progress against goals.
+
+        Args:
+            user_id: User ID
+            goals: The user's ``spiritual_goals`` profile section
+            today: Reference day (defaults to today, UTC)
+
+        Returns:
+            Dictionary with ``streak`` and ``week`` sections
+        """
+        return self.get_progress_many({user_id: goals}, today)[user_id]
+
+    def get_progress_many(self, goals_by_user: Dict[int, Optional[Dict]],
+                          today: Optional[date] = None) -> Dict[int, Dict]:
+        """Get the streak and weekly progress of many users in batched round trips.
+
+        Args:
+            goals_by_user: Each user's ``spiritual_goals`` profile section by user ID
+            today: Reference day (defaults to today, UTC)
+
+        Returns:
+            Dictionary of user ID to progress, as returned by get_progress
+        """
+        today = today or datetime.utcnow().date()
+        week_id = week_key(today)
+        users = list(goals_by_user.items())
+
+        progress = {}
+        for offset in range(0, len(users), PROGRESS_BATCH_SIZE):
+            batch = users[offset:offset + PROGRESS_BATCH_SIZE]
+            pipe = self.redis.pipeline(transaction=False)
+            for user_id, _ in batch:
+                pipe.hgetall(STREAK_KEY.format(user_id=user_id))
+                pipe.hgetall(WEEK_KEY.format(user_id=user_id, week=week_id))
+            counters = pipe.execute()
+
+            for i, (user_id, goals) in enumerate(batch):
+                progress[user_id] = self._progress(
+                    counters[2 * i], counters[2 * i + 1], goals or {}, today
+                )
+        return progress
+
+    @staticmethod
+    def _progress(streak: Dict, week: Dict, goals: Dict, today: date) -> Dict:
+        last_day = int(streak.get(b'last_day', 0))
+        current = int(streak.get(b'current', 0))
+        # A streak survives until the end of the day after the last activity
+        if last_day < (today - timedelta(days=1)).toordinal():
+            current = 0
+
+        progress = {}
+        targeted = []
+        for metric, (section, key) in WEEKLY_GOALS.items():
+            value = float(week.get(metric.encode(), 0))
+            daily_target = (goals.get(section) or {}).get(key)
+            target = daily_target * 7 if daily_target else None
+            progress[metric] = {
+                'value': value,
+                'target': target,
+                'met': target is not None and value >= target
+            }
+            if target is not None:
+                targeted.append(progress[metric]['met'])
+
+        return {
+            'streak': {
+                'current': current,
+                'longest': int(streak.get(b'longest', 0)),
+                'last_active': date.fromordinal(last_day).isoformat() if last_day else None
+            },
+            'week': {
+                'id': week_key(today),
+                'goals': progress,
+                # Users without weekly targets have no goals to meet
+                'all_met': bool(targeted) and all(targeted)
+            }
+        }
+
+def record_activity(user_id: int, day: Optional[date], **amounts):
+    """Record an activity for the streak engine without failing the caller.
+
+    The database write has already succeeded when this runs, so a Redis
+    outage is logged instead of turned into an error response.
+    """
+    try:
+        StreakTracker(current_app.redis).record_activity(
+            user_id, day or datetime.utcnow().date(), **amounts
+        )
+    except RedisError as e:
+        current_app.logger.warning(f"Streak update failed for user {user_id}: {str(e)}")
+
+def get_goal_progress(user) -> Dict:
+    """Get the streak and weekly goal progress of a user."""
+    return get_goal_progress_many([user])[user.id]
+
+def get_goal_progress_many(users) -> Dict[int, Dict]:
+    """Get the streak and weekly goal progress of many users in batched round trips."""
+    return StreakTracker(current_app.redis).get_progress_many({
+        user.id: (user.profile or {}).get('spiritual_goals') for user in users
+    })
@@ -0,0 +1,238 @@
+"""Core functionality for the incremental prayer theme index.
+
+Each prayer request is tokenized once, in the transaction that inserts
+it, into per-user term counts and global document frequencies. Common
+themes are then a TF-IDF top-k over one user's counters instead of a
+fresh pass over every request's text.
+
+Inserts only lock their own user's term rows: document frequencies are
+appended as deltas and folded into the shared ``prayer_term_documents``
+rows by ``apply_document_deltas`` (after each write-buffer flush, from the
+``apply_prayer_themes`` task or ``flask apply-prayer-themes``). Reads add
+the deltas not applied yet.
+"""
+
+import math
+import re
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.user import PrayerRequest, PrayerTerm, PrayerTermDocuments, PrayerTermDocumentDelta
+
+DEFAULT_BATCH_SIZE = 2000
+
+# Number of themes reported per user
+TOP_THEMES = 5
+
+# Seconds the number of prayer requests (the IDF document total) is cached
+DOCUMENT_TOTAL_TTL = 300
+
+# (expiry, total) of the cached document total
+_document_total = [0.0, 0]
+
+_WORD_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+    a about after again all also am an and any are as at be because been before
+    being both but by can could did do does doing during each for from had has
+    have having he her here hers him his how i if in into is it its just let me
+    more most my no nor not now of on once only or other our ours out over own
+    please pray prayer prayers praying really she should so some such than that
+    the their theirs them then there these they this those through to too under
+    until up us very was we were what when where which while who whom why will
+    with would you your yours lord god amen help ask asking request need needs
+""".split())
+
+# Endings that are not a plural "s" (Jesus, crisis, illness) or whose
+# singular is ambiguous (Moses, houses, churches)
+_KEEP_ENDINGS = ('ss', 'us', 'is', 'ses', 'xes', 'zes', 'ches', 'shes')
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or not word.endswith('s') or word.endswith(_KEEP_ENDINGS):
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    return word[:-1]
+
+def tokenize(*texts: Optional[str]) -> Counter:
+    """Count the theme terms of prayer request text.
+
+    Terms are lowercase words of three or more letters that are not stop
+    words, with a regular plural reduced to its singular.
+    """
+    counts = Counter()
+    for text in texts:
+        for word in _WORD_RE.findall((text or '').lower()):
+            word = word.split("'")[0]
+            if len(word) < 3 or word in STOPWORDS:
+                continue
+            counts[_singular(word)[:64]] += 1
+    return counts
+
+def _insert(model):
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    elif dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise RuntimeError(f"Theme indexing is not supported on {dialect}")
+
+def index_requests(requests: Iterable[PrayerRequest]):
+    """Add prayer requests to the theme index.
+
+    Must run in the same transaction as the requests' insert. Pass all
+    requests of a transaction in one call: term rows are upserted in key
+    order, so concurrent transactions lock them in the same order and
+    cannot deadlock.
+    """
+    term_counts = Counter()
+    documents = Counter()
+    for prayer in requests:
+        terms = tokenize(prayer.title, prayer.request)
+        for term, count in terms.items():
+            term_counts[(prayer.user_id, term)] += count
+        documents.update(terms.keys())
+
+    if term_counts:
+        statement = _insert(PrayerTerm).values([
+            {'user_id': user_id, 'term': term, 'count': count}
+            for (user_id, term), count in sorted(term_counts.items())
+        ])
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[PrayerTerm.user_id, PrayerTerm.term],
+            set_={'count': PrayerTerm.count + statement.excluded.count}
+        ))
+    if documents:
+        # Appended, not upserted: no row is shared with other inserts
+        db.session.execute(PrayerTermDocumentDelta.__table__.insert(), [
+            {'term': term, 'documents': count} for term, count in documents.items()
+        ])
+
+def apply_document_deltas(batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Fold pending document frequency deltas into prayer_term_documents.
+
+    Each batch is applied in its own transaction. The deltas read are
+    locked, so concurrent runs never apply the same delta twice.
+
+    Args:
+        batch_size: Number of deltas applied per transaction
+
+    Returns:
+        Number of deltas applied
+    """
+    total = 0
+    while True:
+        rows = db.session.query(
+            PrayerTermDocumentDelta.id, PrayerTermDocumentDelta.term, PrayerTermDocumentDelta.documents
+        ).order_by(PrayerTermDocumentDelta.id).limit(batch_size).with_for_update().all()
+        if not rows:
+            db.session.commit()
+            return total
+
+        documents = Counter()
+        for _, term, count in rows:
+            documents[term] += count
+        statement = _insert(PrayerTermDocuments).values([
+            {'term': term, 'documents': count} for term, count in sorted(documents.items())
+        ])
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[PrayerTermDocuments.term],
+            set_={'documents': PrayerTermDocuments.documents + statement.excluded.documents}
+        ))
+        db.session.query(PrayerTermDocumentDelta).filter(
+            PrayerTermDocumentDelta.id.in_([row[0] for row in rows])
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        total += len(rows)
+
+def document_total() -> int:
+    """Get the number of prayer requests, cached for DOCUMENT_TOTAL_TTL seconds."""
+    expires, total = _document_total
+    now = time.monotonic()
+    if now >= expires:
+        total = db.session.query(func.count(PrayerRequest.id)).scalar() or 0
+        _document_total[:] = [now + DOCUMENT_TOTAL_TTL, total]
+    return total
+
+def top_themes(user_id: int, limit: int = TOP_THEMES) -> List[Dict]:
+    """Get a user's most distinctive prayer themes.
+
+    Terms are scored by their count in the user's requests weighted by
+    inverse document frequency across all users.
+
+    Returns:
+        List of ``{'theme', 'count', 'score'}`` ordered by score
+    """
+    rows = db.session.query(PrayerTerm.term, PrayerTerm.count).filter(
+        PrayerTerm.user_id == user_id, PrayerTerm.count > 0
+    ).all()
+    if not rows:
+        return []
+
+    terms = [term for term, _ in rows]
+    documents = Counter(dict(db.session.query(
+        PrayerTermDocuments.term, PrayerTermDocuments.documents
+    ).filter(PrayerTermDocuments.term.in_(terms))))
+    pending = db.session.query(
+        PrayerTermDocumentDelta.term, func.sum(PrayerTermDocumentDelta.documents)
+    ).filter(PrayerTermDocumentDelta.term.in_(terms)).group_by(PrayerTermDocumentDelta.term)
+    for term, count in pending:
+        documents[term] += count
+    total = max(document_total(), max(documents.values(), default=0))
+
+    scored = [
+        (count * (math.log((1 + total) / (1 + documents[term])) + 1), term, count)
+        for term, count in rows
+    ]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [
+        {'theme': term, 'count': count, 'score': round(score, 3)}
+        for score, term, count in scored[:limit]
+    ]
+
+def rebuild_theme_index(batch_size: int = DEFAULT_BATCH_SIZE,
+                        progress: Optional[Callable[[int], None]] = None) -> int:
+    """Recreate the theme index from every existing prayer request.
+
+    Requests created while the rebuild runs are indexed on insert, so
+    only those up to the highest ID at the start are read here.
+
+    Args:
+        batch_size: Number of requests read and indexed per transaction
+        progress: Optional callback receiving the running request count
+
+    Returns:
+        Number of requests indexed
+    """
+    upto_id = db.session.query(func.max(PrayerRequest.id)).scalar() or 0
+    db.session.query(PrayerTerm).delete(synchronize_session=False)
+    db.session.query(PrayerTermDocuments).delete(synchronize_session=False)
+    db.session.query(PrayerTermDocumentDelta).delete(synchronize_session=False)
+    db.session.commit()
+
+    last_id = 0
+    total = 0
+    while True:
+        rows = db.session.query(
+            PrayerRequest.id, PrayerRequest.user_id, PrayerRequest.title, PrayerRequest.request
+        ).filter(
+            PrayerRequest.id > last_id,
+            PrayerRequest.id <= upto_id
+        ).order_by(PrayerRequest.id).limit(batch_size).all()
+
+        if not rows:
+            break
+
+        index_requests(rows)
+        db.session.commit()
+        apply_document_deltas(batch_size)
+
+        last_id = rows[-1][0]
+        total += len(rows)
+        if progress:
+            progress(total)
+
+    return total
@@ -0,0 +1,159 @@
+"""Core functionality for cohort-wide weekly growth reports.
+
+Every user's weekly stats come from one grouped aggregation over the
+week's window, recommendations are derived with column-wise rules over
+the resulting frame, and reports are written with a bulk upsert.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import pandas as pd
+from sqlalchemy import case, distinct, func
+from sqlalchemy.dialects.postgresql import insert
+from app import db
+from app.models.user import User, SpiritualRecord, WeeklyReport, METRIC_COLUMNS
+from app.core.insights import collect_messages, weekly_targets
+
+REPORT_DAYS = 7
+
+# Users whose targets are read and reports written per statement
+WRITE_BATCH_SIZE = 1000
+
+def report_period(end: Optional[date] = None):
+    """Get the first and last day of the week ending on ``end`` (today)."""
+    end = end or datetime.utcnow().date()
+    return end - timedelta(days=REPORT_DAYS - 1), end
+
+def _active_days(column):
+    return func.count(distinct(case((column > 0, SpiritualRecord.date))))
+
+def load_weekly_stats(start: date, end: date,
+                      user_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+    """Aggregate every active user's records of a period in one query.
+
+    Args:
+        start: First day of the period
+        end: Last day of the period
+        user_ids: Restrict to these users (default: all active users)
+
+    Returns:
+        Frame indexed by user ID with record and day counts, metric totals,
+        and days with Bible study and prayer
+    """
+    query = db.session.query(
+        SpiritualRecord.user_id.label('user_id'),
+        func.count(SpiritualRecord.id).label('records'),
+        func.count(distinct(SpiritualRecord.date)).label('active_days'),
+        *[
+            func.coalesce(func.sum(getattr(SpiritualRecord, column)), 0).label(column)
+            for column in METRIC_COLUMNS
+        ],
+        _active_days(SpiritualRecord.bible_study_minutes).label('bible_study_days'),
+        _active_days(SpiritualRecord.prayer_minutes).label('prayer_days')
+    ).join(User, User.id == SpiritualRecord.user_id).filter(
+        User.active == True,
+        SpiritualRecord.date >= start,
+        SpiritualRecord.date <= end
+    )
+    if user_ids is not None:
+        query = query.filter(SpiritualRecord.user_id.in_(list(user_ids)))
+
+    rows = query.group_by(SpiritualRecord.user_id).all()
+    columns = ['user_id', 'records', 'active_days', *METRIC_COLUMNS, 'bible_study_days', 'prayer_days']
+    frame = pd.DataFrame(rows, columns=columns).set_index('user_id')
+    return frame.astype({column: float for column in METRIC_COLUMNS})
+
+def build_recommendations(stats: pd.DataFrame, targets: pd.DataFrame) -> Dict[int, List[str]]:
+    """Recommend next steps for every user at once.
+
+    Args:
+        stats: Weekly stats as returned by load_weekly_stats
+        targets: Weekly targets as returned by weekly_targets
+
+    Returns:
+        Dictionary of user ID to recommendations
+    """
+    frame = stats.join(targets, how='left')
+    return collect_messages(frame.index, [
+        (frame['bible_study_minutes'] == 0, 'Set aside time for daily Bible study'),
+        ((frame['bible_study_minutes'] > 0) & (frame['bible_study_minutes'] < frame['study_target']),
+         'Add a few minutes of Bible study each day to reach your weekly goal'),
+        (frame['prayer_minutes'] == 0, 'Begin and end each day with prayer'),
+        ((frame['prayer_minutes'] > 0) & (frame['prayer_minutes'] < frame['prayer_target']),
+         'Spend a little more time in prayer to reach your weekly goal'),
+        (frame['meditation_minutes'] == 0, 'Take time to meditate on a passage of Scripture'),
+        (frame['service_hours'] == 0, 'Look for an opportunity to serve someone this week'),
+        (frame['active_days'] < 4, 'Make time with God part of more days of your week')
+    ])
+
+def _stats_dict(row: Dict) -> Dict:
+    days = {'bible_study': row['bible_study_days'], 'prayer': row['prayer_days']}
+    return {
+        'records': int(row['records']),
+        'active_days': int(row['active_days']),
+        'totals': {column: round(float(row[column]), 1) for column in METRIC_COLUMNS},
+        'days': {name: int(value) for name, value in days.items()},
+        'daily_average': {
+            'bible_study_minutes': round(float(row['bible_study_minutes']) / max(days['bible_study'], 1), 1),
+            'prayer_minutes': round(float(row['prayer_minutes']) / max(days['prayer'], 1), 1)
+        }
+    }
+
+def save_weekly_reports(stats: pd.DataFrame, recommendations: Dict[int, List[str]],
+                        start: date, end: date) -> int:
+    """Bulk upsert the reports of a period; the caller commits.
+
+    Returns:
+        Number of reports written
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': int(user_id),
+            'period_start': start,
+            'period_end': end,
+            'stats': _stats_dict(row),
+            'recommendations': recommendations.get(int(user_id), []),
+            'generated_at': now
+        }
+        for user_id, row in zip(stats.index, stats.to_dict('records'))
+    ]
+
+    for offset in range(0, len(rows), WRITE_BATCH_SIZE):
+        statement = insert(WeeklyReport).values(rows[offset:offset + WRITE_BATCH_SIZE])
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[WeeklyReport.user_id, WeeklyReport.period_start],
+            set_={
+                column: statement.excluded[column]
+                for column in ('period_end', 'stats', 'recommendations', 'generated_at')
+            }
+        ))
+    return len(rows)
+
+def generate_weekly_reports(end: Optional[date] = None,
+                            user_ids: Optional[Iterable[int]] = None) -> int:
+    """Generate and store the weekly reports of all (or some) active users.
+
+    Users without records in the period get no report.
+
+    Args:
+        end: Last day of the period (default: today)
+        user_ids: Restrict to these users
+
+    Returns:
+        Number of reports written
+    """
+    start, end = report_period(end)
+    stats = load_weekly_stats(start, end, user_ids)
+    if stats.empty:
+        return 0
+
+    targets = []
+    ids = stats.index.tolist()
+    for offset in range(0, len(ids), WRITE_BATCH_SIZE):
+        targets.append(weekly_targets(db.session.query(User.id, User.profile).filter(
+            User.id.in_(ids[offset:offset + WRITE_BATCH_SIZE])
+        ).all()))
+
+    recommendations = build_recommendations(stats, pd.concat(targets))
+    return save_weekly_reports(stats, recommendations, start, end)
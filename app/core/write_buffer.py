@@ -0,0 +1,373 @@
+"""Core functionality for record inserts and the optional group-commit buffer.
+
+With ``WRITE_BUFFER_ENABLED`` set, record writes are acknowledged once
+they are appended to a Redis stream (durable with AOF persistence) and a
+``flask flush-writes`` process inserts them in batched transactions every
+few milliseconds. Delivery is at-least-once: a flusher that dies between
+commit and acknowledgement can cause a batch to be inserted twice.
+
+Writes that fail on a transient database error (lost connection,
+deadlock, serialization failure) stay pending and are reclaimed for
+another attempt. Writes rejected for their data go to a dead-letter
+stream, which ``flask replay-dead-writes`` moves back for another try.
+"""
+
+import json
+import socket
+import time
+from datetime import datetime
+from functools import wraps
+from typing import Dict, List, Optional
+from flask import current_app
+from flask_jwt_extended import get_jwt_identity
+from redis.exceptions import ResponseError
+from sqlalchemy.exc import DBAPIError, DisconnectionError, OperationalError
+from app import db
+from app.models.user import SpiritualRecord, PrayerRequest, BibleStudy, BibleCoverage
+from app.core.streaks import record_activity
+from app.core.themes import apply_document_deltas, index_requests
+
+PENDING_KEY = 'writes:pending:{user_id}'
+
+ENTRY_KINDS = ('spiritual_record', 'prayer_request', 'bible_study')
+
+# SQLSTATEs of failures that succeed when retried: serialization failure, deadlock
+TRANSIENT_SQLSTATES = ('40001', '40P01')
+
+def is_transient_error(error: Exception) -> bool:
+    """Check whether a failed write may succeed if retried unchanged."""
+    if isinstance(error, (OperationalError, DisconnectionError)):
+        return True
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated or getattr(error.orig, 'pgcode', None) in TRANSIENT_SQLSTATES
+    return False
+
+def build_entry(kind: str, user_id: int, data: Dict,
+                queued_at: Optional[datetime] = None):
+    """Build the model object for a record write.
+
+    Args:
+        kind: One of ENTRY_KINDS
+        user_id: Owner of the entry
+        data: Validated request payload
+        queued_at: When a buffered write was accepted; used as its timestamp
+
+    Returns:
+        Unsaved SpiritualRecord, PrayerRequest or BibleStudy
+    """
+    timestamps = {}
+    if queued_at:
+        timestamps['created_at'] = queued_at
+
+    if kind == 'spiritual_record':
+        if queued_at:
+            timestamps['date'] = queued_at.date()
+        return SpiritualRecord(
+            user_id=user_id,
+            category=data['category'],
+            metrics=data['metrics'],
+            notes=data.get('notes', ''),
+            **timestamps
+        )
+    if kind == 'prayer_request':
+        return PrayerRequest(
+            user_id=user_id,
+            title=data['title'],
+            request=data['request'],
+            is_private=data.get('is_private', True),
+            **timestamps
+        )
+    if kind == 'bible_study':
+        if queued_at:
+            timestamps['date'] = queued_at.date()
+        return BibleStudy(
+            user_id=user_id,
+            book=data['book'],
+            chapter=data['chapter'],
+            verses=data.get('verses'),
+            notes=data.get('notes'),
+            duration_minutes=data['duration_minutes'],
+            **timestamps
+        )
+    raise ValueError(f"Invalid entry kind: {kind}")
+
+def after_insert(entries: List[tuple]):
+    """Apply derived updates that must share the entries' transaction.
+
+    Shared rows are locked in key order across all the entries, so
+    concurrent batches cannot deadlock on them.
+
+    Args:
+        entries: (kind, entry) pairs inserted in the transaction
+    """
+    studies = [entry for kind, entry in entries if kind == 'bible_study']
+    for study in sorted(studies, key=lambda study: study.user_id):
+        BibleCoverage.record_study(study)
+    index_requests([entry for kind, entry in entries if kind == 'prayer_request'])
+
+def activity_for(kind: str, entry) -> Dict:
+    """Get the streak engine arguments of a flushed entry."""
+    if kind == 'spiritual_record':
+        return {
+            'user_id': entry.user_id,
+            'day': entry.date,
+            'study_minutes': entry.bible_study_minutes or 0,
+            'prayer_minutes': entry.prayer_minutes or 0
+        }
+    if kind == 'prayer_request':
+        return {'user_id': entry.user_id, 'day': entry.created_at.date()}
+    return {
+        'user_id': entry.user_id,
+        'day': entry.date,
+        'study_minutes': entry.duration_minutes or 0,
+        'chapters': 1
+    }
+
+def create_entry(kind: str, user_id: int, data: Dict):
+    """Insert a record write in its own transaction.
+
+    Args:
+        kind: One of ENTRY_KINDS
+        user_id: Owner of the entry
+        data: Validated request payload
+
+    Returns:
+        The committed model object
+    """
+    entry = build_entry(kind, user_id, data)
+    db.session.add(entry)
+    after_insert([(kind, entry)])
+    db.session.flush()
+    activity = activity_for(kind, entry)
+    db.session.commit()
+    record_activity(**activity)
+    return entry
+
+def write_buffer_enabled() -> bool:
+    """Check whether record writes go through the group-commit buffer."""
+    return bool(current_app.config.get('WRITE_BUFFER_ENABLED'))
+
+class WriteBuffer:
+    """Redis stream of pending record writes, flushed in batches."""
+
+    def __init__(self, redis, stream: str, group: str, consumer: Optional[str] = None):
+        self.redis = redis
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or f'{socket.gethostname()}-{id(self)}'
+        self.dead_letter_stream = f'{stream}:dead'
+
+    @classmethod
+    def from_app(cls, consumer: Optional[str] = None) -> 'WriteBuffer':
+        """Create a buffer from the current application's configuration."""
+        return cls(
+            current_app.redis,
+            current_app.config['WRITE_BUFFER_STREAM'],
+            current_app.config['WRITE_BUFFER_GROUP'],
+            consumer
+        )
+
+    def enqueue(self, kind: str, user_id: int, data: Dict) -> str:
+        """Durably queue a write and return its stream ID.
+
+        Args:
+            kind: One of ENTRY_KINDS
+            user_id: Owner of the entry
+            data: Validated request payload
+
+        Returns:
+            Stream ID of the queued write
+        """
+        if kind not in ENTRY_KINDS:
+            raise ValueError(f"Invalid entry kind: {kind}")
+
+        pipe = self.redis.pipeline()
+        pipe.incr(PENDING_KEY.format(user_id=user_id))
+        pipe.xadd(self.stream, {
+            'kind': kind,
+            'user_id': user_id,
+            'data': json.dumps(data),
+            'queued_at': datetime.utcnow().isoformat()
+        })
+        _, write_id = pipe.execute()
+        return write_id.decode() if isinstance(write_id, bytes) else write_id
+
+    def pending_count(self, user_id: int) -> int:
+        """Number of queued writes of a user that are not yet committed."""
+        return int(self.redis.get(PENDING_KEY.format(user_id=user_id)) or 0)
+
+    def wait_for_user(self, user_id: int, timeout_ms: int) -> bool:
+        """Block until a user's queued writes are committed.
+
+        Returns:
+            True if nothing is pending, False if the timeout expired first
+        """
+        deadline = time.monotonic() + timeout_ms / 1000.0
+        while self.pending_count(user_id) > 0:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def ensure_group(self):
+        """Create the consumer group (and stream) if missing."""
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def flush(self, batch_size: int, block_ms: int, claim_idle_ms: int = 30000) -> int:
+        """Insert one batch of queued writes in a single transaction.
+
+        Entries left unacknowledged, by a crashed flusher or after a
+        transient database error, are reclaimed once they have been idle
+        for ``claim_idle_ms``.
+
+        Args:
+            batch_size: Maximum number of writes per transaction
+            block_ms: How long to wait for new writes when the stream is empty
+            claim_idle_ms: Idle time after which pending writes are reclaimed
+
+        Returns:
+            Number of writes flushed (committed or dead-lettered)
+        """
+        _, messages, *_ = self.redis.xautoclaim(
+            self.stream, self.group, self.consumer,
+            min_idle_time=claim_idle_ms, count=batch_size
+        )
+        if not messages:
+            response = self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream: '>'},
+                count=batch_size, block=block_ms
+            )
+            messages = response[0][1] if response else []
+        if not messages:
+            return 0
+
+        writes = [self._decode(message_id, fields) for message_id, fields in messages]
+
+        try:
+            committed = self._insert(writes)
+            failed, retry = [], []
+        except Exception as e:
+            db.session.rollback()
+            if is_transient_error(e):
+                current_app.logger.warning(
+                    f"Write buffer batch failed, leaving {len(writes)} writes for a retry: {str(e)}"
+                )
+                return 0
+            current_app.logger.error(f"Write buffer batch failed, retrying one by one: {str(e)}")
+            committed, failed, retry = self._insert_individually(writes)
+
+        retry_ids = {write['id'] for write in retry}
+        done = [write for write in writes if write['id'] not in retry_ids]
+        if done:
+            pipe = self.redis.pipeline()
+            for write in failed:
+                pipe.xadd(self.dead_letter_stream, write['fields'])
+            pipe.xack(self.stream, self.group, *[write['id'] for write in done])
+            for write in done:
+                pipe.decr(PENDING_KEY.format(user_id=write['user_id']))
+            pipe.execute()
+
+        for activity in committed:
+            record_activity(**activity)
+        if committed:
+            try:
+                apply_document_deltas()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Applying prayer theme counts failed: {str(e)}")
+
+        return len(done)
+
+    def replay_dead_letters(self, batch_size: int = 100) -> int:
+        """Move dead-lettered writes back onto the stream for another attempt.
+
+        Writes dead-lettered again while replaying are left for a later run.
+
+        Args:
+            batch_size: Number of writes moved per round trip
+
+        Returns:
+            Number of writes replayed
+        """
+        newest = self.redis.xrevrange(self.dead_letter_stream, count=1)
+        if not newest:
+            return 0
+        last_id = newest[0][0]
+
+        total = 0
+        while True:
+            messages = self.redis.xrange(self.dead_letter_stream, max=last_id, count=batch_size)
+            if not messages:
+                return total
+
+            # MULTI/EXEC, so a write is never both replayed and kept
+            pipe = self.redis.pipeline()
+            for message_id, fields in messages:
+                write = self._decode(message_id, fields)
+                pipe.incr(PENDING_KEY.format(user_id=write['user_id']))
+                pipe.xadd(self.stream, write['fields'])
+            pipe.xdel(self.dead_letter_stream, *[message_id for message_id, _ in messages])
+            pipe.execute()
+            total += len(messages)
+
+    def _decode(self, message_id, fields) -> Dict:
+        fields = {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in fields.items()
+        }
+        return {
+            'id': message_id,
+            'fields': fields,
+            'kind': fields['kind'],
+            'user_id': int(fields['user_id']),
+            'data': json.loads(fields['data']),
+            'queued_at': datetime.fromisoformat(fields['queued_at'])
+        }
+
+    def _insert(self, writes: List[Dict]) -> List[Dict]:
+        entries = []
+        for write in writes:
+            entry = build_entry(write['kind'], write['user_id'], write['data'], write['queued_at'])
+            db.session.add(entry)
+            entries.append((write['kind'], entry))
+        after_insert(entries)
+        db.session.flush()
+        # Captured before commit so the objects are not reloaded one by one
+        activities = [activity_for(kind, entry) for kind, entry in entries]
+        db.session.commit()
+        return activities
+
+    def _insert_individually(self, writes: List[Dict]):
+        committed = []
+        failed = []
+        retry = []
+        for write in writes:
+            try:
+                committed.extend(self._insert([write]))
+            except Exception as e:
+                db.session.rollback()
+                if is_transient_error(e):
+                    current_app.logger.warning(f"Leaving buffered write {write['id']} for a retry: {str(e)}")
+                    retry.append(write)
+                else:
+                    current_app.logger.error(f"Dropping buffered write {write['id']} to dead letters: {str(e)}")
+                    failed.append(write)
+        return committed, failed, retry
+
+def read_your_writes(f):
+    """Decorator that makes a read wait for the user's buffered writes."""
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        if write_buffer_enabled():
+            user_id = get_jwt_identity()
+            timeout_ms = current_app.config['WRITE_BUFFER_READ_WAIT_MS']
+            if not WriteBuffer.from_app().wait_for_user(user_id, timeout_ms):
+                current_app.logger.warning(
+                    f"Reading with uncommitted buffered writes for user {user_id}"
+                )
+        return f(*args, **kwargs)
+    return wrapped
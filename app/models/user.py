@@ -5,6 +5,11 @@ import jwt
 from time import time
 import json
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.mutable import MutableDict
+from sqlalchemy.orm import validates
+from app.core.bible import VerseCoverage, normalize_book
 
 class User(db.Model):
     """User model with SDA-focused profile"""
@@ -88,9 +93,11 @@ class User(db.Model):
     
     def update_profile(self, updates):
         """Update user profile"""
-        if isinstance(self.profile, str):
-            self.profile = json.loads(self.profile)
-        self.profile.update(updates)
+        profile = self.profile
+        if isinstance(profile, str):
+            profile = json.loads(profile)
+        # Assign a new dict: JSONB does not track in-place changes
+        self.profile = dict(profile or {}, **updates)
         db.session.add(self)
     
     def get_reset_password_token(self, expires_in=600):
@@ -130,21 +137,78 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
 
+# Numeric metrics promoted from the metrics JSONB to their own columns,
+# mapped to their (section, key) location in the document
+METRIC_COLUMNS = {
+    'bible_study_minutes': ('bible_study', 'duration'),
+    'prayer_minutes': ('prayer', 'duration'),
+    'service_hours': ('service', 'hours'),
+    'meditation_minutes': ('meditation', 'duration')
+}
+
+def extract_metric_columns(metrics):
+    """Extract the numeric metric columns from a metrics document"""
+    values = {}
+    for column, (section, key) in METRIC_COLUMNS.items():
+        value = ((metrics or {}).get(section) or {}).get(key)
+        try:
+            values[column] = float(value) if value is not None else None
+        except (TypeError, ValueError):
+            values[column] = None
+    return values
+
+# On PostgreSQL the history tables are range partitioned by month on
+# these columns (see app.core.partitions); the primary key there is
+# (id, <column>), ids stay unique through the shared sequence.
+PARTITION_KEYS = {
+    'spiritual_records': 'date',
+    'prayer_requests': 'created_at',
+    'bible_studies': 'date'
+}
+
 class SpiritualRecord(db.Model):
     """Model for tracking spiritual growth records"""
     __tablename__ = 'spiritual_records'
+    __table_args__ = (
+        db.Index('ix_spiritual_records_user_date', 'user_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     date = db.Column(db.Date, default=datetime.utcnow().date)
     category = db.Column(db.String(64))  # bible_study, prayer, service, health
-    metrics = db.Column(JSONB)
+    metrics = db.Column(MutableDict.as_mutable(JSONB))
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Written from metrics so analytics can aggregate in SQL: on assignment,
+    # and again on flush to pick up in-place edits of top-level keys. Edits
+    # nested inside a section (metrics['prayer']['duration'] = ...) are not
+    # tracked; reassign the section or call flag_modified(record, 'metrics')
+    bible_study_minutes = db.Column(db.Float)
+    prayer_minutes = db.Column(db.Float)
+    service_hours = db.Column(db.Float)
+    meditation_minutes = db.Column(db.Float)
+    
+    @validates('metrics')
+    def validate_metrics(self, key, metrics):
+        for column, value in extract_metric_columns(metrics).items():
+            setattr(self, column, value)
+        return metrics
+
+@event.listens_for(SpiritualRecord, 'before_insert')
+@event.listens_for(SpiritualRecord, 'before_update')
+def sync_metric_columns(mapper, connection, record):
+    """Rewrite the metric columns from the metrics document being flushed"""
+    for column, value in extract_metric_columns(record.metrics).items():
+        setattr(record, column, value)
 
 class PrayerRequest(db.Model):
     """Model for prayer requests"""
     __tablename__ = 'prayer_requests'
+    __table_args__ = (
+        db.Index('ix_prayer_requests_user_created_at', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -159,13 +223,162 @@ class PrayerRequest(db.Model):
 class BibleStudy(db.Model):
     """Model for Bible study tracking"""
     __tablename__ = 'bible_studies'
+    __table_args__ = (
+        db.Index('ix_bible_studies_user_date', 'user_id', 'date'),
+        db.Index('ix_bible_studies_user_book_chapter', 'user_id', 'book_id', 'chapter'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     date = db.Column(db.Date, default=datetime.utcnow().date)
     book = db.Column(db.String(64))
+    book_id = db.Column(db.SmallInteger)  # canonical book (1-66), see app.core.bible
     chapter = db.Column(db.Integer)
     verses = db.Column(db.String(64))  # e.g., "1-5,7,9-12"
     notes = db.Column(db.Text)
     duration_minutes = db.Column(db.Integer)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @validates('book')
+    def validate_book(self, key, book):
+        self.book_id = normalize_book(book)
+        return book
+
+class BibleCoverage(db.Model):
+    """Per-user bitmap of every verse covered by the user's Bible studies"""
+    __tablename__ = 'bible_coverage'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    bitmap = db.Column(db.LargeBinary)
+    verses_read = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @property
+    def coverage(self):
+        return VerseCoverage.from_bytes(self.bitmap)
+    
+    @staticmethod
+    def record_study(study):
+        """Add a Bible study to its user's coverage bitmap.
+        
+        Must run in the same transaction as the study insert. Studies of
+        books outside the canon are ignored.
+        """
+        book_id = study.book_id or normalize_book(study.book)
+        if not book_id:
+            return 0
+        
+        # Create the row first so FOR UPDATE has something to lock when
+        # two first studies of a user are recorded concurrently
+        insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+        db.session.execute(insert(BibleCoverage).values(
+            user_id=study.user_id
+        ).on_conflict_do_nothing(index_elements=['user_id']))
+        
+        entry = BibleCoverage.query.filter_by(
+            user_id=study.user_id
+        ).with_for_update().populate_existing().one()
+        
+        coverage = entry.coverage
+        added = coverage.mark(book_id, study.chapter, study.verses)
+        if added or entry.bitmap is None:
+            entry.bitmap = coverage.to_bytes()
+            entry.verses_read = coverage.count()
+        return added
+
+class HistoryArchive(db.Model):
+    """Compressed history rows moved out of the partitioned tables"""
+    __tablename__ = 'history_archive'
+    __table_args__ = (
+        db.Index('ix_history_archive_kind_user_month', 'kind', 'user_id', 'month'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32))  # table the rows came from
+    user_id = db.Column(db.Integer)
+    month = db.Column(db.Date)  # first day of the archived month
+    row_count = db.Column(db.Integer)
+    payload = db.Column(db.LargeBinary)  # zlib-compressed NDJSON rows
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class GrowthState(db.Model):
+    """Running growth analysis state, folded forward from new records"""
+    __tablename__ = 'growth_state'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    watermark_id = db.Column(db.Integer)  # last spiritual record folded in
+    last_date = db.Column(db.Date)
+    record_count = db.Column(db.Integer)
+    model_version = db.Column(db.String(14))  # growth model the state was built with ('' for none)
+    state = db.Column(db.LargeBinary)  # see app.core.growth.GrowthAccumulator
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class GrowthModelArtifact(db.Model):
+    """Versioned cohort-wide growth model, shared by every process"""
+    __tablename__ = 'growth_models'
+    
+    version = db.Column(db.String(14), primary_key=True)  # UTC timestamp, sortable
+    artifact = db.Column(db.LargeBinary, nullable=False)  # see app.core.growth_model.GrowthModel
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class GrowthAnalytics(db.Model):
+    """Compact growth analysis results, kept out of the user profile"""
+    __tablename__ = 'growth_analytics'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    weeks = db.Column(db.LargeBinary)  # int32 days since epoch of each chart week's Monday
+    points = db.Column(db.LargeBinary)  # float32 (weeks, metrics, [weekly, monthly]) rolling means
+    trends = db.Column(JSONB)  # metric -> direction and latest rolling means
+    patterns = db.Column(JSONB)
+    insights = db.Column(JSONB)
+    record_count = db.Column(db.Integer)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PrayerTerm(db.Model):
+    """Per-user term frequencies of prayer request text"""
+    __tablename__ = 'prayer_terms'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    term = db.Column(db.String(64), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class PrayerTermDocuments(db.Model):
+    """Number of prayer requests, across all users, containing each term"""
+    __tablename__ = 'prayer_term_documents'
+    
+    term = db.Column(db.String(64), primary_key=True)
+    documents = db.Column(db.Integer, nullable=False, default=0)
+
+class PrayerTermDocumentDelta(db.Model):
+    """Document frequency changes not yet applied to prayer_term_documents"""
+    __tablename__ = 'prayer_term_document_deltas'
+    __table_args__ = (
+        db.Index('ix_prayer_term_document_deltas_term', 'term'),
+    )
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    term = db.Column(db.String(64), nullable=False)
+    documents = db.Column(db.Integer, nullable=False)
+
+class WeeklyReport(db.Model):
+    """Weekly spiritual growth report of a user"""
+    __tablename__ = 'weekly_reports'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    period_start = db.Column(db.Date, primary_key=True)
+    period_end = db.Column(db.Date)
+    stats = db.Column(JSONB)
+    recommendations = db.Column(JSONB)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert report to dictionary"""
+        return {
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None,
+            'period': {
+                'start': self.period_start.isoformat(),
+                'end': self.period_end.isoformat()
+            },
+            'stats': self.stats,
+            'recommendations': self.recommendations
+        }
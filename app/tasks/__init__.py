@@ -1,14 +1,72 @@
+import os
+from fnmatch import fnmatchcase
 from celery import Celery
 from flask import current_app
 
+REALTIME_QUEUE = 'realtime'
+BATCH_QUEUE = 'batch'
+
+# Task name patterns to queue and priority (0 is consumed first)
+TASK_ROUTES = {
+    'app.tasks.notifications.send_preparation_reminder': {'queue': REALTIME_QUEUE, 'priority': 0},
+    'app.tasks.notifications.send_sabbath_reminders*': {'queue': REALTIME_QUEUE, 'priority': 0},
+    'app.tasks.notifications.dispatch_outbox': {'queue': REALTIME_QUEUE, 'priority': 3},
+    'app.tasks.notifications.send_spiritual_insights': {'queue': BATCH_QUEUE, 'priority': 6},
+    'app.tasks.spiritual.*': {'queue': BATCH_QUEUE, 'priority': 6}
+}
+
+def task_queue(name):
+    """Get the queue a task is routed to"""
+    for pattern, route in TASK_ROUTES.items():
+        if fnmatchcase(name, pattern):
+            return route['queue']
+    return REALTIME_QUEUE
+
+class BatchAnnotations:
+    """Drop the results of batch tasks; nothing waits on them"""
+
+    def annotate(self, task):
+        if task_queue(task.name) == BATCH_QUEUE:
+            return {'ignore_result': True}
+        return None
+
 def make_celery(app):
-    """Create Celery application"""
+    """Create Celery application
+
+    Workers started with CELERY_WORKER_QUEUE set take that queue's
+    concurrency and prefetch settings from CELERY_QUEUE_SETTINGS. With
+    TASK_TELEMETRY_ENABLED, workers record each task's resource usage.
+    """
     celery = Celery(
         app.import_name,
         backend=app.config['CELERY_RESULT_BACKEND'],
         broker=app.config['CELERY_BROKER_URL']
     )
     celery.conf.update(app.config)
+    celery.conf.update(
+        task_routes=TASK_ROUTES,
+        task_default_queue=REALTIME_QUEUE,
+        task_annotations=[BatchAnnotations()],
+        broker_transport_options={
+            'queue_order_strategy': 'priority',
+            'priority_steps': [0, 3, 6, 9]
+        },
+        result_compression='zlib',
+        result_expires=app.config['CELERY_RESULT_EXPIRES']
+    )
+
+    worker_queue = os.getenv('CELERY_WORKER_QUEUE')
+    settings = app.config['CELERY_QUEUE_SETTINGS'].get(worker_queue)
+    if settings:
+        celery.conf.update(
+            worker_concurrency=settings['concurrency'],
+            worker_prefetch_multiplier=settings['prefetch_multiplier'],
+            task_acks_late=settings.get('acks_late', False)
+        )
+
+    if app.config['TASK_TELEMETRY_ENABLED']:
+        from app.utils.telemetry import init_task_telemetry
+        init_task_telemetry(app)
 
     class ContextTask(celery.Task):
         def __call__(self, *args, **kwargs):
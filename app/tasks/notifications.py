@@ -1,47 +1,107 @@
+from celery import group
+from flask import current_app
 from app import celery, db
 from app.models.user import User
-from app.utils.email import send_email
 from datetime import datetime, timedelta
 import pytz
 from app.utils.monitoring import track_resource_usage
+from app.core.streaks import get_goal_progress_many
+from app.core.reminders import RETRY_DELAY, ReminderQueue, get_reminder_window
+from app.core.mailer import BulkMailer, Outbox, render_email
+from app.core.email_templates import checklist_fragment, weekly_scripture_fragment
+from app.core.insights import load_weekly_activity, weekly_targets, build_weekly_insights
+from sqlalchemy.orm import load_only
+
+# Users evaluated per reminder task
+REMINDER_CHUNK_SIZE = 500
+
+# Insight emails queued per outbox pipeline round trip
+INSIGHTS_PIPELINE_SIZE = 500
+
+OUTBOX_RETRY_TIMER_KEY = 'mail:retry_timer'
 
 @celery.task
 @track_resource_usage('send_sabbath_reminders')
 def send_sabbath_reminders():
-    """Send Sabbath preparation reminders to users"""
+    """Fan out the due Sabbath reminders over chunked tasks"""
+    chunks = []
     try:
-        # Get all active users
-        users = User.query.filter_by(active=True, email_verified=True).all()
+        queue = ReminderQueue(current_app.redis)
+        now = datetime.now(pytz.utc)
+        
+        # Only users whose reminder time has passed are taken off the queue
+        while True:
+            user_ids = queue.pop_due(now, REMINDER_CHUNK_SIZE)
+            if not user_ids:
+                break
+            chunks.append(user_ids)
+        
+        if chunks:
+            group(send_sabbath_reminders_chunk.s(ids) for ids in chunks).apply_async()
         
+        return {'status': 'success', 'chunks': len(chunks)}
+    except Exception as e:
+        celery.logger.error(f"Error sending Sabbath reminders: {str(e)}")
+        requeue_reminders([user_id for ids in chunks for user_id in ids])
+        return {'status': 'error', 'message': str(e)}
+
+@celery.task
+@track_resource_usage('send_sabbath_reminders_chunk')
+def send_sabbath_reminders_chunk(user_ids):
+    """Send reminders to one chunk of due users and queue their next one"""
+    try:
+        queue = ReminderQueue(current_app.redis)
+        outbox = Outbox(current_app.redis)
+        now = datetime.now(pytz.utc)
+        users = User.query.options(
+            load_only(User.id, User.username, User.email, User.profile)
+        ).filter(
+            User.id.in_(user_ids),
+            User.active == True,
+            User.email_verified == True
+        )
+        
+        messages = []
+        pipe = queue.redis.pipeline()
         for user in users:
             try:
-                # Get user's timezone
-                timezone = pytz.timezone(user.profile.get('timezone', 'UTC'))
-                now = datetime.now(timezone)
-                
-                # Get user's preparation preferences
-                prefs = user.profile.get('sabbath_preferences', {})
-                prep_start_hour = prefs.get('preparation_start_hour', 14)  # Default 2 PM
-                notif_hours = prefs.get('notification_hours_before', 24)
-                
-                # Calculate next Sabbath
-                friday = get_next_friday(now)
-                prep_time = friday.replace(hour=prep_start_hour, minute=0)
-                
-                # Check if it's time to send reminder
-                reminder_time = prep_time - timedelta(hours=notif_hours)
-                if now >= reminder_time and now < prep_time:
-                    send_preparation_reminder.delay(user.id)
-            
+                profile = user.profile or {}
+                reminder_time, prep_time = get_reminder_window(profile, now)
+                if reminder_time <= now < prep_time:
+                    messages.append(render_preparation_reminder(user))
+                    # Next week's reminder
+                    queue.schedule(user.id, profile, prep_time, client=pipe)
+                else:
+                    # Preferences changed since the entry was queued
+                    queue.schedule(user.id, profile, now, client=pipe)
+            except pytz.UnknownTimeZoneError as e:
+                # Retrying cannot help; saving valid preferences schedules the user again
+                celery.logger.warning(f"Dropping reminders for user {user.id}: unknown timezone {str(e)}")
+                queue.unschedule(user.id, client=pipe)
+                continue
             except Exception as e:
                 celery.logger.error(f"Error processing user {user.id}: {str(e)}")
+                queue.retry([user.id], now + RETRY_DELAY, client=pipe)
                 continue
+        outbox.push(*messages, client=pipe)
+        pipe.execute()
         
-        return {'status': 'success'}
+        if messages:
+            dispatch_outbox.delay()
+        
+        return {'status': 'success', 'sent': len(messages)}
     except Exception as e:
-        celery.logger.error(f"Error sending Sabbath reminders: {str(e)}")
+        celery.logger.error(f"Error sending Sabbath reminder chunk: {str(e)}")
+        requeue_reminders(user_ids)
         return {'status': 'error', 'message': str(e)}
 
+def requeue_reminders(user_ids):
+    """Put users taken off the reminder queue back for a later retry"""
+    try:
+        ReminderQueue(current_app.redis).retry(user_ids, datetime.now(pytz.utc) + RETRY_DELAY)
+    except Exception as e:
+        celery.logger.error(f"Error requeueing {len(user_ids)} reminders: {str(e)}")
+
 @celery.task
 def send_preparation_reminder(user_id):
     """Send personalized Sabbath preparation reminder"""
@@ -50,19 +110,8 @@ def send_preparation_reminder(user_id):
         if not user:
             return {'status': 'error', 'message': 'User not found'}
         
-        # Get user's preparation checklist
-        checklist = generate_preparation_checklist(user)
-        
-        # Send email
-        subject = "🕊️ Time to Prepare for Sabbath"
-        template = 'email/sabbath_reminder.html'
-        send_email(
-            subject=subject,
-            recipients=[user.email],
-            template=template,
-            user=user,
-            checklist=checklist
-        )
+        Outbox(current_app.redis).push(render_preparation_reminder(user))
+        dispatch_outbox.delay()
         
         return {'status': 'success'}
     except Exception as e:
@@ -70,48 +119,87 @@ def send_preparation_reminder(user_id):
         return {'status': 'error', 'message': str(e)}
 
 @celery.task
+@track_resource_usage('send_spiritual_insights')
 def send_spiritual_insights():
     """Send weekly spiritual insights to users"""
     try:
-        users = User.query.filter_by(active=True, email_verified=True).all()
+        # One scan for the week of every active user, analyzed as a whole
+        frame = load_weekly_activity((datetime.utcnow() - timedelta(days=7)).date())
+        if frame.empty:
+            return {'status': 'success', 'queued': 0}
+        
+        user_ids = frame['user_id'].unique().tolist()
+        users = User.query.options(
+            load_only(User.id, User.username, User.email, User.profile)
+        ).filter(User.id.in_(user_ids)).all()
+        weekly_insights = build_weekly_insights(frame, weekly_targets(users))
+        goals = get_goal_progress_many(users)
+        
+        outbox = Outbox(current_app.redis)
+        pipe = current_app.redis.pipeline()
+        queued = 0
         
         for user in users:
             try:
-                # Check if user has recent activity
-                recent_records = SpiritualRecord.query.filter(
-                    SpiritualRecord.user_id == user.id,
-                    SpiritualRecord.date >= datetime.utcnow() - timedelta(days=7)
-                ).all()
-                
-                if recent_records:
-                    # Generate insights
-                    insights = generate_spiritual_insights(user, recent_records)
-                    
-                    # Send email
-                    subject = "📈 Your Weekly Spiritual Journey Update"
-                    template = 'email/spiritual_insights.html'
-                    send_email(
-                        subject=subject,
-                        recipients=[user.email],
-                        template=template,
-                        user=user,
-                        insights=insights
-                    )
+                insights = dict(weekly_insights[user.id], goals=goals[user.id])
+                outbox.push(render_email(
+                    subject="📈 Your Weekly Spiritual Journey Update",
+                    recipients=[user.email],
+                    template='email/spiritual_insights.html',
+                    user=user,
+                    insights=insights,
+                    scripture_html=weekly_scripture_fragment()
+                ), client=pipe)
+                queued += 1
             except Exception as e:
                 celery.logger.error(f"Error processing insights for user {user.id}: {str(e)}")
                 continue
+            
+            if queued % INSIGHTS_PIPELINE_SIZE == 0:
+                pipe.execute()
+        pipe.execute()
         
-        return {'status': 'success'}
+        if queued:
+            dispatch_outbox.delay()
+        
+        return {'status': 'success', 'queued': queued}
     except Exception as e:
         celery.logger.error(f"Error sending spiritual insights: {str(e)}")
         return {'status': 'error', 'message': str(e)}
 
-def get_next_friday(now):
-    """Get next Friday date"""
-    days_ahead = 4 - now.weekday()  # Friday is 4
-    if days_ahead <= 0:
-        days_ahead += 7
-    return now + timedelta(days=days_ahead)
+@celery.task
+@track_resource_usage('dispatch_outbox')
+def dispatch_outbox():
+    """Send queued emails over this worker's SMTP session, under the global send rate"""
+    try:
+        stats = BulkMailer.from_app().drain(current_app.config['MAIL_DRAIN_LIMIT'])
+        if stats['skipped']:
+            # The maximum number of drains are running and will see these messages
+            return {'status': 'skipped'}
+        
+        if stats['remaining']:
+            dispatch_outbox.delay()
+        elif stats['next_retry_in'] is not None:
+            # One delayed drain per backoff period, however many workers saw retries
+            countdown = int(stats['next_retry_in']) + 1
+            if current_app.redis.set(OUTBOX_RETRY_TIMER_KEY, 1, nx=True, ex=countdown):
+                dispatch_outbox.apply_async(countdown=countdown)
+        
+        return {'status': 'success', **stats}
+    except Exception as e:
+        celery.logger.error(f"Error dispatching emails: {str(e)}")
+        return {'status': 'error', 'message': str(e)}
+
+def render_preparation_reminder(user):
+    """Render a user's Sabbath preparation reminder email"""
+    return render_email(
+        subject="🕊️ Time to Prepare for Sabbath",
+        recipients=[user.email],
+        template='email/sabbath_reminder.html',
+        user=user,
+        checklist_html=checklist_fragment(generate_preparation_checklist(user)),
+        scripture_html=weekly_scripture_fragment()
+    )
 
 def generate_preparation_checklist(user):
     """Generate personalized Sabbath preparation checklist"""
@@ -140,15 +228,3 @@ def generate_preparation_checklist(user):
                 checklist[category].extend(items)
     
     return checklist
-
-def generate_spiritual_insights(user, records):
-    """Generate personalized spiritual insights"""
-    insights = {
-        'summary': analyze_weekly_summary(records),
-        'achievements': identify_achievements(records, user.profile),
-        'suggestions': generate_growth_suggestions(records, user.profile),
-        'bible_study': analyze_bible_study_pattern(records),
-        'prayer_life': analyze_prayer_pattern(records)
-    }
-    
-    return insights
@@ -0,0 +1,49 @@
+from sqlalchemy.orm import load_only
+
+def parse_fields(value, allowed, default=None):
+    """Parse a comma separated ``fields`` query parameter.
+
+    Args:
+        value: Raw query parameter value (e.g. "id,title,created_at")
+        allowed: Field names that may be requested
+        default: Fields returned when nothing is requested (defaults to all)
+
+    Returns:
+        List of field names, always including ``id``
+
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    if not value:
+        return list(default or allowed)
+
+    requested = []
+    for name in value.split(','):
+        name = name.strip()
+        if name and name not in requested:
+            requested.append(name)
+
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    if 'id' not in requested:
+        requested.insert(0, 'id')
+
+    return requested
+
+def apply_fieldset(query, model, fields):
+    """Restrict a query to the columns needed for the requested fields.
+
+    Columns that are not requested are never selected, so large text and
+    JSONB columns stay in the database for compact list views.
+    """
+    columns = [
+        getattr(model, name) for name in fields
+        if name in model.__table__.columns
+    ]
+    return query.options(load_only(*columns))
+
+def serialize_fields(obj, fields, serializers):
+    """Serialize an object using only the requested fields"""
+    return {name: serializers[name](obj) for name in fields}
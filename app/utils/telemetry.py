@@ -0,0 +1,226 @@
+"""Per-task resource telemetry and sampled profiles for Celery workers."""
+
+import cProfile
+import logging
+import os
+import random
+import resource
+import smtplib
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+import psutil
+import redis
+from celery.signals import task_prerun, task_postrun
+from datadog import statsd
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# The task run being measured on this thread
+_local = threading.local()
+_installed = False
+
+class TaskRun:
+    """Resource counters for one task execution"""
+    
+    def __init__(self, task_name, profile=False):
+        self.task_name = task_name
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.redis_calls = 0
+        self.redis_time = 0.0
+        self.smtp_calls = 0
+        self.smtp_time = 0.0
+        self.usage = None
+        self.profiler = cProfile.Profile() if profile else None
+        self.process = psutil.Process(os.getpid())
+        
+        _reset_peak_rss()
+        self.start_cpu = self.process.cpu_times()
+        self.start_time = time.perf_counter()
+        
+        if self.profiler:
+            try:
+                self.profiler.enable()
+            except ValueError:
+                # Another profiler is already active on this thread
+                self.profiler = None
+    
+    def finish(self):
+        """Stop measuring and summarize the run"""
+        if self.profiler:
+            self.profiler.disable()
+        
+        wall_time = time.perf_counter() - self.start_time
+        end_cpu = self.process.cpu_times()
+        self.usage = {
+            'task': self.task_name,
+            'wall_time': round(wall_time, 4),
+            'cpu_user': round(end_cpu.user - self.start_cpu.user, 4),
+            'cpu_system': round(end_cpu.system - self.start_cpu.system, 4),
+            'peak_rss': _peak_rss(),
+            'db_queries': self.db_queries,
+            'db_time': round(self.db_time, 4),
+            'redis_calls': self.redis_calls,
+            'redis_time': round(self.redis_time, 4),
+            'smtp_calls': self.smtp_calls,
+            'smtp_time': round(self.smtp_time, 4)
+        }
+        return self.usage
+
+def _reset_peak_rss():
+    """Reset the process high-water RSS so it covers only the next task (Linux)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def _peak_rss():
+    """Get the high-water RSS in bytes"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Lifetime peak of the process; kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'run', None) is not None:
+        conn.info.setdefault('telemetry_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('telemetry_query_start')
+    run = getattr(_local, 'run', None)
+    if not starts:
+        return
+    start = starts.pop()
+    if run is not None:
+        run.db_queries += 1
+        run.db_time += time.perf_counter() - start
+
+def _count_calls(method, kind):
+    """Wrap a Redis or SMTP round trip to count it against the current run"""
+    @wraps(method)
+    def wrapped(*args, **kwargs):
+        run = getattr(_local, 'run', None)
+        if run is None:
+            return method(*args, **kwargs)
+        
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            setattr(run, f'{kind}_calls', getattr(run, f'{kind}_calls') + 1)
+            setattr(run, f'{kind}_time', getattr(run, f'{kind}_time') + time.perf_counter() - start)
+    return wrapped
+
+def install_instrumentation():
+    """Hook SQLAlchemy, Redis and SMTP in this process (once)
+    
+    A pipeline counts as one Redis call, as it is one round trip. Each
+    message sent counts as one SMTP call (send_message goes through
+    sendmail, so only sendmail is wrapped).
+    """
+    global _installed
+    if _installed:
+        return
+    
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    redis.Redis.execute_command = _count_calls(redis.Redis.execute_command, 'redis')
+    redis.client.Pipeline.execute = _count_calls(redis.client.Pipeline.execute, 'redis')
+    smtplib.SMTP.sendmail = _count_calls(smtplib.SMTP.sendmail, 'smtp')
+    _installed = True
+
+def start_task_run(task_name, profile=False):
+    """Start measuring a task on this thread"""
+    install_instrumentation()
+    _local.run = TaskRun(task_name, profile)
+    return _local.run
+
+def finish_task_run():
+    """Stop measuring the task on this thread
+    
+    Returns:
+        The finished TaskRun, or None if none was started
+    """
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return None
+    
+    _local.run = None
+    run.finish()
+    return run
+
+def save_profile(run, directory, task_id):
+    """Write a run's profile as a pstats file
+    
+    The files load into snakeviz, or convert to flamegraphs with
+    flameprof or gprof2dot.
+    
+    Returns:
+        Path of the profile file
+    """
+    path = os.path.join(directory, run.task_name)
+    os.makedirs(path, exist_ok=True)
+    
+    timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+    filename = os.path.join(path, f'{timestamp}-{task_id}.prof')
+    run.profiler.dump_stats(filename)
+    return filename
+
+def init_task_telemetry(app):
+    """Record resource usage of every task run by Celery workers
+    
+    Usage is logged per task (as ``props`` for the JSON formatter) and
+    sent to DataDog if configured. TASK_PROFILE_SAMPLE_RATE of the runs
+    are profiled into TASK_PROFILE_DIR.
+    """
+    sample_rate = app.config['TASK_PROFILE_SAMPLE_RATE']
+    profile_dir = app.config['TASK_PROFILE_DIR']
+    send_metrics = bool(app.config.get('DATADOG_API_KEY'))
+    
+    @task_prerun.connect(weak=False)
+    def start_run(task_id=None, task=None, **kwargs):
+        start_task_run(task.name, profile=random.random() < sample_rate)
+    
+    @task_postrun.connect(weak=False)
+    def finish_run(task_id=None, task=None, state=None, **kwargs):
+        run = finish_task_run()
+        if run is None:
+            return
+        
+        usage = dict(run.usage, task_id=task_id, state=state)
+        if run.profiler:
+            try:
+                usage['profile'] = save_profile(run, profile_dir, task_id)
+            except OSError as e:
+                logger.error(f'Could not save profile of {run.task_name}: {str(e)}')
+        
+        logger.info(
+            f"{run.task_name} {state}: {usage['wall_time']}s wall, "
+            f"{usage['cpu_user'] + usage['cpu_system']:.3f}s CPU, "
+            f"{usage['db_queries']} queries ({usage['db_time']}s), "
+            f"{usage['redis_calls']} Redis calls ({usage['redis_time']}s), "
+            f"{usage['smtp_calls']} SMTP sends ({usage['smtp_time']}s)",
+            extra={'props': usage}
+        )
+        
+        if send_metrics:
+            tags = [f'task:{run.task_name}', f'state:{state}']
+            statsd.timing('sabbath.task.duration', usage['wall_time'] * 1000, tags=tags)
+            statsd.histogram('sabbath.task.cpu', usage['cpu_user'] + usage['cpu_system'], tags=tags)
+            statsd.histogram('sabbath.task.peak_rss', usage['peak_rss'], tags=tags)
+            statsd.histogram('sabbath.task.db.queries', usage['db_queries'], tags=tags)
+            statsd.histogram('sabbath.task.db.time', usage['db_time'], tags=tags)
+            statsd.histogram('sabbath.task.redis.calls', usage['redis_calls'], tags=tags)
+            statsd.histogram('sabbath.task.redis.time', usage['redis_time'], tags=tags)
+            statsd.histogram('sabbath.task.smtp.calls', usage['smtp_calls'], tags=tags)
+            statsd.histogram('sabbath.task.smtp.time', usage['smtp_time'], tags=tags)
@@ -0,0 +1,36 @@
+"""Add numeric metric columns to spiritual_records
+
+Revision ID: 0001_spiritual_metric_columns
+Revises:
+Create Date: 2026-10-19
+
+Existing rows are populated with ``flask backfill-metric-columns``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001_spiritual_metric_columns'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+METRIC_COLUMNS = (
+    'bible_study_minutes',
+    'prayer_minutes',
+    'service_hours',
+    'meditation_minutes'
+)
+
+def upgrade():
+    for column in METRIC_COLUMNS:
+        op.add_column('spiritual_records', sa.Column(column, sa.Float(), nullable=True))
+    op.create_index(
+        'ix_spiritual_records_user_date',
+        'spiritual_records',
+        ['user_id', 'date']
+    )
+
+def downgrade():
+    op.drop_index('ix_spiritual_records_user_date', table_name='spiritual_records')
+    for column in METRIC_COLUMNS:
+        op.drop_column('spiritual_records', column)
@@ -0,0 +1,106 @@
+"""Add full-text search over prayer requests, studies and records
+
+Revision ID: 0002_full_text_search
+Revises: 0001_spiritual_metric_columns
+Create Date: 2026-10-19
+
+PostgreSQL gets a generated, weighted ``search_vector`` column with a GIN
+index on each table. SQLite gets a single FTS5 ``search_index`` table kept
+in sync by triggers; its rowid encodes the source row as
+``id * 3 + kind`` so updates and deletes are rowid lookups.
+"""
+from alembic import op
+
+revision = '0002_full_text_search'
+down_revision = '0001_spiritual_metric_columns'
+branch_labels = None
+depends_on = None
+
+# table: (kind code, title expression, body expression)
+SEARCH_SOURCES = {
+    'spiritual_records': (0, "category", "notes"),
+    'prayer_requests': (1, "title", "coalesce({p}request, '') || ' ' || coalesce({p}answer_notes, '')"),
+    'bible_studies': (2, "book", "notes")
+}
+
+POSTGRES_VECTORS = {
+    'spiritual_records': (
+        "setweight(to_tsvector('english', coalesce(category, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(notes, '')), 'A')"
+    ),
+    'prayer_requests': (
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(request, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(answer_notes, '')), 'C')"
+    ),
+    'bible_studies': (
+        "setweight(to_tsvector('english', coalesce(book, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(notes, '')), 'B')"
+    )
+}
+
+def _sqlite_expressions(table, prefix):
+    code, title, body = SEARCH_SOURCES[table]
+    title = f"coalesce({prefix}{title}, '')"
+    if '{p}' in body:
+        body = body.format(p=prefix)
+    else:
+        body = f"coalesce({prefix}{body}, '')"
+    return code, title, body
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        for table, vector in POSTGRES_VECTORS.items():
+            op.execute(
+                f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({vector}) STORED"
+            )
+            op.execute(
+                f"CREATE INDEX ix_{table}_search_vector ON {table} "
+                f"USING GIN (search_vector)"
+            )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE search_index USING fts5("
+            "owner, title, body, tokenize='porter unicode61')"
+        )
+        for table in SEARCH_SOURCES:
+            code, title, body = _sqlite_expressions(table, 'new.')
+            insert = (
+                f"INSERT INTO search_index(rowid, owner, title, body) VALUES ("
+                f"new.id * 3 + {code}, 'u' || new.user_id, {title}, {body});"
+            )
+            delete = f"DELETE FROM search_index WHERE rowid = old.id * 3 + {code};"
+            op.execute(
+                f"CREATE TRIGGER {table}_search_ai AFTER INSERT ON {table} "
+                f"BEGIN {insert} END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {table}_search_au AFTER UPDATE ON {table} "
+                f"BEGIN {delete} {insert} END"
+            )
+            op.execute(
+                f"CREATE TRIGGER {table}_search_ad AFTER DELETE ON {table} "
+                f"BEGIN {delete} END"
+            )
+
+            code, title, body = _sqlite_expressions(table, '')
+            op.execute(
+                f"INSERT INTO search_index(rowid, owner, title, body) "
+                f"SELECT id * 3 + {code}, 'u' || user_id, {title}, {body} FROM {table}"
+            )
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        for table in POSTGRES_VECTORS:
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN search_vector")
+    elif dialect == 'sqlite':
+        for table in SEARCH_SOURCES:
+            for suffix in ('ai', 'au', 'ad'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{suffix}")
+        op.execute("DROP TABLE IF EXISTS search_index")
@@ -0,0 +1,27 @@
+"""Add per-user Bible verse coverage bitmaps
+
+Revision ID: 0003_bible_coverage
+Revises: 0002_full_text_search
+Create Date: 2026-10-19
+
+Existing studies are folded in with ``flask rebuild-bible-coverage``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0003_bible_coverage'
+down_revision = '0002_full_text_search'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'bible_coverage',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('bitmap', sa.LargeBinary(), nullable=True),
+        sa.Column('verses_read', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True)
+    )
+
+def downgrade():
+    op.drop_table('bible_coverage')
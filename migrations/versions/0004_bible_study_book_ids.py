@@ -0,0 +1,27 @@
+"""Add canonical book IDs to bible_studies
+
+Revision ID: 0004_bible_study_book_ids
+Revises: 0003_bible_coverage
+Create Date: 2026-10-19
+
+Existing rows are populated with ``flask backfill-book-ids``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0004_bible_study_book_ids'
+down_revision = '0003_bible_coverage'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('bible_studies', sa.Column('book_id', sa.SmallInteger(), nullable=True))
+    op.create_index(
+        'ix_bible_studies_user_book_chapter',
+        'bible_studies',
+        ['user_id', 'book_id', 'chapter']
+    )
+
+def downgrade():
+    op.drop_index('ix_bible_studies_user_book_chapter', table_name='bible_studies')
+    op.drop_column('bible_studies', 'book_id')
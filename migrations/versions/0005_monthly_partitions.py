@@ -0,0 +1,153 @@
+"""Partition history tables by month and add the history archive
+
+Revision ID: 0005_monthly_partitions
+Revises: 0004_bible_study_book_ids
+Create Date: 2026-10-19
+
+On PostgreSQL, spiritual_records, bible_studies and prayer_requests are
+rebuilt as tables range partitioned by month (on ``date``, ``date`` and
+``created_at``), with one partition per month holding data, the next
+three months, and a default partition. Rows are copied in one pass, so
+run this during a maintenance window. Later months are created with
+``flask maintain-partitions``.
+
+All databases get the ``history_archive`` table used for archived rows.
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005_monthly_partitions'
+down_revision = '0004_bible_study_book_ids'
+branch_labels = None
+depends_on = None
+
+PARTITION_KEYS = {
+    'spiritual_records': 'date',
+    'prayer_requests': 'created_at',
+    'bible_studies': 'date'
+}
+
+# Indexes rebuilt on the partitioned tables: name -> (table, definition)
+INDEXES = {
+    'ix_spiritual_records_user_date': ('spiritual_records', '(user_id, date)'),
+    'ix_spiritual_records_search_vector': ('spiritual_records', 'USING GIN (search_vector)'),
+    'ix_prayer_requests_user_created_at': ('prayer_requests', '(user_id, created_at)'),
+    'ix_prayer_requests_search_vector': ('prayer_requests', 'USING GIN (search_vector)'),
+    'ix_bible_studies_user_date': ('bible_studies', '(user_id, date)'),
+    'ix_bible_studies_user_book_chapter': ('bible_studies', '(user_id, book_id, chapter)'),
+    'ix_bible_studies_search_vector': ('bible_studies', 'USING GIN (search_vector)')
+}
+
+MONTHS_AHEAD = 3
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def _copied_columns(bind, table):
+    # Generated columns are recomputed on insert and cannot be copied
+    return ', '.join(
+        column['name'] for column in sa.inspect(bind).get_columns(table)
+        if column['name'] != 'search_vector'
+    )
+
+def _partition_table(bind, table, key):
+    old = f'{table}_unpartitioned'
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    for index, (index_table, _) in INDEXES.items():
+        if index_table == table:
+            op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    # The old table is dropped below; free its constraint names now
+    op.execute(f"ALTER TABLE {old} DROP CONSTRAINT IF EXISTS {table}_pkey")
+    op.execute(f"ALTER TABLE {old} DROP CONSTRAINT IF EXISTS {table}_user_id_fkey")
+
+    # Partition keys are part of the primary key and must be set
+    value = "coalesce(created_at::date, current_date)" if key == 'date' else "now()"
+    op.execute(f"UPDATE {old} SET {key} = {value} WHERE {key} IS NULL")
+
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING GENERATED) "
+        f"PARTITION BY RANGE ({key})"
+    )
+    op.execute(f"ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL")
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {key})")
+    op.execute(f"ALTER TABLE {table} ADD FOREIGN KEY (user_id) REFERENCES users (id)")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+    oldest = bind.execute(sa.text(f"SELECT min({key}) FROM {old}")).scalar()
+    current = date.today().replace(day=1)
+    month = date(oldest.year, oldest.month, 1) if oldest else current
+    while month <= _add_months(current, MONTHS_AHEAD):
+        op.execute(
+            f"CREATE TABLE {table}_{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    columns = _copied_columns(bind, old)
+    op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {old}")
+    op.execute(f"DROP TABLE {old}")
+
+    for index, (index_table, definition) in INDEXES.items():
+        if index_table == table:
+            op.execute(f"CREATE INDEX {index} ON {table} {definition}")
+    op.execute(f"ANALYZE {table}")
+
+def _unpartition_table(bind, table, key):
+    old = f'{table}_partitioned'
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    for index, (index_table, _) in INDEXES.items():
+        if index_table == table:
+            op.execute(f"DROP INDEX IF EXISTS {index}")
+    op.execute(f"ALTER TABLE {old} DROP CONSTRAINT IF EXISTS {table}_pkey")
+    op.execute(f"ALTER TABLE {old} DROP CONSTRAINT IF EXISTS {table}_user_id_fkey")
+
+    op.execute(f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING GENERATED)")
+    op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+    op.execute(f"ALTER TABLE {table} ADD FOREIGN KEY (user_id) REFERENCES users (id)")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+    columns = _copied_columns(bind, old)
+    op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {old}")
+    op.execute(f"DROP TABLE {old} CASCADE")
+
+    for index, (index_table, definition) in INDEXES.items():
+        if index_table == table and index not in (
+            'ix_prayer_requests_user_created_at', 'ix_bible_studies_user_date'
+        ):
+            op.execute(f"CREATE INDEX {index} ON {table} {definition}")
+
+def upgrade():
+    op.create_table(
+        'history_archive',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('kind', sa.String(32)),
+        sa.Column('user_id', sa.Integer()),
+        sa.Column('month', sa.Date()),
+        sa.Column('row_count', sa.Integer()),
+        sa.Column('payload', sa.LargeBinary()),
+        sa.Column('archived_at', sa.DateTime())
+    )
+    op.create_index(
+        'ix_history_archive_kind_user_month',
+        'history_archive',
+        ['kind', 'user_id', 'month']
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for table, key in PARTITION_KEYS.items():
+            _partition_table(bind, table, key)
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        for table, key in PARTITION_KEYS.items():
+            _unpartition_table(bind, table, key)
+
+    op.drop_index('ix_history_archive_kind_user_month', table_name='history_archive')
+    op.drop_table('history_archive')
@@ -0,0 +1,27 @@
+"""Add persisted growth analysis state
+
+Revision ID: 0006_growth_state
+Revises: 0005_monthly_partitions
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006_growth_state'
+down_revision = '0005_monthly_partitions'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'growth_state',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('watermark_id', sa.Integer()),
+        sa.Column('last_date', sa.Date()),
+        sa.Column('record_count', sa.Integer()),
+        sa.Column('state', sa.LargeBinary()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+def downgrade():
+    op.drop_table('growth_state')
@@ -0,0 +1,41 @@
+"""Move growth analysis out of user profiles
+
+Revision ID: 0007_growth_analytics
+Revises: 0006_growth_state
+Create Date: 2026-10-19
+
+Stored analyses are removed from user profiles and the growth state is
+cleared, so every user's analysis is rebuilt into growth_analytics on
+its next run.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0007_growth_analytics'
+down_revision = '0006_growth_state'
+branch_labels = None
+depends_on = None
+
+JSON_TYPE = postgresql.JSONB().with_variant(sa.JSON(), 'sqlite')
+
+def upgrade():
+    op.create_table(
+        'growth_analytics',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('weeks', sa.LargeBinary()),
+        sa.Column('points', sa.LargeBinary()),
+        sa.Column('trends', JSON_TYPE),
+        sa.Column('patterns', JSON_TYPE),
+        sa.Column('insights', JSON_TYPE),
+        sa.Column('record_count', sa.Integer()),
+        sa.Column('updated_at', sa.DateTime())
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("UPDATE users SET profile = profile - 'growth_analysis' WHERE profile ? 'growth_analysis'")
+    op.execute("DELETE FROM growth_state")
+
+def downgrade():
+    op.drop_table('growth_analytics')
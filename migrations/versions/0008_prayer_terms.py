@@ -0,0 +1,32 @@
+"""Add the incremental prayer theme index
+
+Revision ID: 0008_prayer_terms
+Revises: 0007_growth_analytics
+Create Date: 2026-10-19
+
+Existing prayer requests are indexed with ``flask rebuild-prayer-themes``.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0008_prayer_terms'
+down_revision = '0007_growth_analytics'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'prayer_terms',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('term', sa.String(64), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False)
+    )
+    op.create_table(
+        'prayer_term_documents',
+        sa.Column('term', sa.String(64), primary_key=True),
+        sa.Column('documents', sa.Integer(), nullable=False)
+    )
+
+def downgrade():
+    op.drop_table('prayer_term_documents')
+    op.drop_table('prayer_terms')
@@ -0,0 +1,34 @@
+"""Add the weekly reports table
+
+Revision ID: 0009_weekly_reports
+Revises: 0008_prayer_terms
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0009_weekly_reports'
+down_revision = '0008_prayer_terms'
+branch_labels = None
+depends_on = None
+
+JSON_TYPE = postgresql.JSONB().with_variant(sa.JSON(), 'sqlite')
+
+def upgrade():
+    op.create_table(
+        'weekly_reports',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('period_start', sa.Date(), primary_key=True),
+        sa.Column('period_end', sa.Date()),
+        sa.Column('stats', JSON_TYPE),
+        sa.Column('recommendations', JSON_TYPE),
+        sa.Column('generated_at', sa.DateTime())
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("UPDATE users SET profile = profile - 'latest_weekly_report' WHERE profile ? 'latest_weekly_report'")
+
+def downgrade():
+    op.drop_table('weekly_reports')
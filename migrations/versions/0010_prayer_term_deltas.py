@@ -0,0 +1,36 @@
+"""Buffer prayer theme document frequencies out of the insert transaction
+
+Revision ID: 0010_prayer_term_deltas
+Revises: 0009_weekly_reports
+Create Date: 2026-10-19
+
+Prayer request inserts append to ``prayer_term_document_deltas`` instead
+of upserting shared ``prayer_term_documents`` rows, and the '' row that
+counted every request is dropped (the total is read from
+``prayer_requests``).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010_prayer_term_deltas'
+down_revision = '0009_weekly_reports'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'prayer_term_document_deltas',
+        sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True),
+        sa.Column('term', sa.String(64), nullable=False),
+        sa.Column('documents', sa.Integer(), nullable=False)
+    )
+    op.create_index('ix_prayer_term_document_deltas_term', 'prayer_term_document_deltas', ['term'])
+    op.execute("DELETE FROM prayer_term_documents WHERE term = ''")
+
+def downgrade():
+    op.execute(
+        "INSERT INTO prayer_term_documents (term, documents) "
+        "SELECT '', count(*) FROM prayer_requests"
+    )
+    op.drop_index('ix_prayer_term_document_deltas_term', 'prayer_term_document_deltas')
+    op.drop_table('prayer_term_document_deltas')
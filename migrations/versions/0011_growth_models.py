@@ -0,0 +1,27 @@
+"""Store growth model artifacts in the database
+
+Revision ID: 0011_growth_models
+Revises: 0010_prayer_term_deltas
+Create Date: 2026-10-19
+
+Artifacts saved under GROWTH_MODEL_DIR were only visible to the host that
+trained them. Run ``flask train-growth-model`` after upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011_growth_models'
+down_revision = '0010_prayer_term_deltas'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'growth_models',
+        sa.Column('version', sa.String(14), primary_key=True),
+        sa.Column('artifact', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime())
+    )
+
+def downgrade():
+    op.drop_table('growth_models')
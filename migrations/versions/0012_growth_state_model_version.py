@@ -0,0 +1,22 @@
+"""Record the growth model version of each growth state
+
+Revision ID: 0012_growth_state_model_version
+Revises: 0011_growth_models
+Create Date: 2026-10-19
+
+Lets the cohort job find states built with an older model without
+decoding them. Existing states have no version and are rebuilt once.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012_growth_state_model_version'
+down_revision = '0011_growth_models'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('growth_state', sa.Column('model_version', sa.String(14)))
+
+def downgrade():
+    op.drop_column('growth_state', 'model_version')
@@ -2,7 +2,7 @@
 
 import pytest
 from app import create_app
-from app.models import db as _db
+from app.models import db as _db, User
 
 @pytest.fixture
 def app():
@@ -29,3 +29,27 @@ def client(app):
 def runner(app):
     """Create test CLI runner."""
     return app.test_cli_runner()
+
+@pytest.fixture
+def auth_headers(client, db):
+    """Create authenticated user and return auth headers."""
+    # Create test user
+    user = User(email='test@example.com', name='Test User')
+    user.set_password('password123')
+    db.session.add(user)
+    db.session.commit()
+    
+    # Get auth token
+    response = client.post('/api/v1/auth/login', json={
+        'email': 'test@example.com',
+        'password': 'password123'
+    })
+    token = response.json['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+@pytest.fixture
+def fake_redis(app):
+    """Replace the application's Redis client with an in-memory fake."""
+    fakeredis = pytest.importorskip('fakeredis')
+    app.redis = fakeredis.FakeRedis()
+    return app.redis
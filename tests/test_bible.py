@@ -0,0 +1,65 @@
+"""Tests for Bible reference parsing and verse coverage."""
+
+import pytest
+from app.models import User
+from app.models.user import BibleCoverage, BibleStudy
+from app.core.bible import (
+    TOTAL_VERSES, VerseCoverage, normalize_book, parse_reference, parse_verse_ranges
+)
+
+def test_parse_verse_ranges():
+    """Test parsing of free-text verse ranges."""
+    assert parse_verse_ranges('1-5,7,9-12', 39) == [(1, 5), (7, 7), (9, 12)]
+    assert parse_verse_ranges('', 39) == [(1, 39)]
+    assert parse_verse_ranges('30-50', 39) == [(30, 39)]
+
+def test_parse_verse_ranges_invalid():
+    """Test that malformed verse ranges are rejected."""
+    with pytest.raises(ValueError):
+        parse_verse_ranges('5-a', 39)
+    with pytest.raises(ValueError):
+        parse_verse_ranges('9-3', 39)
+
+def test_verse_coverage():
+    """Test marking and counting verse coverage."""
+    romans = normalize_book('Romans')
+    coverage = VerseCoverage()
+    assert coverage.mark(romans, 8, '1-5,7,9-12') == 10
+    assert coverage.mark(romans, 8, '10-14') == 2
+    assert coverage.count(romans) == 12
+
+    restored = VerseCoverage.from_bytes(coverage.to_bytes())
+    assert restored.count() == 12
+    assert restored.progress()['total_verses'] == TOTAL_VERSES
+
+def test_normalize_book():
+    """Test that book names and abbreviations map to one canonical ID."""
+    corinthians = normalize_book('1 Corinthians')
+    assert corinthians == 46
+    assert normalize_book('1 Cor') == corinthians
+    assert normalize_book('I Corinthians') == corinthians
+    assert normalize_book('1co.') == corinthians
+    assert normalize_book('Jo') is None
+    assert normalize_book('Unknown') is None
+
+def test_parse_reference():
+    """Test parsing of Scripture references."""
+    reference = parse_reference('1 Cor 6:19-20')
+    assert reference == (46, 6, '19-20')
+    assert parse_reference('Romans 8').verses is None
+
+def test_record_study(db):
+    """Test that the first and later studies of a user share one coverage row."""
+    user = User(email='coverage@example.com', name='Coverage User')
+    db.session.add(user)
+    db.session.commit()
+
+    first = BibleStudy(user_id=user.id, book='Romans', chapter=8, verses='1-5')
+    second = BibleStudy(user_id=user.id, book='Rom', chapter=8, verses='4-10')
+    assert BibleCoverage.record_study(first) == 5
+    assert BibleCoverage.record_study(second) == 5
+    db.session.commit()
+
+    entries = BibleCoverage.query.filter_by(user_id=user.id).all()
+    assert len(entries) == 1
+    assert entries[0].verses_read == 10
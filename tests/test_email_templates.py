@@ -0,0 +1,51 @@
+"""Tests for cached email fragments."""
+
+from datetime import date
+import pytest
+import app.core.email_templates as email_templates
+from app.core.email_templates import checklist_fragment, render_fragment, weekly_scripture
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Count fragment renders, starting from an empty cache."""
+    calls = []
+
+    def render(template, **context):
+        calls.append((template, context))
+        return f'<p>{len(calls)}</p>'
+
+    monkeypatch.setattr(email_templates, 'render_email_html', render)
+    monkeypatch.setattr(email_templates, '_fragments', email_templates.OrderedDict())
+    return calls
+
+def test_checklist_fragment_key(renders):
+    """Test that equal checklists share one render regardless of key order."""
+    first = checklist_fragment({'spiritual': ['Prayer'], 'physical': ['Cleaning']})
+    second = checklist_fragment({'physical': ['Cleaning'], 'spiritual': ['Prayer']})
+    other = checklist_fragment({'spiritual': ['Prayer', 'Bible study']})
+
+    assert first is second
+    assert other != first
+    assert len(renders) == 2
+
+def test_fragment_cache_evicts_least_recently_used(renders, monkeypatch):
+    """Test that the cache keeps the most recently used fragments."""
+    monkeypatch.setattr(email_templates, 'FRAGMENT_CACHE_SIZE', 2)
+
+    render_fragment('email/_a.html', 'a')
+    render_fragment('email/_a.html', 'b')
+    render_fragment('email/_a.html', 'a')
+    render_fragment('email/_a.html', 'c')
+    assert len(renders) == 3
+
+    render_fragment('email/_a.html', 'a')
+    assert len(renders) == 3
+    render_fragment('email/_a.html', 'b')
+    assert len(renders) == 4
+
+def test_weekly_scripture():
+    """Test that the weekly verse is stable within a week and rotates between weeks."""
+    monday, sunday = date(2026, 10, 12), date(2026, 10, 18)
+
+    assert weekly_scripture(monday) == weekly_scripture(sunday)
+    assert weekly_scripture(monday) != weekly_scripture(date(2026, 10, 19))
@@ -0,0 +1,78 @@
+"""Tests for streaming history exports."""
+
+import csv
+import io
+import json
+from datetime import date
+import pytest
+from app.models import User
+from app.models.user import SpiritualRecord, PrayerRequest
+from app.core.export import iter_csv, iter_ndjson, write_parquet
+
+@pytest.fixture
+def history(db):
+    """Create a user with a few records and a prayer request."""
+    user = User(email='export@example.com', name='Export User')
+    db.session.add(user)
+    db.session.commit()
+
+    db.session.add_all([
+        SpiritualRecord(user_id=user.id, date=date(2026, 10, 1), category='prayer',
+                        metrics={'prayer': {'duration': 20}}, notes='Morning prayer'),
+        SpiritualRecord(user_id=user.id, date=date(2026, 10, 2), category='bible_study',
+                        metrics={'bible_study': {'duration': 35.5}}),
+        PrayerRequest(user_id=user.id, title='Healing', request='For my mother, "soon"')
+    ])
+    db.session.commit()
+    return user
+
+def test_ndjson_round_trip(history):
+    """Test that NDJSON lines parse back into the exported rows."""
+    lines = list(iter_ndjson(['spiritual_records', 'prayer_requests'], user_id=history.id))
+    rows = [json.loads(line) for line in lines]
+
+    assert all(line.endswith('\n') for line in lines)
+    assert [row['type'] for row in rows] == ['spiritual_records', 'spiritual_records', 'prayer_requests']
+    assert rows[0]['date'] == '2026-10-01'
+    assert rows[0]['metrics'] == {'prayer': {'duration': 20}}
+    assert rows[1]['bible_study_minutes'] == 35.5
+    assert rows[2]['request'] == 'For my mother, "soon"'
+
+def test_csv_round_trip(history):
+    """Test that CSV output reads back with a header and JSON cells."""
+    reader = csv.DictReader(io.StringIO(''.join(iter_csv('spiritual_records', user_id=history.id))))
+    rows = list(reader)
+
+    assert len(rows) == 2
+    assert rows[0]['category'] == 'prayer'
+    assert rows[0]['notes'] == 'Morning prayer'
+    assert json.loads(rows[1]['metrics']) == {'bible_study': {'duration': 35.5}}
+
+def test_parquet_round_trip(history, tmp_path):
+    """Test that a Parquet export reads back with typed columns."""
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'records.parquet')
+
+    assert write_parquet('spiritual_records', path, user_id=history.id, batch_size=1) == 2
+
+    table = pq.read_table(path)
+    assert table.num_rows == 2
+    assert table.column('date').to_pylist() == [date(2026, 10, 1), date(2026, 10, 2)]
+    assert json.loads(table.column('metrics')[0].as_py()) == {'prayer': {'duration': 20}}
+
+def test_export_endpoint(client, auth_headers):
+    """Test that the export endpoint streams the user's history."""
+    client.post('/api/v1/spiritual/prayer-request', json={
+        'title': 'Family',
+        'request': 'Pray for my family'
+    }, headers=auth_headers)
+
+    response = client.get('/api/v1/spiritual/export?format=ndjson&kind=prayer_requests',
+                          headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row['title'] for row in rows] == ['Family']
+
+    response = client.get('/api/v1/spiritual/export?format=csv', headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,153 @@
+"""Tests for incremental spiritual growth analysis."""
+
+import numpy as np
+import app.core.growth_model as growth_model
+from app.core.growth import GrowthAccumulator, rolling_means, weekly_points, merge_points
+from app.core.growth_model import GrowthModel, current_model, list_versions, save_model
+from app.core.growth_batch import SharedArray, analyze_chunk, user_chunks
+
+def _model():
+    """A model with fixed centroids, without fitting MiniBatchKMeans."""
+    return GrowthModel(
+        '20261019000000',
+        mean=np.zeros(4),
+        scale=np.ones(4),
+        centroids=np.array([[0.0] * 4, [5.0] * 4, [10.0] * 4])
+    )
+
+def test_fold_matches_full_history():
+    """Test that folding new rows gives the same results as recomputing."""
+    values = np.random.default_rng(0).random((100, 4)) * 10
+    model = _model()
+    accumulator = GrowthAccumulator.empty(model)
+    accumulator.fold(values[:60], model)
+    accumulator = GrowthAccumulator.from_bytes(accumulator.to_bytes())
+
+    weekly, monthly = accumulator.fold(values[60:], model)
+
+    assert np.allclose(weekly, rolling_means(values, 7)[60:], equal_nan=True)
+    assert np.allclose(monthly, rolling_means(values, 30)[60:], equal_nan=True)
+    expected = [np.polyfit(np.arange(100), values[:, i], 1)[0] for i in range(4)]
+    assert np.allclose(accumulator.slopes(), expected)
+    assert accumulator.cluster_counts.sum() == 100
+
+def test_patterns_for_few_records():
+    """Test that a user with fewer records than clusters still gets patterns."""
+    model = _model()
+    accumulator = GrowthAccumulator.empty(model)
+    accumulator.fold(np.array([[9.0, 11.0, 10.0, 10.0]]), model)
+
+    patterns = accumulator.patterns()
+
+    assert [p['size'] for p in patterns] == [0, 0, 1]
+    assert patterns[2]['characteristics']['primary_focus'] == 'prayer_minutes'
+    assert patterns[0]['characteristics'] is None
+
+def test_model_artifacts(db):
+    """Test that saved models round-trip and only the newest versions are kept."""
+    model = _model()
+    save_model(GrowthModel('20261012000000', model.mean, model.scale, model.centroids), keep=2)
+    save_model(model, keep=2)
+    save_model(GrowthModel('20261026000000', model.mean, model.scale, model.centroids), keep=2)
+
+    assert list_versions() == ['20261019000000', '20261026000000']
+    loaded = GrowthModel.from_bytes(model.version, model.to_bytes())
+    assert loaded.version == model.version
+    assert list(loaded.predict(np.array([[1.0] * 4, [9.0] * 4]))) == [0, 2]
+
+def test_current_model(app, db, monkeypatch):
+    """Test that the newest model is checked for at most once per interval."""
+    monkeypatch.setattr(growth_model, '_model', None)
+    monkeypatch.setattr(growth_model, '_checked_at', None)
+    app.config['GROWTH_MODEL_CHECK_INTERVAL'] = 300
+    warnings = []
+    monkeypatch.setattr(app.logger, 'warning', warnings.append)
+
+    assert current_model() is None
+    assert len(warnings) == 1
+
+    save_model(_model(), keep=3)
+    assert current_model() is None
+
+    monkeypatch.setattr(growth_model, '_checked_at', None)
+    assert current_model().version == '20261019000000'
+    assert len(warnings) == 1
+
+def test_user_chunks():
+    """Test that cohort chunks never split a user's rows."""
+    user_ids = np.array([1, 1, 1, 2, 3, 3, 4])
+
+    chunks = user_chunks(user_ids, chunk_rows=3)
+
+    assert chunks == [[(1, 0, 3)], [(2, 3, 4), (3, 4, 6)], [(4, 6, 7)]]
+
+def _analyze_shared(dates, values, users, model):
+    """Run analyze_chunk over arrays placed in shared memory."""
+    shared = {'date': SharedArray.copy_of(dates), 'values': SharedArray.copy_of(values)}
+    try:
+        return analyze_chunk(
+            {name: array.spec for name, array in shared.items()}, users, model, upto_id=99
+        )
+    finally:
+        for array in shared.values():
+            array.close()
+            array.block.unlink()
+
+def test_analyze_chunk_from_shared_memory():
+    """Test that pool workers read users' rows from shared arrays."""
+    values = np.random.default_rng(1).random((40, 4)) * 10
+    dates = np.arange('2026-09-01', '2026-10-11', dtype='datetime64[D]')
+
+    results = _analyze_shared(dates, values, [(1, 0, 10, None), (2, 10, 40, None)], _model())
+
+    assert [r['user_id'] for r in results] == [1, 2]
+    assert results[1]['record_count'] == 30
+    assert results[1]['model_version'] == '20261019000000'
+    assert results[1]['last_date'].isoformat() == '2026-10-10'
+    assert np.isclose(results[1]['trends']['bible_study_minutes']['monthly_avg'], values[10:, 0].mean())
+
+def test_analyze_chunk_folds_stored_state():
+    """Test that folding new rows into a stored state matches a full rebuild."""
+    values = np.random.default_rng(2).random((40, 4)) * 10
+    dates = np.arange('2026-09-01', '2026-10-11', dtype='datetime64[D]')
+    model = _model()
+    first, = _analyze_shared(dates[:30], values[:30], [(1, 0, 30, None)], model)
+    stored = {'state': first['state'], 'weeks': first['chart'][0], 'points': first['chart'][1]}
+
+    folded, = _analyze_shared(dates[30:], values[30:], [(1, 0, 10, stored)], model)
+    rebuilt, = _analyze_shared(dates, values, [(1, 0, 40, None)], model)
+
+    assert folded['record_count'] == rebuilt['record_count'] == 40
+    assert folded['last_date'] == rebuilt['last_date']
+    for column, trend in rebuilt['trends'].items():
+        assert folded['trends'][column]['trend'] == trend['trend']
+        assert np.isclose(folded['trends'][column]['monthly_avg'], trend['monthly_avg'])
+    assert [p['size'] for p in folded['patterns']] == [p['size'] for p in rebuilt['patterns']]
+    assert folded['chart'][0] == rebuilt['chart'][0]
+    assert np.allclose(np.frombuffer(folded['chart'][1], dtype='<f4'),
+                       np.frombuffer(rebuilt['chart'][1], dtype='<f4'), equal_nan=True)
+
+def test_weekly_points():
+    """Test that chart points take each week's last rolling means."""
+    dates = np.array(['2026-10-12', '2026-10-14', '2026-10-18', '2026-10-19'], dtype='datetime64[D]')
+    weekly = np.arange(16, dtype=float).reshape(4, 4)
+    monthly = weekly + 100
+
+    weeks, points = weekly_points(dates, weekly, monthly)
+
+    assert list(weeks.astype('datetime64[D]').astype(str)) == ['2026-10-12', '2026-10-19']
+    assert points.dtype == np.float32
+    assert points.shape == (2, 4, 2)
+    assert list(points[0, :, 0]) == [8, 9, 10, 11]
+    assert list(points[1, :, 1]) == [112, 113, 114, 115]
+
+def test_merge_points_replaces_open_week():
+    """Test that a week covered again by new records is replaced."""
+    weeks = np.array([0, 7, 14], dtype=np.int32)
+    points = np.zeros((3, 4, 2), dtype=np.float32)
+    new_points = np.ones((2, 4, 2), dtype=np.float32)
+
+    merged_weeks, merged_points = merge_points(weeks, points, np.array([14, 21], dtype=np.int32), new_points)
+
+    assert list(merged_weeks) == [0, 7, 14, 21]
+    assert merged_points[:, 0, 0].tolist() == [0, 0, 1, 1]
@@ -0,0 +1,33 @@
+"""Tests for set-based weekly insight generation."""
+
+from datetime import date
+from types import SimpleNamespace
+import pandas as pd
+from app.core.insights import WEEKLY_COLUMNS, build_weekly_insights, weekly_targets
+
+def test_build_weekly_insights():
+    """Test summaries, achievements and suggestions for several users at once."""
+    rows = [
+        (1, date(2026, 10, day), 'bible_study', 30.0, 10.0, 0.0, 0.0)
+        for day in range(12, 19)
+    ]
+    rows.append((2, date(2026, 10, 13), 'prayer', 0.0, 15.0, 1.0, 0.0))
+    frame = pd.DataFrame(rows, columns=WEEKLY_COLUMNS)
+    targets = weekly_targets([
+        SimpleNamespace(id=1, profile={'spiritual_goals': {'bible_study': {'study_time_minutes': 20}}}),
+        SimpleNamespace(id=2, profile={})
+    ])
+
+    insights = build_weekly_insights(frame, targets)
+
+    assert insights[1]['summary']['active_days'] == 7
+    assert insights[1]['bible_study'] == {'minutes': 210.0, 'days': 7, 'average_minutes': 30.0}
+    assert 'Met your weekly Bible study goal' in insights[1]['achievements']
+    assert 'Met your weekly prayer goal' not in insights[1]['achievements']
+    assert insights[2]['achievements'] == ['Served others this week']
+    assert 'Set aside time for Bible study this week' in insights[2]['suggestions']
+
+def test_build_weekly_insights_empty():
+    """Test that an empty week yields no insights."""
+    frame = pd.DataFrame([], columns=WEEKLY_COLUMNS)
+    assert build_weekly_insights(frame, weekly_targets([])) == {}
@@ -0,0 +1,143 @@
+"""Tests for the email outbox and the paced bulk mailer."""
+
+import json
+import smtplib
+import time
+import pytest
+import app.core.mailer as mailer
+from app.core.mailer import (
+    DEAD_KEY, DRAINERS_KEY, OUTBOX_KEY, RETRY_KEY, BulkMailer, Outbox
+)
+
+class FakeConnection:
+    """SMTP session that records sends and fails for chosen recipients."""
+
+    def __init__(self):
+        self.sent = []
+        self.errors = {}
+
+    def send(self, message):
+        error = self.errors.get(message.recipients[0])
+        if error:
+            raise error
+        self.sent.append(message.recipients[0])
+
+@pytest.fixture
+def connection(monkeypatch):
+    """Replace the worker's SMTP session with a fake."""
+    connection = FakeConnection()
+    monkeypatch.setattr(mailer, '_open_connection', lambda: connection)
+    monkeypatch.setattr(mailer, '_close_connection', lambda: None)
+    return connection
+
+@pytest.fixture
+def outbox(db, fake_redis):
+    """Create an outbox on a Lua-capable fake Redis."""
+    pytest.importorskip('lupa')
+    return Outbox(fake_redis, consumer='worker-1')
+
+def _message(recipient):
+    return {'subject': 'Hello', 'recipients': [recipient], 'html': '<p>Hi</p>', 'attempts': 0}
+
+def _mailer(outbox, rate=0, max_retries=2, max_drainers=2):
+    return BulkMailer(outbox, rate, batch_size=2, max_retries=max_retries,
+                      retry_backoff=30, max_drainers=max_drainers)
+
+def test_drain_sends_and_acknowledges(outbox, connection):
+    """Test that sent messages leave both the outbox and the processing list."""
+    outbox.push(*[_message(f'user{i}@example.com') for i in range(5)])
+
+    stats = _mailer(outbox).drain(limit=4)
+
+    assert connection.sent == [f'user{i}@example.com' for i in range(4)]
+    assert stats['sent'] == 4
+    assert stats['remaining'] == 1
+    assert outbox.redis.llen(outbox.processing_key) == 0
+    assert not outbox.redis.exists(DRAINERS_KEY)
+
+def test_failures_are_retried_then_dead_lettered(outbox, connection):
+    """Test backoff for transient errors and dead letters for permanent ones."""
+    connection.errors = {
+        'flaky@example.com': smtplib.SMTPServerDisconnected('Connection lost'),
+        'gone@example.com': smtplib.SMTPRecipientsRefused({})
+    }
+    outbox.push(_message('flaky@example.com'), _message('gone@example.com'))
+    before = time.time()
+
+    stats = _mailer(outbox).drain(limit=10)
+
+    assert (stats['sent'], stats['retried'], stats['dead']) == (0, 1, 1)
+    assert outbox.redis.llen(outbox.processing_key) == 0
+    [(raw, score)] = outbox.redis.zrange(RETRY_KEY, 0, -1, withscores=True)
+    assert json.loads(raw)['attempts'] == 1
+    assert before + 30 <= score <= time.time() + 30
+    assert 25 < stats['next_retry_in'] <= 30
+    assert json.loads(outbox.redis.lindex(DEAD_KEY, 0))['recipients'] == ['gone@example.com']
+
+def test_due_retries_are_promoted(outbox, connection):
+    """Test that retries whose backoff elapsed are sent, and give up after max_retries."""
+    message = dict(_message('flaky@example.com'), attempts=2)
+    outbox.redis.zadd(RETRY_KEY, {json.dumps(message): time.time() - 1})
+    connection.errors = {'flaky@example.com': smtplib.SMTPServerDisconnected('Again')}
+
+    stats = _mailer(outbox, max_retries=2).drain(limit=10)
+
+    assert stats['dead'] == 1
+    assert outbox.redis.zcard(RETRY_KEY) == 0
+    assert json.loads(outbox.redis.lindex(DEAD_KEY, 0))['attempts'] == 3
+
+def test_crashed_drain_is_recovered(outbox, connection):
+    """Test that messages taken by a crashed worker are sent by the next drain."""
+    outbox.push(*[_message(f'user{i}@example.com') for i in range(3)])
+    crashed = Outbox(outbox.redis, consumer='crashed')
+    assert [m['recipients'][0] for _, m in crashed.take(2)] == ['user0@example.com', 'user1@example.com']
+    assert outbox.size() == 1
+
+    _mailer(outbox).drain(limit=10)
+
+    assert connection.sent == ['user0@example.com', 'user1@example.com', 'user2@example.com']
+    assert outbox.redis.llen(crashed.processing_key) == 0
+
+def test_live_drainer_is_not_recovered(outbox, connection):
+    """Test that messages of a drainer with a live heartbeat are left alone."""
+    outbox.push(*[_message(f'user{i}@example.com') for i in range(3)])
+    live = Outbox(outbox.redis, consumer='live')
+    assert live.join(max_drainers=2)
+    live.take(2)
+
+    _mailer(outbox).drain(limit=10)
+
+    assert connection.sent == ['user2@example.com']
+    assert outbox.redis.llen(live.processing_key) == 2
+
+def test_drainers_are_capped(outbox, connection):
+    """Test that a drain is skipped while the maximum number of drains run."""
+    outbox.push(_message('user@example.com'))
+    assert Outbox(outbox.redis, consumer='other').join(max_drainers=1)
+
+    stats = _mailer(outbox, max_drainers=1).drain(limit=10)
+
+    assert stats['skipped']
+    assert connection.sent == []
+    assert outbox.size() == 1
+    assert _mailer(outbox, max_drainers=2).drain(limit=10)['sent'] == 1
+
+def test_drain_is_paced(outbox, connection, monkeypatch):
+    """Test that sends are spaced by the configured rate across drainers."""
+    clock = [1000.0]
+    monkeypatch.setattr(mailer.time, 'time', lambda: clock[0])
+    monkeypatch.setattr(mailer.time, 'sleep', lambda seconds: clock.__setitem__(0, clock[0] + seconds))
+    outbox.push(*[_message(f'user{i}@example.com') for i in range(5)])
+
+    _mailer(outbox, rate=10).drain(limit=10)
+    assert len(connection.sent) == 5
+    assert clock[0] == pytest.approx(1000.4)
+
+    # Another drainer's slot, reserved ahead, delays this one's next send
+    other = Outbox(outbox.redis, consumer='other')
+    assert other.join(max_drainers=2)
+    assert other.reserve_send(0.1) == pytest.approx(0.1)
+    outbox.push(_message('late@example.com'))
+
+    _mailer(outbox, rate=10).drain(limit=10)
+    assert clock[0] == pytest.approx(1000.6)
@@ -0,0 +1,58 @@
+"""Tests for the typed metric columns of spiritual records."""
+
+from datetime import date
+from app.models import User
+from app.models.user import SpiritualRecord, extract_metric_columns
+from app.core.backfills import backfill_metric_columns
+
+def test_extract_metric_columns():
+    """Test extraction of numeric metrics from a metrics document."""
+    values = extract_metric_columns({
+        'bible_study': {'duration': '30'},
+        'prayer': {'duration': 15},
+        'service': {'hours': 'lots'}
+    })
+
+    assert values == {
+        'bible_study_minutes': 30.0,
+        'prayer_minutes': 15.0,
+        'service_hours': None,
+        'meditation_minutes': None
+    }
+    assert set(extract_metric_columns(None).values()) == {None}
+
+def test_in_place_metric_edit(db):
+    """Test that editing a top-level metrics key updates the columns on flush."""
+    record = SpiritualRecord(date=date(2026, 10, 1), metrics={'prayer': {'duration': 10}})
+    db.session.add(record)
+    db.session.commit()
+
+    record.metrics['prayer'] = {'duration': 25}
+    db.session.commit()
+    db.session.expire_all()
+
+    assert record.prayer_minutes == 25.0
+
+def test_backfill_metric_columns(db):
+    """Test that the backfill fills the columns of rows written without them."""
+    user = User(email='backfill@example.com', name='Backfill User')
+    db.session.add(user)
+    db.session.commit()
+
+    # Inserted below the ORM, as rows from before the columns existed
+    db.session.execute(SpiritualRecord.__table__.insert(), [
+        {'user_id': user.id, 'date': date(2026, 10, day),
+         'metrics': {'bible_study': {'duration': day * 10}, 'meditation': {'duration': 5}}}
+        for day in range(1, 4)
+    ])
+    db.session.commit()
+
+    counts = []
+    assert backfill_metric_columns(batch_size=2, progress=counts.append) == 3
+    assert counts == [2, 3]
+
+    rows = db.session.query(
+        SpiritualRecord.bible_study_minutes, SpiritualRecord.meditation_minutes
+    ).order_by(SpiritualRecord.id).all()
+    assert rows == [(10.0, 5.0), (20.0, 5.0), (30.0, 5.0)]
+    assert backfill_metric_columns() == 0
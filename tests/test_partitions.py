@@ -0,0 +1,31 @@
+"""Tests for monthly partition helpers and history archive payloads."""
+
+import zlib
+import json
+from datetime import date, datetime
+from app.core.partitions import add_months, month_start, partition_name
+from app.core.export import encode_archive_rows
+
+def test_add_months():
+    """Test month arithmetic across year boundaries."""
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 10, 1), 0) == date(2026, 10, 1)
+
+def test_partition_name():
+    """Test partition naming for a month."""
+    month = month_start(date(2026, 3, 17))
+    assert month == date(2026, 3, 1)
+    assert partition_name('bible_studies', month) == 'bible_studies_2026_03'
+
+def test_encode_archive_rows():
+    """Test that archive payloads are compressed NDJSON."""
+    payload = encode_archive_rows([
+        {'id': 1, 'date': date(2024, 1, 5), 'created_at': datetime(2024, 1, 5, 8, 30)},
+        {'id': 2, 'date': date(2024, 1, 6), 'created_at': None}
+    ])
+    lines = zlib.decompress(payload).decode('utf-8').split('\n')
+    assert json.loads(lines[0]) == {
+        'id': 1, 'date': '2024-01-05', 'created_at': '2024-01-05T08:30:00'
+    }
+    assert json.loads(lines[1])['id'] == 2
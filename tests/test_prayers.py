@@ -0,0 +1,84 @@
+"""Tests for prayer request analytics and the theme index."""
+
+from datetime import datetime
+from app.models import User
+from app.models.user import PrayerRequest, PrayerTermDocuments, PrayerTermDocumentDelta
+from app.core.prayers import peak_hours, prayer_pattern_stats
+import app.core.themes as themes
+from app.core.themes import apply_document_deltas, index_requests, tokenize, top_themes
+
+def test_peak_hours():
+    """Test that peak hours are ordered by count, then by hour."""
+    histogram = [0] * 24
+    histogram[6], histogram[21], histogram[12] = 4, 4, 1
+
+    assert peak_hours(histogram) == [6, 21, 12]
+    assert peak_hours([0] * 24) == []
+
+def test_prayer_pattern_stats(db):
+    """Test counts, average answer time and hour histogram from SQL."""
+    user = User(email='prayer@example.com', name='Prayer User')
+    db.session.add(user)
+    db.session.commit()
+
+    db.session.add_all([
+        PrayerRequest(user_id=user.id, title='Healing', created_at=datetime(2026, 10, 1, 6),
+                      is_answered=True, answered_at=datetime(2026, 10, 2, 6)),
+        PrayerRequest(user_id=user.id, title='Family', created_at=datetime(2026, 10, 3, 6),
+                      is_answered=True, answered_at=datetime(2026, 10, 3, 18)),
+        PrayerRequest(user_id=user.id, title='Work', created_at=datetime(2026, 10, 4, 21))
+    ])
+    db.session.commit()
+
+    stats = prayer_pattern_stats(user.id)
+
+    assert stats['total_requests'] == 3
+    assert stats['answered_prayers'] == 2
+    assert stats['avg_answer_time'] == 18.0
+    assert stats['hourly_distribution'][6] == 2
+    assert stats['peak_prayer_times'] == [6, 21]
+    assert prayer_pattern_stats(user.id + 1) is None
+
+def test_tokenize():
+    """Test that theme terms drop stop words and plural endings."""
+    terms = tokenize('Healing for my mother', "Please pray for my mother's surgery and this illness")
+
+    assert terms == {'healing': 1, 'mother': 2, 'surgery': 1, 'illness': 1}
+
+def test_tokenize_plurals():
+    """Test that only regular plurals are reduced to their singular."""
+    terms = tokenize('Jesus Moses status crisis diagnosis righteous',
+                     'surgeries families churches exams friends')
+
+    assert set(terms) == {
+        'jesus', 'moses', 'status', 'crisis', 'diagnosis', 'righteous',
+        'surgery', 'family', 'churches', 'exam', 'friend'
+    }
+
+def test_top_themes(db, monkeypatch):
+    """Test that themes are maintained on insert and ranked by TF-IDF."""
+    monkeypatch.setattr(themes, '_document_total', [0.0, 0])
+    users = [User(email=f'themes{i}@example.com', name='Theme User') for i in range(2)]
+    db.session.add_all(users)
+    db.session.commit()
+
+    requests = [
+        PrayerRequest(user_id=users[0].id, title='Job interview', request='Guidance for the job search'),
+        PrayerRequest(user_id=users[0].id, title='Family', request='Peace in the family'),
+        PrayerRequest(user_id=users[1].id, title='Family', request='Family reunion')
+    ]
+    db.session.add_all(requests)
+    index_requests(requests)
+    db.session.commit()
+
+    # Document counts not yet applied are read from the deltas
+    pending = top_themes(users[0].id)
+    assert [t['theme'] for t in pending[:2]] == ['job', 'family']
+    assert pending[0]['count'] == 2
+    assert top_themes(users[1].id)[0] == {'theme': 'family', 'count': 2, 'score': 2.575}
+
+    assert apply_document_deltas(batch_size=4) > 4
+    assert PrayerTermDocumentDelta.query.count() == 0
+    assert PrayerTermDocuments.query.get('family').documents == 2
+    assert PrayerTermDocuments.query.get('') is None
+    assert top_themes(users[0].id) == pending
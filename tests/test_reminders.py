@@ -0,0 +1,92 @@
+"""Tests for Sabbath reminder scheduling."""
+
+from datetime import datetime
+import pytz
+from app.models import User
+from app.core.reminders import (
+    REMINDER_QUEUE_KEY, RETRY_DELAY, get_reminder_window, next_reminder_at
+)
+import app.tasks.notifications as notifications
+
+PROFILE = {
+    'timezone': 'America/New_York',
+    'sabbath_preferences': {
+        'preparation_start_hour': 15,
+        'notification_hours_before': 6
+    }
+}
+
+def test_reminder_window():
+    """Test the reminder window of the coming Friday in the user's timezone."""
+    # Wednesday 2026-10-14, 12:00 UTC
+    now = datetime(2026, 10, 14, 12, tzinfo=pytz.utc)
+    reminder_time, prep_time = get_reminder_window(PROFILE, now)
+    assert prep_time.isoformat() == '2026-10-16T15:00:00-04:00'
+    assert reminder_time.isoformat() == '2026-10-16T09:00:00-04:00'
+
+def test_next_reminder_at():
+    """Test that reminders are scheduled ahead, now, or for the following week."""
+    before = datetime(2026, 10, 14, 12, tzinfo=pytz.utc)
+    assert next_reminder_at(PROFILE, before).isoformat() == '2026-10-16T09:00:00-04:00'
+
+    # Inside the window the reminder is due immediately
+    inside = datetime(2026, 10, 16, 14, tzinfo=pytz.utc)
+    assert next_reminder_at(PROFILE, inside) == inside
+
+    # From the preparation start the next reminder is a week later
+    _, prep_time = get_reminder_window(PROFILE, before)
+    assert next_reminder_at(PROFILE, prep_time).isoformat() == '2026-10-23T09:00:00-04:00'
+
+def _due_users(db, *timezones):
+    """Create verified users whose reminder window never opens."""
+    users = [
+        User(email=f'due{index}@example.com', name='Due User', email_verified=True,
+             profile={'timezone': timezone, 'sabbath_preferences': {'notification_hours_before': 0}})
+        for index, timezone in enumerate(timezones)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+def test_failed_user_is_requeued(db, fake_redis, monkeypatch):
+    """Test that a user whose reminder fails is put back for a retry."""
+    good, bad = _due_users(db, 'America/New_York', 'Europe/London')
+    schedule = notifications.ReminderQueue.schedule
+
+    def flaky_schedule(queue, user_id, *args, **kwargs):
+        if user_id == bad.id:
+            raise ConnectionError('Database went away')
+        return schedule(queue, user_id, *args, **kwargs)
+    monkeypatch.setattr(notifications.ReminderQueue, 'schedule', flaky_schedule)
+    before = datetime.now(pytz.utc)
+
+    result = notifications.send_sabbath_reminders_chunk.run([good.id, bad.id])
+
+    assert result['status'] == 'success'
+    retry_at = fake_redis.zscore(REMINDER_QUEUE_KEY, bad.id)
+    assert (before + RETRY_DELAY).timestamp() <= retry_at <= (datetime.now(pytz.utc) + RETRY_DELAY).timestamp()
+    assert fake_redis.zscore(REMINDER_QUEUE_KEY, good.id) is not None
+
+def test_unknown_timezone_is_unscheduled(db, fake_redis):
+    """Test that a user with an invalid timezone is dropped instead of retried."""
+    good, bad = _due_users(db, 'America/New_York', 'Mars/Olympus_Mons')
+
+    result = notifications.send_sabbath_reminders_chunk.run([good.id, bad.id])
+
+    assert result['status'] == 'success'
+    assert fake_redis.zscore(REMINDER_QUEUE_KEY, bad.id) is None
+    assert fake_redis.zscore(REMINDER_QUEUE_KEY, good.id) is not None
+
+def test_failed_chunk_is_requeued(db, fake_redis, monkeypatch):
+    """Test that every user of a chunk stays queued when the chunk fails."""
+    users = _due_users(db, 'UTC', 'Europe/London')
+
+    def fail(*args, **kwargs):
+        raise ConnectionError('Redis went away')
+    monkeypatch.setattr(notifications.Outbox, 'push', fail)
+
+    result = notifications.send_sabbath_reminders_chunk.run([user.id for user in users])
+
+    assert result['status'] == 'error'
+    for user in users:
+        assert fake_redis.zscore(REMINDER_QUEUE_KEY, user.id) is not None
@@ -0,0 +1,97 @@
+"""Tests for full-text search over a user's spiritual history."""
+
+import importlib.util
+import os
+import pytest
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from app.models import User
+from app.models.user import PrayerRequest, BibleStudy
+from app.core.search import search_user_content
+
+MIGRATION = os.path.join(
+    os.path.dirname(__file__), os.pardir, 'migrations', 'versions', '0002_full_text_search.py'
+)
+
+@pytest.fixture
+def search_db(db):
+    """Create the FTS5 index and its triggers as migration 0002 does."""
+    spec = importlib.util.spec_from_file_location('full_text_search', MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    context = MigrationContext.configure(db.session.connection())
+    with Operations.context(context):
+        migration.upgrade()
+    db.session.commit()
+    return db
+
+@pytest.fixture
+def content(search_db):
+    """Create two users with overlapping prayer requests and studies."""
+    user = User(email='search@example.com', name='Search User')
+    other = User(email='other@example.com', name='Other User')
+    search_db.session.add_all([user, other])
+    search_db.session.commit()
+
+    items = {
+        'title': PrayerRequest(user_id=user.id, title='Healing for my father',
+                               request='He is in the hospital'),
+        'body': PrayerRequest(user_id=user.id, title='Family',
+                              request='Pray for healing in our family'),
+        'study': BibleStudy(user_id=user.id, book='James', chapter=5,
+                            notes='Prayer and healing of the sick'),
+        'other': PrayerRequest(user_id=other.id, title='Healing', request='Healing')
+    }
+    search_db.session.add_all(items.values())
+    search_db.session.commit()
+    return user, items
+
+def test_search_ranking(content):
+    """Test that title matches outrank body matches and other users are excluded."""
+    user, items = content
+
+    hits = search_user_content(user.id, 'healing')
+
+    assert [(hit['type'], hit['id']) for hit in hits][:1] == [('prayer_requests', items['title'].id)]
+    assert {(hit['type'], hit['id']) for hit in hits} == {
+        ('prayer_requests', items['title'].id),
+        ('prayer_requests', items['body'].id),
+        ('bible_studies', items['study'].id)
+    }
+    assert hits == sorted(hits, key=lambda hit: -hit['rank'])
+
+def test_search_kinds_filter(content):
+    """Test that results are restricted to the requested kinds."""
+    user, items = content
+
+    hits = search_user_content(user.id, 'healing', kinds=['bible_studies'])
+
+    assert [(hit['type'], hit['id']) for hit in hits] == [('bible_studies', items['study'].id)]
+    with pytest.raises(ValueError):
+        search_user_content(user.id, 'healing', kinds=['users'])
+
+def test_search_tracks_updates(search_db, content):
+    """Test that the triggers reindex updated rows."""
+    user, items = content
+    items['study'].notes = 'Anointing with oil'
+    search_db.session.commit()
+
+    kinds = ['bible_studies']
+    assert search_user_content(user.id, 'healing', kinds=kinds) == []
+    assert len(search_user_content(user.id, 'anointing', kinds=kinds)) == 1
+
+def test_search_endpoint(client, auth_headers, search_db):
+    """Test that the search endpoint returns compact items of the requested kind."""
+    client.post('/api/v1/spiritual/prayer-request', json={
+        'title': 'Strength',
+        'request': 'Strength for the week'
+    }, headers=auth_headers)
+
+    response = client.get('/api/v1/spiritual/search?q=strength&kind=prayer_requests',
+                          headers=auth_headers)
+    assert response.status_code == 200
+    assert [hit['item']['title'] for hit in response.json['results']] == ['Strength']
+
+    response = client.get('/api/v1/spiritual/search?q=strength&kind=users', headers=auth_headers)
+    assert response.status_code == 400
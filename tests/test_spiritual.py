@@ -1,25 +1,5 @@
 """Tests for spiritual growth functionality."""
 
-import pytest
-from app.models import User
-
-@pytest.fixture
-def auth_headers(client, db):
-    """Create authenticated user and return auth headers."""
-    # Create test user
-    user = User(email='test@example.com', name='Test User')
-    user.set_password('password123')
-    db.session.add(user)
-    db.session.commit()
-    
-    # Get auth token
-    response = client.post('/api/v1/auth/login', json={
-        'email': 'test@example.com',
-        'password': 'password123'
-    })
-    token = response.json['access_token']
-    return {'Authorization': f'Bearer {token}'}
-
 def test_spiritual_progress(client, auth_headers):
     """Test spiritual progress tracking."""
     response = client.post('/api/v1/spiritual/progress', json={
@@ -34,3 +14,34 @@ def test_spiritual_stats(client, auth_headers):
     response = client.get('/api/v1/spiritual/stats', headers=auth_headers)
     assert response.status_code == 200
     assert 'bible_study' in response.json
+
+def test_prayer_requests_sparse_fields(client, auth_headers):
+    """Test that list endpoints only return the requested fields."""
+    client.post('/api/v1/spiritual/prayer-request', json={
+        'title': 'Family',
+        'request': 'Pray for my family'
+    }, headers=auth_headers)
+    response = client.get(
+        '/api/v1/spiritual/prayer-requests?fields=title',
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert set(response.json['prayer_requests'][0]) == {'id', 'title'}
+
+def test_records_unknown_field(client, auth_headers):
+    """Test that unknown fields are rejected."""
+    response = client.get(
+        '/api/v1/spiritual/records?fields=id,password_hash',
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+def test_bible_study_invalid_chapter(client, auth_headers):
+    """Test that non-integer and out-of-range chapters are rejected."""
+    for chapter in ('3', None, 0, 17):
+        response = client.post('/api/v1/spiritual/bible-study', json={
+            'book': 'Romans',
+            'chapter': chapter,
+            'duration_minutes': 20
+        }, headers=auth_headers)
+        assert response.status_code == 400
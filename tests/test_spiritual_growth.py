@@ -0,0 +1,78 @@
+"""Tests for spiritual growth progress tracking."""
+
+from datetime import datetime
+import pytest
+from app.models import User, SpiritualProgress
+from app.core.spiritual_growth import SpiritualGrowthManager
+
+@pytest.fixture
+def users(db):
+    """Create two users."""
+    users = [
+        User(email='first@example.com', name='First User'),
+        User(email='second@example.com', name='Second User')
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+def test_get_users_stats(db, users):
+    """Test that the latest entry per user and category is reported."""
+    first, second = users
+    db.session.add_all([
+        SpiritualProgress(user_id=first.id, category='prayer', progress=40,
+                          created_at=datetime(2026, 10, 1)),
+        SpiritualProgress(user_id=first.id, category='prayer', progress=60,
+                          created_at=datetime(2026, 10, 8)),
+        SpiritualProgress(user_id=first.id, category='service', progress=20,
+                          created_at=datetime(2026, 10, 2)),
+        SpiritualProgress(user_id=second.id, category='prayer', progress=90,
+                          created_at=datetime(2026, 10, 3))
+    ])
+    db.session.commit()
+
+    stats = SpiritualGrowthManager.get_users_stats([first.id, second.id])
+
+    assert stats[first.id]['prayer']['progress'] == 60
+    assert stats[first.id]['prayer']['last_updated'] == datetime(2026, 10, 8)
+    assert stats[first.id]['service']['progress'] == 20
+    assert stats[first.id]['bible_study']['progress'] == 0
+    assert stats[second.id]['prayer']['progress'] == 90
+    assert SpiritualGrowthManager.get_users_stats([]) == {}
+
+def test_record_progress_bulk(db, users):
+    """Test that valid entries are committed together."""
+    user = users[0]
+
+    records = SpiritualGrowthManager.record_progress_bulk(user, [
+        {'category': 'prayer', 'progress': 50},
+        {'category': 'health', 'progress': 70, 'notes': 'Daily walks'}
+    ])
+    db.session.rollback()
+
+    assert len(records) == 2
+    assert SpiritualProgress.query.filter_by(user_id=user.id).count() == 2
+
+def test_record_progress_bulk_invalid(db, users):
+    """Test that one invalid entry rejects the whole batch."""
+    user = users[0]
+
+    for progress in ('50', None, 101, True):
+        with pytest.raises(ValueError, match='Entry 1'):
+            SpiritualGrowthManager.record_progress_bulk(user, [
+                {'category': 'prayer', 'progress': 50},
+                {'category': 'prayer', 'progress': progress}
+            ])
+
+    assert SpiritualProgress.query.filter_by(user_id=user.id).count() == 0
+
+def test_record_progress(db, users):
+    """Test that a single entry is validated and committed."""
+    user = users[0]
+
+    SpiritualGrowthManager.record_progress(user, 'bible_study', 80)
+    db.session.rollback()
+
+    assert SpiritualProgress.query.filter_by(user_id=user.id).count() == 1
+    with pytest.raises(ValueError, match='Invalid category'):
+        SpiritualGrowthManager.record_progress(user, 'sleep', 80)
@@ -0,0 +1,95 @@
+"""Tests for the streak and weekly goal engine."""
+
+from datetime import date
+import pytest
+from app.core.streaks import StreakTracker, week_key
+
+GOALS = {
+    'bible_study': {'study_time_minutes': 10, 'daily_chapters': 1},
+    'prayer': {'prayer_time_minutes': 5}
+}
+
+@pytest.fixture
+def tracker(fake_redis):
+    """Create a streak tracker on a Lua-capable fake Redis."""
+    pytest.importorskip('lupa')
+    return StreakTracker(fake_redis)
+
+def test_week_key():
+    """Test ISO week identifiers, including across a year boundary."""
+    assert week_key(date(2026, 10, 19)) == '2026-W43'
+    assert week_key(date(2027, 1, 1)) == '2026-W53'
+
+def test_consecutive_days(tracker):
+    """Test that activity on consecutive days extends the streak."""
+    for day in (12, 13, 14):
+        tracker.record_activity(1, date(2026, 10, day))
+
+    streak = tracker.get_progress(1, today=date(2026, 10, 14))['streak']
+    assert streak == {'current': 3, 'longest': 3, 'last_active': '2026-10-14'}
+
+def test_same_day_repeat(tracker):
+    """Test that repeated and backdated activity leaves the streak unchanged."""
+    tracker.record_activity(1, date(2026, 10, 12))
+    tracker.record_activity(1, date(2026, 10, 13))
+    tracker.record_activity(1, date(2026, 10, 13))
+    tracker.record_activity(1, date(2026, 10, 11))
+
+    streak = tracker.get_progress(1, today=date(2026, 10, 13))['streak']
+    assert streak['current'] == 2
+    assert streak['last_active'] == '2026-10-13'
+
+def test_gap_resets_streak(tracker):
+    """Test that a missed day restarts the streak but keeps the longest."""
+    for day in (10, 11, 12, 14):
+        tracker.record_activity(1, date(2026, 10, day))
+
+    streak = tracker.get_progress(1, today=date(2026, 10, 14))['streak']
+    assert streak['current'] == 1
+    assert streak['longest'] == 3
+
+    # Not active yesterday or today: the streak has lapsed
+    assert tracker.get_progress(1, today=date(2026, 10, 16))['streak']['current'] == 0
+
+def test_weekly_counters(tracker):
+    """Test that weekly totals accumulate per ISO week and meet goals."""
+    # Monday to Wednesday of one week, then the following Monday
+    for day in (12, 13, 14):
+        tracker.record_activity(1, date(2026, 10, day), study_minutes=25.5,
+                                prayer_minutes=15, chapters=3)
+    tracker.record_activity(1, date(2026, 10, 19), study_minutes=5)
+
+    week = tracker.get_progress(1, GOALS, today=date(2026, 10, 14))['week']
+    assert week['id'] == '2026-W42'
+    assert week['goals']['study_minutes'] == {'value': 76.5, 'target': 70, 'met': True}
+    assert week['goals']['prayer_minutes'] == {'value': 45.0, 'target': 35, 'met': True}
+    assert week['goals']['chapters']['value'] == 9.0
+    assert week['all_met']
+
+    week = tracker.get_progress(1, GOALS, today=date(2026, 10, 19))['week']
+    assert week['goals']['study_minutes']['value'] == 5.0
+    assert not week['all_met']
+
+def test_no_targets_are_not_met(tracker):
+    """Test that users without weekly targets are not reported as meeting them."""
+    tracker.record_activity(1, date(2026, 10, 14), study_minutes=30)
+
+    for goals in (None, {}, {'prayer': {'morning_prayer': True}}):
+        week = tracker.get_progress(1, goals, today=date(2026, 10, 14))['week']
+        assert not week['all_met']
+        assert week['goals']['study_minutes']['target'] is None
+
+def test_get_progress_many(tracker, monkeypatch):
+    """Test that batched reads match per-user reads across batch boundaries."""
+    monkeypatch.setattr('app.core.streaks.PROGRESS_BATCH_SIZE', 2)
+    for user_id in (1, 2, 3):
+        tracker.record_activity(user_id, date(2026, 10, 14), study_minutes=user_id * 10)
+    today = date(2026, 10, 14)
+
+    progress = tracker.get_progress_many({1: GOALS, 2: None, 3: GOALS, 4: GOALS}, today)
+
+    assert set(progress) == {1, 2, 3, 4}
+    for user_id, goals in ((1, GOALS), (2, None), (3, GOALS), (4, GOALS)):
+        assert progress[user_id] == tracker.get_progress(user_id, goals, today)
+    assert progress[3]['week']['goals']['study_minutes']['value'] == 30.0
+    assert progress[4]['streak']['current'] == 0
@@ -0,0 +1,39 @@
+"""Tests for Celery queue routing."""
+
+from types import SimpleNamespace
+import pytest
+from app.tasks import BATCH_QUEUE, REALTIME_QUEUE, BatchAnnotations, make_celery, task_queue
+
+@pytest.mark.parametrize('name, queue', [
+    ('app.tasks.notifications.send_preparation_reminder', REALTIME_QUEUE),
+    ('app.tasks.notifications.send_sabbath_reminders', REALTIME_QUEUE),
+    ('app.tasks.notifications.send_sabbath_reminders_chunk', REALTIME_QUEUE),
+    ('app.tasks.notifications.dispatch_outbox', REALTIME_QUEUE),
+    ('app.tasks.notifications.send_spiritual_insights', BATCH_QUEUE),
+    ('app.tasks.spiritual.analyze_spiritual_growth', BATCH_QUEUE),
+    ('app.tasks.spiritual.generate_all_weekly_reports', BATCH_QUEUE),
+    ('app.tasks.unknown', REALTIME_QUEUE)
+])
+def test_task_queue(name, queue):
+    """Test that tasks are routed by name, defaulting to the realtime queue."""
+    assert task_queue(name) == queue
+
+def test_batch_annotations():
+    """Test that only batch tasks drop their results."""
+    annotations = BatchAnnotations()
+
+    batch = SimpleNamespace(name='app.tasks.spiritual.analyze_spiritual_growth')
+    realtime = SimpleNamespace(name='app.tasks.notifications.send_preparation_reminder')
+
+    assert annotations.annotate(batch) == {'ignore_result': True}
+    assert annotations.annotate(realtime) is None
+
+def test_worker_queue_settings(app, monkeypatch):
+    """Test that a worker takes its queue's concurrency and prefetch settings."""
+    monkeypatch.setenv('CELERY_WORKER_QUEUE', BATCH_QUEUE)
+
+    celery = make_celery(app)
+
+    assert celery.conf.task_default_queue == REALTIME_QUEUE
+    assert celery.conf.worker_prefetch_multiplier == 1
+    assert celery.conf.task_acks_late
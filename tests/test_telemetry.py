@@ -0,0 +1,60 @@
+"""Tests for per-task resource telemetry."""
+
+import pstats
+import smtplib
+from email.message import EmailMessage
+from app.models import User
+from app.utils.telemetry import finish_task_run, save_profile, start_task_run
+
+def test_task_run_counts_queries(db):
+    """Test that queries made during a run are counted and timed."""
+    start_task_run('app.tasks.test')
+    db.session.add(User(email='telemetry@example.com', name='Telemetry User'))
+    db.session.commit()
+    User.query.filter_by(email='telemetry@example.com').first()
+    run = finish_task_run()
+
+    assert run.usage['task'] == 'app.tasks.test'
+    assert run.usage['db_queries'] >= 2
+    assert run.usage['db_time'] >= 0
+    assert run.usage['wall_time'] >= run.usage['db_time']
+    assert run.usage['peak_rss'] > 0
+    assert run.usage['redis_calls'] == 0
+    assert finish_task_run() is None
+
+def test_queries_outside_runs_are_ignored(db):
+    """Test that queries without a started run are not counted."""
+    User.query.first()
+    run = start_task_run('app.tasks.test')
+    finish_task_run()
+
+    assert run.usage['db_queries'] == 0
+
+def test_task_run_counts_smtp_sends(monkeypatch):
+    """Test that each message sent over SMTP is counted once."""
+    session = smtplib.SMTP()
+    monkeypatch.setattr(session, 'ehlo_or_helo_if_needed', lambda: None)
+    for command in ('mail', 'rcpt', 'data'):
+        monkeypatch.setattr(session, command, lambda *args, **kwargs: (250, b'OK'))
+    message = EmailMessage()
+    message['From'], message['To'], message['Subject'] = 'app@example.com', 'user@example.com', 'Hi'
+
+    start_task_run('app.tasks.test')
+    session.sendmail('app@example.com', ['user@example.com'], 'Hi')
+    session.send_message(message)
+    run = finish_task_run()
+
+    assert run.usage['smtp_calls'] == 2
+    assert run.usage['smtp_time'] >= 0
+
+def test_save_profile(tmp_path):
+    """Test that a sampled run is written as a loadable pstats file."""
+    run = start_task_run('app.tasks.test', profile=True)
+    sum(range(1000))
+    finish_task_run()
+
+    path = save_profile(run, str(tmp_path), 'abc123')
+
+    assert path.startswith(str(tmp_path / 'app.tasks.test'))
+    assert path.endswith('-abc123.prof')
+    assert pstats.Stats(path).total_calls > 0
@@ -0,0 +1,19 @@
+"""Tests for the user model."""
+
+from app.models import User
+
+def test_update_profile_is_persisted(db):
+    """Test that profile updates are written, not only changed in memory."""
+    user = User(email='profile@example.com', name='Profile User',
+                profile={'timezone': 'UTC'})
+    db.session.add(user)
+    db.session.commit()
+
+    user.update_profile({'timezone': 'Africa/Kampala', 'ministry_involvement': ['youth']})
+    db.session.commit()
+    db.session.expire_all()
+
+    assert db.session.get(User, user.id).profile == {
+        'timezone': 'Africa/Kampala',
+        'ministry_involvement': ['youth']
+    }
@@ -0,0 +1,39 @@
+"""Tests for cohort-wide weekly growth reports."""
+
+from datetime import date
+from types import SimpleNamespace
+import pandas as pd
+from app.core.insights import weekly_targets
+from app.core.weekly_reports import build_recommendations, report_period
+
+def test_report_period():
+    """Test that a report covers the seven days ending on its last day."""
+    assert report_period(date(2026, 10, 19)) == (date(2026, 10, 13), date(2026, 10, 19))
+
+def test_build_recommendations():
+    """Test recommendations for several users from one stats frame."""
+    stats = pd.DataFrame({
+        'records': [7, 1],
+        'active_days': [7, 1],
+        'bible_study_minutes': [70.0, 0.0],
+        'prayer_minutes': [140.0, 10.0],
+        'service_hours': [2.0, 0.0],
+        'meditation_minutes': [30.0, 0.0],
+        'bible_study_days': [7, 0],
+        'prayer_days': [7, 1]
+    }, index=pd.Index([1, 2], name='user_id'))
+    targets = weekly_targets([
+        SimpleNamespace(id=1, profile={'spiritual_goals': {'bible_study': {'study_time_minutes': 20}}}),
+        SimpleNamespace(id=2, profile={'spiritual_goals': {'prayer': {'prayer_time_minutes': 15}}})
+    ])
+
+    recommendations = build_recommendations(stats, targets)
+
+    assert recommendations[1] == ['Add a few minutes of Bible study each day to reach your weekly goal']
+    assert recommendations[2] == [
+        'Set aside time for daily Bible study',
+        'Spend a little more time in prayer to reach your weekly goal',
+        'Take time to meditate on a passage of Scripture',
+        'Look for an opportunity to serve someone this week',
+        'Make time with God part of more days of your week'
+    ]
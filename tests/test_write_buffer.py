@@ -0,0 +1,147 @@
+"""Tests for the group-commit write buffer."""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from app.models import User
+from app.models.user import SpiritualRecord, PrayerRequest, PrayerTermDocuments, PrayerTermDocumentDelta
+import app.core.write_buffer as write_buffer
+from app.core.write_buffer import PENDING_KEY, WriteBuffer, read_your_writes
+
+STREAM = 'writes:test'
+
+@pytest.fixture
+def buffer(db, fake_redis, monkeypatch):
+    """Create a write buffer on fake Redis that records streak updates."""
+    activities = []
+    monkeypatch.setattr(write_buffer, 'record_activity', lambda **kw: activities.append(kw))
+
+    user = User(email='buffer@example.com', name='Buffer User')
+    db.session.add(user)
+    db.session.commit()
+
+    buffer = WriteBuffer(fake_redis, STREAM, 'flushers', consumer='flusher-1')
+    buffer.ensure_group()
+    buffer.ensure_group()
+    buffer.user_id = user.id
+    buffer.activities = activities
+    return buffer
+
+def _record(minutes):
+    return {'category': 'prayer', 'metrics': {'prayer': {'duration': minutes}}}
+
+def test_enqueue_and_flush(buffer):
+    """Test that queued writes are inserted in one batch and acknowledged."""
+    user_id = buffer.user_id
+    buffer.enqueue('spiritual_record', user_id, _record(10))
+    buffer.enqueue('prayer_request', user_id, {'title': 'Peace', 'request': 'For peace'})
+    assert buffer.pending_count(user_id) == 2
+
+    assert buffer.flush(batch_size=10, block_ms=1) == 2
+
+    assert buffer.pending_count(user_id) == 0
+    assert SpiritualRecord.query.filter_by(user_id=user_id).one().prayer_minutes == 10.0
+    assert PrayerRequest.query.filter_by(user_id=user_id).count() == 1
+    # Theme document counts are applied once the batch is committed
+    assert PrayerTermDocumentDelta.query.count() == 0
+    assert PrayerTermDocuments.query.get('peace').documents == 1
+    assert len(buffer.activities) == 2
+    assert buffer.redis.xpending(STREAM, 'flushers')['pending'] == 0
+    assert buffer.flush(batch_size=10, block_ms=1) == 0
+
+def test_bad_entry_is_dead_lettered(buffer):
+    """Test that one bad write is dead-lettered and the rest are committed."""
+    user_id = buffer.user_id
+    buffer.enqueue('spiritual_record', user_id, _record(10))
+    buffer.enqueue('spiritual_record', user_id, {'metrics': {}})
+    buffer.enqueue('spiritual_record', user_id, _record(20))
+
+    assert buffer.flush(batch_size=10, block_ms=1) == 3
+
+    minutes = [record.prayer_minutes for record in SpiritualRecord.query.order_by(SpiritualRecord.id)]
+    assert minutes == [10.0, 20.0]
+    assert len(buffer.activities) == 2
+
+    dead = buffer.redis.xrange(buffer.dead_letter_stream)
+    assert len(dead) == 1
+    assert dead[0][1][b'data'] == b'{"metrics": {}}'
+
+    assert buffer.pending_count(user_id) == 0
+    assert buffer.redis.get(PENDING_KEY.format(user_id=user_id)) == b'0'
+    assert buffer.redis.xpending(STREAM, 'flushers')['pending'] == 0
+
+def test_connection_error_is_retried(buffer, monkeypatch):
+    """Test that a batch failing on a lost connection is retried, not dead-lettered."""
+    user_id = buffer.user_id
+    for minutes in (10, 20):
+        buffer.enqueue('spiritual_record', user_id, _record(minutes))
+    insert = WriteBuffer._insert
+    attempts = []
+
+    def flaky_insert(self, writes):
+        attempts.append(len(writes))
+        if len(attempts) == 1:
+            raise OperationalError('INSERT', {}, Exception('server closed the connection unexpectedly'))
+        return insert(self, writes)
+    monkeypatch.setattr(WriteBuffer, '_insert', flaky_insert)
+
+    assert buffer.flush(batch_size=10, block_ms=1) == 0
+    assert buffer.redis.xlen(buffer.dead_letter_stream) == 0
+    assert buffer.redis.xpending(STREAM, 'flushers')['pending'] == 2
+    assert buffer.pending_count(user_id) == 2
+
+    assert buffer.flush(batch_size=10, block_ms=1, claim_idle_ms=0) == 2
+    assert attempts == [2, 2]
+    assert SpiritualRecord.query.filter_by(user_id=user_id).count() == 2
+    assert buffer.pending_count(user_id) == 0
+    assert buffer.redis.xpending(STREAM, 'flushers')['pending'] == 0
+
+def test_replay_dead_letters(buffer):
+    """Test that dead-lettered writes are moved back onto the stream once."""
+    user_id = buffer.user_id
+    buffer.enqueue('spiritual_record', user_id, {'metrics': {}})
+    buffer.flush(batch_size=10, block_ms=1)
+    assert buffer.redis.xlen(buffer.dead_letter_stream) == 1
+
+    assert buffer.replay_dead_letters(batch_size=10) == 1
+    assert buffer.redis.xlen(buffer.dead_letter_stream) == 0
+    assert buffer.pending_count(user_id) == 1
+
+    # Still invalid: dead-lettered again, and nothing left to replay twice
+    assert buffer.flush(batch_size=10, block_ms=1) == 1
+    assert buffer.redis.xlen(buffer.dead_letter_stream) == 1
+    assert buffer.pending_count(user_id) == 0
+
+def test_abandoned_writes_are_reclaimed(buffer):
+    """Test that writes read by a crashed flusher are claimed by another."""
+    user_id = buffer.user_id
+    buffer.enqueue('spiritual_record', user_id, _record(15))
+
+    # Read but never acknowledged, as by a flusher that died mid-batch
+    buffer.redis.xreadgroup('flushers', 'crashed', {STREAM: '>'}, count=10)
+    assert buffer.flush(batch_size=10, block_ms=1, claim_idle_ms=60000) == 0
+
+    assert buffer.flush(batch_size=10, block_ms=1, claim_idle_ms=0) == 1
+    assert SpiritualRecord.query.filter_by(user_id=user_id).count() == 1
+    assert buffer.pending_count(user_id) == 0
+
+def test_read_your_writes(app, buffer, monkeypatch):
+    """Test that reads wait for pending writes up to the configured timeout."""
+    user_id = buffer.user_id
+    app.config.update(WRITE_BUFFER_ENABLED=True, WRITE_BUFFER_READ_WAIT_MS=20)
+    monkeypatch.setattr(write_buffer, 'get_jwt_identity', lambda: user_id)
+    warnings = []
+    monkeypatch.setattr(app.logger, 'warning', warnings.append)
+
+    @read_your_writes
+    def view():
+        return 'ok'
+
+    buffer.enqueue('spiritual_record', user_id, _record(5))
+    assert not buffer.wait_for_user(user_id, timeout_ms=10)
+    assert view() == 'ok'
+    assert len(warnings) == 1
+
+    buffer.flush(batch_size=10, block_ms=1)
+    assert buffer.wait_for_user(user_id, timeout_ms=10)
+    assert view() == 'ok'
+    assert len(warnings) == 1